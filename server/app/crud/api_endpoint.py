@@ -1,12 +1,13 @@
 """CRUD operations for discovered API endpoints."""
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
 from server.app.models.api_endpoint import APIEndpoint
 
 
@@ -57,6 +58,79 @@ def upsert_api_endpoint(
     ).first()
 
 
+def bulk_upsert_api_endpoints(
+    db: Session,
+    project_id: UUID,
+    endpoints: List[Dict[str, Any]],
+    js_asset_id: Optional[UUID] = None,
+    source: str = "js_analysis",
+    commit: bool = True,
+) -> Dict[Tuple[str, str], UUID]:
+    """
+    Upsert many endpoints; return a mapping of (method, endpoint) to id.
+
+    Each item needs ``endpoint``; ``method``, ``host``, ``requires_auth``,
+    ``risk_tags`` and ``evidence`` are optional. Conflicts update the same
+    columns as ``upsert_api_endpoint``.
+    """
+    values = dedupe_rows(
+        [
+            {
+                "project_id": project_id,
+                "js_asset_id": js_asset_id,
+                "endpoint": item["endpoint"],
+                "method": (item.get("method") or "GET").upper(),
+                "host": item.get("host"),
+                "source": source,
+                "requires_auth": item.get("requires_auth"),
+                "risk_tags": item.get("risk_tags") or [],
+                "evidence": item.get("evidence") or {},
+            }
+            for item in endpoints
+        ],
+        key_columns=("endpoint", "method"),
+    )
+
+    endpoint_ids: Dict[Tuple[str, str], UUID] = {}
+    for chunk in iter_value_chunks(values, APIEndpoint.__table__):
+        stmt = insert(APIEndpoint).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "endpoint", "method"],
+            set_={
+                "js_asset_id": stmt.excluded.js_asset_id,
+                "host": stmt.excluded.host,
+                "requires_auth": stmt.excluded.requires_auth,
+                "risk_tags": stmt.excluded.risk_tags,
+                "evidence": stmt.excluded.evidence,
+                "last_seen": func.now(),
+            },
+        )
+        returning = stmt.returning(APIEndpoint.id, APIEndpoint.method, APIEndpoint.endpoint)
+        for row in db.execute(returning):
+            endpoint_ids[(row.method, row.endpoint)] = row.id
+    if commit:
+        db.commit()
+    return endpoint_ids
+
+
+def touch_api_endpoints(
+    db: Session, js_asset_ids: Sequence[UUID], commit: bool = True
+) -> List[Tuple[str, str]]:
+    """Mark endpoints extracted from the given JS assets as seen now; return their keys."""
+    if not js_asset_ids:
+        return []
+    rows = db.execute(
+        update(APIEndpoint)
+        .where(APIEndpoint.js_asset_id.in_(list(js_asset_ids)))
+        .values(last_seen=func.now())
+        .returning(APIEndpoint.method, APIEndpoint.endpoint)
+    )
+    keys = [(row.method, row.endpoint) for row in rows]
+    if commit:
+        db.commit()
+    return keys
+
+
 def get_api_endpoint(db: Session, endpoint_id: UUID) -> Optional[APIEndpoint]:
     return db.get(APIEndpoint, endpoint_id)
 
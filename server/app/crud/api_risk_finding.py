@@ -1,12 +1,14 @@
 """CRUD operations for API risk findings."""
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
 from server.app.models.api_risk_finding import APIRiskFinding
 
 
@@ -78,6 +80,61 @@ def create_or_update_api_risk_finding(
     return finding
 
 
+def bulk_upsert_api_risk_findings(
+    db: Session,
+    project_id: UUID,
+    findings: List[Dict[str, Any]],
+    commit: bool = True,
+) -> Dict[Tuple[UUID, str], UUID]:
+    """
+    Create or update many findings; return a mapping of (endpoint_id, rule_name) to id.
+
+    Matches ``create_or_update_api_risk_finding``: an existing finding gets
+    the new severity, title, description, evidence and status, while its
+    status history and triage fields are left untouched.
+    """
+    values = dedupe_rows(
+        [
+            {
+                "project_id": project_id,
+                "endpoint_id": item["endpoint_id"],
+                "rule_name": item["rule_name"],
+                "severity": item["severity"],
+                "title": item["title"],
+                "description": item.get("description"),
+                "evidence": item.get("evidence") or {},
+                "status": item.get("status") or "open",
+                "status_history": [],
+            }
+            for item in findings
+        ],
+        key_columns=("endpoint_id", "rule_name"),
+    )
+
+    finding_ids: Dict[Tuple[UUID, str], UUID] = {}
+    for chunk in iter_value_chunks(values, APIRiskFinding.__table__):
+        stmt = insert(APIRiskFinding).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "endpoint_id", "rule_name"],
+            set_={
+                "severity": stmt.excluded.severity,
+                "title": stmt.excluded.title,
+                "description": stmt.excluded.description,
+                "evidence": stmt.excluded.evidence,
+                "status": stmt.excluded.status,
+                "updated_at": func.now(),
+            },
+        )
+        returning = stmt.returning(
+            APIRiskFinding.id, APIRiskFinding.endpoint_id, APIRiskFinding.rule_name
+        )
+        for row in db.execute(returning):
+            finding_ids[(row.endpoint_id, row.rule_name)] = row.id
+    if commit:
+        db.commit()
+    return finding_ids
+
+
 def get_api_risk_finding(db: Session, finding_id: UUID) -> Optional[APIRiskFinding]:
     return db.get(APIRiskFinding, finding_id)
 
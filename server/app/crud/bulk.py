@@ -0,0 +1,42 @@
+"""Helpers for multi-row INSERT ... ON CONFLICT statements."""
+
+from typing import Any, Dict, Iterator, List, Sequence
+
+from sqlalchemy import Table
+
+# PostgreSQL accepts at most 65535 bind parameters per statement.
+POSTGRES_MAX_BIND_PARAMS = 65535
+# Kept free for parameters outside VALUES, such as ON CONFLICT literals.
+STATEMENT_PARAM_RESERVE = 64
+
+
+def iter_value_chunks(
+    rows: Sequence[Dict[str, Any]],
+    table: Table,
+    max_params: int = POSTGRES_MAX_BIND_PARAMS,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Split row dicts for ``table`` into chunks that stay under the bind parameter limit.
+
+    A multi-row INSERT binds one parameter per row for every column with a
+    Python-side default (ids, timestamps) on top of the row's own keys, so
+    the budget is per table column rather than per row key.
+    """
+    if not rows:
+        return
+    columns = max(1, len(table.c), len(rows[0]))
+    chunk_size = max(1, (max_params - STATEMENT_PARAM_RESERVE) // columns)
+    for start in range(0, len(rows), chunk_size):
+        yield list(rows[start : start + chunk_size])
+
+
+def dedupe_rows(rows: Sequence[Dict[str, Any]], key_columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Keep the last row per conflict key.
+
+    ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+    """
+    unique: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        unique[tuple(row[column] for column in key_columns)] = row
+    return list(unique.values())
@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 from uuid import UUID
 
 from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import iter_value_chunks
+from server.app.crud.pagination import iter_keyset_batches
 from server.app.models.ip_address import IPAddress
 
 
@@ -35,6 +37,33 @@ def upsert_ip_address(
     return result
 
 
+def bulk_upsert_ip_addresses(
+    db: Session,
+    project_id: UUID,
+    ips: Iterable[str],
+    source: str,
+    commit: bool = True,
+) -> Dict[str, UUID]:
+    """Upsert many IPs in multi-row statements; return a mapping of IP to id."""
+    values = [
+        {"project_id": project_id, "ip": ip, "source": source}
+        for ip in dict.fromkeys(ips)
+    ]
+    ip_ids: Dict[str, UUID] = {}
+    for chunk in iter_value_chunks(values, IPAddress.__table__):
+        stmt = insert(IPAddress).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "ip"],
+            set_={"last_seen": func.now()},
+            where=(IPAddress.project_id == stmt.excluded.project_id),
+        )
+        for row in db.execute(stmt.returning(IPAddress.id, IPAddress.ip)):
+            ip_ids[row.ip] = row.id
+    if commit:
+        db.commit()
+    return ip_ids
+
+
 def get_ip_address(db: Session, ip_id: UUID) -> Optional[IPAddress]:
     return db.get(IPAddress, ip_id)
 
@@ -64,6 +93,16 @@ def list_ip_addresses(
     return list(db.scalars(stmt).all())
 
 
+def iter_ip_address_batches(
+    db: Session,
+    project_id: UUID,
+    batch_size: int = 500,
+) -> Iterator[List[IPAddress]]:
+    """Stream every project IP address in keyset pages ordered by IP."""
+    stmt = select(IPAddress).where(IPAddress.project_id == project_id)
+    return iter_keyset_batches(db, stmt, IPAddress.ip, batch_size=batch_size)
+
+
 def count_ip_addresses(db: Session, project_id: UUID) -> int:
     stmt = select(func.count()).select_from(IPAddress).where(IPAddress.project_id == project_id)
     return db.scalar(stmt) or 0
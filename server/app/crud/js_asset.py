@@ -1,9 +1,9 @@
 """CRUD operations for JS assets."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
@@ -19,6 +19,7 @@ def upsert_js_asset(
     web_asset_id: Optional[UUID] = None,
     source_url: Optional[str] = None,
     scan_metadata: Optional[dict] = None,
+    commit: bool = True,
 ) -> JSAsset:
     """Insert or update a JS asset by unique key."""
     stmt = insert(JSAsset).values(
@@ -39,15 +40,41 @@ def upsert_js_asset(
             "last_seen": func.now(),
         },
     )
-    db.execute(stmt)
-    db.commit()
-    return db.scalars(
-        select(JSAsset).where(
-            JSAsset.project_id == project_id,
-            JSAsset.script_url == script_url,
-            JSAsset.content_hash == content_hash,
-        )
-    ).first()
+    js_asset = db.scalars(
+        stmt.returning(JSAsset),
+        execution_options={"populate_existing": True},
+    ).one()
+    if commit:
+        db.commit()
+    return js_asset
+
+
+def get_latest_js_assets(
+    db: Session,
+    project_id: UUID,
+    script_urls: Sequence[str],
+) -> Dict[str, JSAsset]:
+    """Return the most recently seen JS asset for each of the given script URLs."""
+    if not script_urls:
+        return {}
+    stmt = (
+        select(JSAsset)
+        .where(JSAsset.project_id == project_id, JSAsset.script_url.in_(list(script_urls)))
+        .order_by(JSAsset.script_url, JSAsset.last_seen.desc())
+        .distinct(JSAsset.script_url)
+    )
+    return {js_asset.script_url: js_asset for js_asset in db.scalars(stmt).all()}
+
+
+def touch_js_assets(db: Session, js_asset_ids: Sequence[UUID], commit: bool = True) -> None:
+    """Mark JS assets as seen now without rewriting them."""
+    if not js_asset_ids:
+        return
+    db.execute(
+        update(JSAsset).where(JSAsset.id.in_(list(js_asset_ids))).values(last_seen=func.now())
+    )
+    if commit:
+        db.commit()
 
 
 def get_js_asset(db: Session, js_asset_id: UUID) -> Optional[JSAsset]:
@@ -0,0 +1,40 @@
+"""Keyset pagination helpers for streaming large target sets."""
+
+from typing import Any, Iterator, List
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+
+def iter_keyset_batches(
+    db: Session,
+    stmt: Select,
+    key_column,
+    batch_size: int = 500,
+) -> Iterator[List[Any]]:
+    """
+    Yield ORM rows of ``stmt`` in pages ordered by a unique key column.
+
+    Each page is a fresh ``WHERE key > :last`` query, so callers can commit
+    between pages without invalidating an open cursor. Rows are expunged
+    from the session: commits made while processing a page do not expire
+    them, and the identity map does not grow with the project size.
+    """
+    batch_size = max(1, int(batch_size))
+    last_key = None
+
+    while True:
+        page_stmt = stmt.order_by(key_column).limit(batch_size)
+        if last_key is not None:
+            page_stmt = page_stmt.where(key_column > last_key)
+        rows = list(db.scalars(page_stmt.execution_options(yield_per=batch_size)))
+        if not rows:
+            return
+
+        last_key = getattr(rows[-1], key_column.key)
+        for row in rows:
+            db.expunge(row)
+        yield rows
+
+        if len(rows) < batch_size:
+            return
@@ -1,10 +1,11 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
 from server.app.models.port import Port
 
 
@@ -49,6 +50,59 @@ def upsert_port(
     return result
 
 
+def bulk_upsert_ports(
+    db: Session,
+    ports: List[Dict[str, Any]],
+    commit: bool = True,
+) -> List[Port]:
+    """
+    Upsert ports for many IPs with multi-row INSERT ... ON CONFLICT ... RETURNING.
+
+    Each item needs ``ip_id`` and ``port``; other Port columns are optional.
+    Large inputs are chunked to stay under the Postgres bind parameter limit.
+    """
+    if not ports:
+        return []
+    values = dedupe_rows(
+        [
+            {
+                "ip_id": item["ip_id"],
+                "port": int(item["port"]),
+                "protocol": item.get("protocol") or "tcp",
+                "state": item.get("state"),
+                "service": item.get("service"),
+                "version": item.get("version"),
+                "banner": item.get("banner"),
+            }
+            for item in ports
+        ],
+        key_columns=("ip_id", "port", "protocol"),
+    )
+
+    results: List[Port] = []
+    for chunk in iter_value_chunks(values, Port.__table__):
+        stmt = insert(Port).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["ip_id", "port", "protocol"],
+            set_={
+                "state": stmt.excluded.state,
+                "service": stmt.excluded.service,
+                "version": stmt.excluded.version,
+                "banner": stmt.excluded.banner,
+                "last_seen": func.now(),
+            },
+        )
+        results.extend(
+            db.scalars(
+                stmt.returning(Port),
+                execution_options={"populate_existing": True},
+            ).all()
+        )
+    if commit:
+        db.commit()
+    return results
+
+
 def list_ports_by_ip(
     db: Session,
     ip_id: UUID,
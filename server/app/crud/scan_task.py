@@ -36,6 +36,11 @@ def get_scan_task(db: Session, task_id: UUID) -> Optional[ScanTask]:
     return db.get(ScanTask, task_id)
 
 
+def get_scan_task_status(db: Session, task_id: UUID) -> Optional[str]:
+    """Read a task's current status from the database, bypassing the session cache."""
+    return db.scalar(select(ScanTask.status).where(ScanTask.id == task_id))
+
+
 def list_scan_tasks(
     db: Session,
     project_id: UUID,
@@ -172,12 +177,15 @@ def update_scan_task_progress(
     db: Session,
     task_id: UUID,
     completed_targets: int,
+    total_targets: Optional[int] = None,
 ) -> Optional[ScanTask]:
     task = db.get(ScanTask, task_id)
     if not task:
         return None
     if task.status == "cancelled":
         return task
+    if total_targets is not None:
+        task.total_targets = total_targets
     task.completed_targets = completed_targets
     if task.total_targets > 0:
         task.progress = int((completed_targets / task.total_targets) * 100)
@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from uuid import UUID
 
 from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
+from server.app.crud.pagination import iter_keyset_batches
 from server.app.models.subdomain import Subdomain
 from server.app.utils.fingerprint import compute_subdomain_fingerprint
 
@@ -54,29 +56,84 @@ def bulk_upsert_subdomains(
     root_domain: str,
     subdomains: List[str],
     source: str,
+    commit: bool = True,
 ) -> int:
+    """Insert subdomains or bump their last_seen; return the number of unique names."""
     if not subdomains:
         return 0
-    values = [
-        {
-            "project_id": project_id,
-            "root_domain": root_domain,
-            "subdomain": sub,
-            "source": source,
-            "ip_addresses": [],
-            "fingerprint_hash": compute_subdomain_fingerprint(str(project_id), sub),
-        }
-        for sub in subdomains
-    ]
-    stmt = insert(Subdomain).values(values)
-    stmt = stmt.on_conflict_do_update(
-        index_elements=["project_id", "subdomain"],
-        set_={"last_seen": func.now()},
-        where=(Subdomain.project_id == stmt.excluded.project_id),
+    values = dedupe_rows(
+        [
+            {
+                "project_id": project_id,
+                "root_domain": root_domain,
+                "subdomain": sub,
+                "source": source,
+                "ip_addresses": [],
+                "fingerprint_hash": compute_subdomain_fingerprint(str(project_id), sub),
+            }
+            for sub in subdomains
+        ],
+        key_columns=("subdomain",),
     )
-    db.execute(stmt)
-    db.commit()
-    return len(subdomains)
+    for chunk in iter_value_chunks(values, Subdomain.__table__):
+        stmt = insert(Subdomain).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "subdomain"],
+            set_={"last_seen": func.now()},
+            where=(Subdomain.project_id == stmt.excluded.project_id),
+        )
+        db.execute(stmt)
+    if commit:
+        db.commit()
+    return len(values)
+
+
+def bulk_upsert_subdomain_resolutions(
+    db: Session,
+    project_id: UUID,
+    resolutions: List[Dict[str, Any]],
+    commit: bool = True,
+) -> Dict[str, UUID]:
+    """
+    Write DNS results (``ip_addresses``/``cname``) for many subdomains at once.
+
+    Each item needs ``root_domain``, ``subdomain`` and ``source``. Returns a
+    mapping of subdomain to id.
+    """
+    values = dedupe_rows(
+        [
+            {
+                "project_id": project_id,
+                "root_domain": item["root_domain"],
+                "subdomain": item["subdomain"],
+                "source": item.get("source"),
+                "ip_addresses": list(item.get("ip_addresses") or []),
+                "cname": item.get("cname"),
+                "fingerprint_hash": compute_subdomain_fingerprint(
+                    str(project_id), item["subdomain"]
+                ),
+            }
+            for item in resolutions
+        ],
+        key_columns=("subdomain",),
+    )
+    subdomain_ids: Dict[str, UUID] = {}
+    for chunk in iter_value_chunks(values, Subdomain.__table__):
+        stmt = insert(Subdomain).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "subdomain"],
+            set_={
+                "ip_addresses": stmt.excluded.ip_addresses,
+                "cname": stmt.excluded.cname,
+                "last_seen": func.now(),
+            },
+            where=(Subdomain.project_id == stmt.excluded.project_id),
+        )
+        for row in db.execute(stmt.returning(Subdomain.id, Subdomain.subdomain)):
+            subdomain_ids[row.subdomain] = row.id
+    if commit:
+        db.commit()
+    return subdomain_ids
 
 
 def list_subdomains(
@@ -93,6 +150,19 @@ def list_subdomains(
     return list(db.scalars(stmt).all())
 
 
+def iter_subdomain_batches(
+    db: Session,
+    project_id: UUID,
+    root_domain: Optional[str] = None,
+    batch_size: int = 500,
+) -> Iterator[List[Subdomain]]:
+    """Stream every project subdomain in keyset pages ordered by name."""
+    stmt = select(Subdomain).where(Subdomain.project_id == project_id)
+    if root_domain:
+        stmt = stmt.where(Subdomain.root_domain == root_domain)
+    return iter_keyset_batches(db, stmt, Subdomain.subdomain, batch_size=batch_size)
+
+
 def count_subdomains(
     db: Session,
     project_id: UUID,
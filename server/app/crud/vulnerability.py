@@ -1,13 +1,39 @@
 """Vulnerability CRUD operations."""
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import func
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
 from server.app.models.vulnerability import Vulnerability
 
+# Finding columns refreshed when a vulnerability is seen again; triage
+# columns (status, false positive, confirmed/fixed dates) are left alone.
+VULNERABILITY_DETAIL_COLUMNS = (
+    "target_host",
+    "target_ip",
+    "target_port",
+    "template_name",
+    "severity",
+    "vuln_type",
+    "title",
+    "description",
+    "reference",
+    "tags",
+    "matched_at",
+    "matcher_name",
+    "extracted_results",
+    "curl_command",
+    "request",
+    "response",
+    "scanner",
+    "scan_task_id",
+    "raw_output",
+)
+
 
 def upsert_vulnerability(
     db: Session,
@@ -44,6 +70,64 @@ def upsert_vulnerability(
     return vuln
 
 
+def bulk_upsert_vulnerabilities(
+    db: Session,
+    project_id: UUID,
+    findings: List[Dict[str, Any]],
+    commit: bool = True,
+) -> Tuple[List[UUID], List[UUID]]:
+    """
+    Create or update many vulnerabilities; return (inserted ids, re-seen ids).
+
+    Findings are keyed on (target_url, template_id) like
+    ``upsert_vulnerability``: a re-seen vulnerability keeps its existing
+    values where the new finding has None, and its last_seen is bumped.
+    Findings are written in groups that set the same columns, so a column
+    a finding lacks takes the model default on insert and is left alone
+    on conflict.
+    """
+    rows = dedupe_rows(
+        [
+            {
+                "target_url": item["target_url"],
+                "template_id": item["template_id"],
+                **{
+                    column: item[column]
+                    for column in VULNERABILITY_DETAIL_COLUMNS
+                    if item.get(column) is not None
+                },
+            }
+            for item in findings
+        ],
+        key_columns=("target_url", "template_id"),
+    )
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for row in rows:
+        columns = tuple(column for column in VULNERABILITY_DETAIL_COLUMNS if column in row)
+        groups.setdefault(columns, []).append({"project_id": project_id, **row})
+
+    inserted: List[UUID] = []
+    seen: List[UUID] = []
+    for columns, values in groups.items():
+        for chunk in iter_value_chunks(values, Vulnerability.__table__):
+            stmt = insert(Vulnerability).values(chunk)
+            set_: Dict[str, Any] = {column: stmt.excluded[column] for column in columns}
+            set_["last_seen"] = func.now()
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["project_id", "target_url", "template_id"],
+                set_=set_,
+            )
+            # xmax is 0 only on a freshly inserted row version.
+            returning = stmt.returning(
+                Vulnerability.id, literal_column("xmax = 0").label("inserted")
+            )
+            for row in db.execute(returning):
+                (inserted if row.inserted else seen).append(row.id)
+    if commit:
+        db.commit()
+    return inserted, seen
+
+
 def get_vulnerability(db: Session, vuln_id: UUID) -> Optional[Vulnerability]:
     """Get a vulnerability by ID."""
     return db.query(Vulnerability).filter(Vulnerability.id == vuln_id).first()
@@ -1,10 +1,12 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from server.app.crud.bulk import dedupe_rows, iter_value_chunks
+from server.app.crud.pagination import iter_keyset_batches
 from server.app.models.web_asset import WebAsset
 from server.app.utils.fingerprint import compute_url_fingerprint
 
@@ -48,6 +50,150 @@ def upsert_web_asset(
     ).first()
 
 
+# Columns written by HTTP probing; other columns keep their stored values.
+PROBE_COLUMNS = (
+    "ip_id",
+    "port_id",
+    "title",
+    "status_code",
+    "content_length",
+    "content_type",
+    "server",
+    "technologies",
+    "is_alive",
+    "response_hash",
+)
+
+
+def bulk_upsert_web_assets(
+    db: Session,
+    project_id: UUID,
+    assets: List[Dict[str, Any]],
+    commit: bool = True,
+) -> Dict[str, UUID]:
+    """
+    Upsert HTTP probe results for many URLs; return a mapping of URL to id.
+
+    Only probe columns are updated on conflict, so fingerprints, headers and
+    screenshots written by later stages are preserved.
+    """
+    values = dedupe_rows(
+        [
+            {
+                "project_id": project_id,
+                "url": item["url"],
+                "fingerprint_hash": compute_url_fingerprint(str(project_id), item["url"]),
+                **{column: item.get(column) for column in PROBE_COLUMNS},
+            }
+            for item in assets
+        ],
+        key_columns=("url",),
+    )
+    for row in values:
+        row["technologies"] = row["technologies"] or []
+        row["is_alive"] = bool(row["is_alive"])
+
+    asset_ids: Dict[str, UUID] = {}
+    for chunk in iter_value_chunks(values, WebAsset.__table__):
+        stmt = insert(WebAsset).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "url"],
+            set_={
+                **{
+                    column: getattr(stmt.excluded, column)
+                    for column in PROBE_COLUMNS
+                    if column not in ("ip_id", "port_id")
+                },
+                "last_seen": func.now(),
+            },
+        )
+        for row in db.execute(stmt.returning(WebAsset.id, WebAsset.url)):
+            asset_ids[row.url] = row.id
+    if commit:
+        db.commit()
+    return asset_ids
+
+
+def touch_web_assets(db: Session, asset_ids: Sequence[UUID], commit: bool = True) -> None:
+    """Mark web assets as seen now without rewriting them."""
+    if not asset_ids:
+        return
+    db.execute(update(WebAsset).where(WebAsset.id.in_(list(asset_ids))).values(last_seen=func.now()))
+    if commit:
+        db.commit()
+
+
+def get_screenshot_paths_by_response_hash(
+    db: Session,
+    project_id: UUID,
+    response_hashes: Sequence[str],
+) -> Dict[str, str]:
+    """Return an existing screenshot path for each response hash already captured."""
+    if not response_hashes:
+        return {}
+    stmt = (
+        select(WebAsset.response_hash, WebAsset.screenshot_path)
+        .where(
+            WebAsset.project_id == project_id,
+            WebAsset.response_hash.in_(list(response_hashes)),
+            WebAsset.screenshot_path.isnot(None),
+            WebAsset.screenshot_path != "",
+        )
+        .order_by(WebAsset.response_hash, WebAsset.last_seen.desc())
+        .distinct(WebAsset.response_hash)
+    )
+    return {row.response_hash: row.screenshot_path for row in db.execute(stmt)}
+
+
+def list_screenshot_paths(db: Session) -> Set[str]:
+    """Return every screenshot path referenced by a web asset, across projects."""
+    stmt = select(WebAsset.screenshot_path).where(
+        WebAsset.screenshot_path.isnot(None), WebAsset.screenshot_path != ""
+    )
+    return set(db.scalars(stmt.distinct()).all())
+
+
+def update_screenshot_paths(
+    db: Session, paths: Dict[UUID, str], commit: bool = True
+) -> None:
+    """Set screenshot_path for many assets by id, leaving other columns untouched."""
+    if not paths:
+        return
+    db.execute(
+        update(WebAsset),
+        [{"id": asset_id, "screenshot_path": path} for asset_id, path in paths.items()],
+    )
+    if commit:
+        db.commit()
+
+
+def update_web_asset_fingerprints(
+    db: Session, updates: Sequence[Dict[str, Any]], commit: bool = True
+) -> None:
+    """
+    Set fingerprints, and headers where given, for many assets by id.
+
+    Each update holds ``id`` and ``fingerprints`` and optionally ``headers``;
+    probe and screenshot columns are left untouched, and so are the stored
+    headers of rows that carry none.
+    """
+    groups: Dict[bool, List[Dict[str, Any]]] = {}
+    for item in updates:
+        row = {"asset_id": item["id"], "fingerprints": item["fingerprints"]}
+        if item.get("headers"):
+            row["headers"] = item["headers"]
+        groups.setdefault("headers" in row, []).append(row)
+    table = WebAsset.__table__
+    for with_headers, rows in groups.items():
+        values = {"fingerprints": bindparam("fingerprints"), "last_seen": func.now()}
+        if with_headers:
+            values["headers"] = bindparam("headers")
+        stmt = update(table).where(table.c.id == bindparam("asset_id")).values(values)
+        db.execute(stmt, rows)
+    if updates and commit:
+        db.commit()
+
+
 def get_web_asset(db: Session, asset_id: UUID) -> Optional[WebAsset]:
     return db.get(WebAsset, asset_id)
 
@@ -69,6 +215,22 @@ def list_web_assets(
     return list(db.scalars(stmt).all())
 
 
+def iter_web_asset_batches(
+    db: Session,
+    project_id: UUID,
+    status_code: Optional[int] = None,
+    is_alive: Optional[bool] = None,
+    batch_size: int = 500,
+) -> Iterator[List[WebAsset]]:
+    """Stream every matching project web asset in keyset pages ordered by URL."""
+    stmt = select(WebAsset).where(WebAsset.project_id == project_id)
+    if status_code is not None:
+        stmt = stmt.where(WebAsset.status_code == status_code)
+    if is_alive is not None:
+        stmt = stmt.where(WebAsset.is_alive == is_alive)
+    return iter_keyset_batches(db, stmt, WebAsset.url, batch_size=batch_size)
+
+
 def count_web_assets(
     db: Session,
     project_id: UUID,
@@ -2,7 +2,9 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
+
+from worker.app.utils.screenshot_store import thumbnail_path
 
 
 class WebAssetOut(BaseModel):
@@ -25,3 +27,8 @@ class WebAssetOut(BaseModel):
     last_seen: datetime
 
     model_config = {"from_attributes": True}
+
+    @computed_field
+    @property
+    def screenshot_thumbnail_path(self) -> Optional[str]:
+        return thumbnail_path(self.screenshot_path)
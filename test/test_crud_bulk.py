@@ -0,0 +1,287 @@
+"""Tests for multi-row upsert helpers."""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+
+from server.app.crud import ip_address as crud_ip
+from server.app.crud import port as crud_port
+from server.app.crud import subdomain as crud_subdomain
+from server.app.crud.bulk import (
+    POSTGRES_MAX_BIND_PARAMS,
+    STATEMENT_PARAM_RESERVE,
+    dedupe_rows,
+    iter_value_chunks,
+)
+
+
+def test_iter_value_chunks_budgets_by_table_columns():
+    table = Table(
+        "t", MetaData(), *(Column(name, Integer) for name in ("a", "b", "c", "d"))
+    )
+    rows = [{"a": i, "b": i} for i in range(10)]
+
+    chunks = list(iter_value_chunks(rows, table, max_params=12 + STATEMENT_PARAM_RESERVE))
+
+    # Four table columns, not two row keys, count against the budget.
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+
+
+def test_dedupe_rows_keeps_last_row_per_key():
+    rows = [
+        {"ip_id": 1, "port": 80, "service": "old"},
+        {"ip_id": 1, "port": 443, "service": "https"},
+        {"ip_id": 1, "port": 80, "service": "http"},
+    ]
+
+    assert dedupe_rows(rows, ("ip_id", "port")) == [
+        {"ip_id": 1, "port": 80, "service": "http"},
+        {"ip_id": 1, "port": 443, "service": "https"},
+    ]
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def scalars(self, stmt, execution_options=None):
+        self.statements.append(stmt)
+        return self
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return iter([])
+
+    def all(self):
+        return []
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_bulk_upsert_ports_emits_single_returning_upsert_and_commit():
+    db = _RecordingSession()
+    ip_id = uuid4()
+
+    crud_port.bulk_upsert_ports(
+        db,
+        [
+            {"ip_id": ip_id, "port": 22, "service": "ssh"},
+            {"ip_id": ip_id, "port": 80, "state": "open"},
+        ],
+    )
+
+    assert len(db.statements) == 1
+    assert db.commits == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (ip_id, port, protocol) DO UPDATE" in sql
+    assert "RETURNING" in sql
+
+
+def test_dns_bulk_writes_share_one_transaction():
+    db = _RecordingSession()
+    project_id = uuid4()
+
+    crud_ip.bulk_upsert_ip_addresses(
+        db, project_id, ["10.0.0.1", "10.0.0.2", "10.0.0.1"], source="dns_resolve", commit=False
+    )
+    crud_subdomain.bulk_upsert_subdomain_resolutions(
+        db,
+        project_id,
+        [
+            {
+                "root_domain": "example.com",
+                "subdomain": "www.example.com",
+                "source": "subfinder",
+                "ip_addresses": ["10.0.0.1"],
+                "cname": "edge.example.net",
+            }
+        ],
+    )
+
+    assert len(db.statements) == 2
+    assert db.commits == 1
+    ip_stmt, subdomain_stmt = db.statements
+    assert len(ip_stmt.compile(dialect=postgresql.dialect()).params) >= 4
+    sql = str(subdomain_stmt.compile(dialect=postgresql.dialect()))
+    assert "cname = excluded.cname" in sql
+    assert "RETURNING subdomain.id, subdomain.subdomain" in sql
+
+
+def test_bulk_upsert_web_assets_preserves_non_probe_columns():
+    from server.app.crud import web_asset as crud_web_asset
+
+    db = _RecordingSession()
+
+    crud_web_asset.bulk_upsert_web_assets(
+        db,
+        uuid4(),
+        [
+            {"url": "http://10.0.0.1:80", "status_code": 200, "is_alive": True},
+            {"url": "http://10.0.0.1:80", "status_code": 301, "is_alive": True},
+            {"url": "https://10.0.0.1:443", "is_alive": False},
+        ],
+    )
+
+    assert db.commits == 1
+    stmt = db.statements[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (project_id, url) DO UPDATE" in sql
+    update_clause = sql.split("DO UPDATE SET", 1)[1]
+    assert "status_code = excluded.status_code" in update_clause
+    assert "fingerprints" not in update_clause
+    assert "screenshot_path" not in update_clause
+
+
+def test_bulk_upsert_api_risk_findings_keeps_status_history():
+    from server.app.crud import api_risk_finding as crud_api_risk
+
+    db = _RecordingSession()
+    endpoint_id = uuid4()
+    finding = {
+        "endpoint_id": endpoint_id,
+        "rule_name": "graphql_surface",
+        "severity": "medium",
+        "title": "GraphQL surface",
+    }
+
+    crud_api_risk.bulk_upsert_api_risk_findings(
+        db, uuid4(), [finding, {**finding, "severity": "high"}], commit=False
+    )
+
+    assert db.commits == 0
+    stmt = db.statements[0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "ON CONFLICT (project_id, endpoint_id, rule_name) DO UPDATE" in sql
+    assert "RETURNING api_risk_finding.id" in sql
+    update_clause = sql.split("DO UPDATE SET", 1)[1]
+    assert "status = excluded.status" in update_clause
+    assert "status_history" not in update_clause
+    assert "resolved_at" not in update_clause
+    assert "high" in compiled.params.values()
+    assert "medium" not in compiled.params.values()
+
+
+def test_bulk_upsert_vulnerabilities_splits_inserted_and_seen():
+    from types import SimpleNamespace
+
+    from server.app.crud import vulnerability as crud_vuln
+
+    new_id, old_id = uuid4(), uuid4()
+    returned = iter(
+        [[SimpleNamespace(id=new_id, inserted=True)], [SimpleNamespace(id=old_id, inserted=False)]]
+    )
+
+    class _ReturningSession(_RecordingSession):
+        def execute(self, stmt):
+            self.statements.append(stmt)
+            return iter(next(returned))
+
+    db = _ReturningSession()
+    finding = {"target_url": "http://a/", "template_id": "t1", "severity": "low"}
+
+    inserted, seen = crud_vuln.bulk_upsert_vulnerabilities(
+        db,
+        uuid4(),
+        [
+            finding,
+            {**finding, "severity": "high"},
+            {**finding, "template_id": "t2", "severity": None},
+        ],
+    )
+
+    assert (inserted, seen) == ([new_id], [old_id])
+    assert db.commits == 1
+    # t2 sets no severity, so it goes in its own statement.
+    assert len(db.statements) == 2
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "ON CONFLICT (project_id, target_url, template_id) DO UPDATE" in sql
+    assert "xmax = 0" in sql
+    update_clause = sql.split("DO UPDATE SET", 1)[1]
+    assert "severity = excluded.severity" in update_clause
+    assert "status" not in update_clause
+    assert "first_seen" not in update_clause
+    assert "high" in compiled.params.values()
+    assert "low" not in compiled.params.values()
+    second_update = str(db.statements[1].compile(dialect=postgresql.dialect())).split(
+        "DO UPDATE SET", 1
+    )[1]
+    assert "severity" not in second_update
+
+
+def test_partial_vulnerability_upsert_keeps_stored_reference_and_tags():
+    from server.app.crud import vulnerability as crud_vuln
+
+    db = _RecordingSession()
+
+    # An xray finding carries no reference, tags or extracted results.
+    crud_vuln.bulk_upsert_vulnerabilities(
+        db,
+        uuid4(),
+        [{"target_url": "http://a/", "template_id": "xray-xss", "title": "XSS", "scanner": "xray"}],
+    )
+
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    update_clause = str(compiled).split("DO UPDATE SET", 1)[1]
+    assert "title = excluded.title" in update_clause
+    for column in ("reference", "tags", "extracted_results", "raw_output", "severity"):
+        assert column not in update_clause
+    # Omitted columns are still filled from model defaults when the row is new.
+    assert "reference" in str(compiled).split("ON CONFLICT", 1)[0]
+
+
+def _many_ports(n):
+    ip_id = uuid4()
+    return lambda db: crud_port.bulk_upsert_ports(
+        db, [{"ip_id": ip_id, "port": i, "service": "http"} for i in range(n)]
+    )
+
+
+def _many_ips(n):
+    return lambda db: crud_ip.bulk_upsert_ip_addresses(
+        db, uuid4(), [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(n)],
+        source="dns_resolve",
+    )
+
+
+def _many_subdomains(n):
+    return lambda db: crud_subdomain.bulk_upsert_subdomains(
+        db, uuid4(), "example.com", [f"h{i}.example.com" for i in range(n)], source="subfinder"
+    )
+
+
+def _many_vulnerabilities(n):
+    from server.app.crud import vulnerability as crud_vuln
+
+    return lambda db: crud_vuln.bulk_upsert_vulnerabilities(
+        db, uuid4(), [{"target_url": f"http://h{i}/", "template_id": "t"} for i in range(n)]
+    )
+
+
+def _many_web_assets(n):
+    from server.app.crud import web_asset as crud_web_asset
+
+    return lambda db: crud_web_asset.bulk_upsert_web_assets(
+        db, uuid4(), [{"url": f"http://h{i}/", "status_code": 200} for i in range(n)]
+    )
+
+
+@pytest.mark.parametrize(
+    "upsert",
+    [_many_ports, _many_ips, _many_subdomains, _many_vulnerabilities, _many_web_assets],
+)
+def test_full_size_chunks_stay_under_bind_parameter_limit(upsert):
+    db = _RecordingSession()
+
+    upsert(20000)(db)
+
+    assert len(db.statements) > 1
+    # The first chunk is a full one; ids and timestamps filled from Python
+    # defaults are bound per row as well.
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert len(compiled.params) <= POSTGRES_MAX_BIND_PARAMS
@@ -0,0 +1,265 @@
+"""Tests for the asyncio DNS resolver and dns_resolve chunking."""
+
+import socket
+import struct
+import threading
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from worker.app.tasks import scan
+from worker.app.utils.dns_resolver import (
+    QTYPE_A,
+    QTYPE_AAAA,
+    QTYPE_CNAME,
+    DNSResult,
+    build_query,
+    get_dns_resolve_config,
+    parse_response,
+    resolve_hostnames,
+)
+
+
+def _encode(name: str) -> bytes:
+    return b"".join(bytes([len(p)]) + p.encode() for p in name.split(".")) + b"\x00"
+
+
+def _record(owner: bytes, rtype: int, rdata: bytes) -> bytes:
+    return owner + struct.pack("!HHIH", rtype, 1, 60, len(rdata)) + rdata
+
+
+def _answer(query: bytes, tcp: bool = False) -> bytes:
+    query_id = struct.unpack("!H", query[:2])[0]
+    question_end = query.index(b"\x00", 12) + 5
+    question = query[12:question_end]
+    qtype = struct.unpack("!H", question[-4:-2])[0]
+    name = question[:-4]
+
+    if name == _encode("missing.example.com"):
+        header = struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 0, 0)
+        return header + question
+    if name == _encode("big.example.com") and not tcp:
+        # Too large for UDP: truncated, with no answers.
+        header = struct.pack("!HHHHHH", query_id, 0x8380, 1, 0, 0, 0)
+        return header + question
+
+    # Owner of the question is compressed as a pointer to offset 12.
+    answers = [_record(b"\xc0\x0c", QTYPE_CNAME, _encode("edge.example.net"))]
+    if name == _encode("dangling.example.com"):
+        pass
+    elif qtype == QTYPE_A:
+        answers.append(_record(_encode("edge.example.net"), QTYPE_A, bytes([93, 184, 216, 34])))
+    elif qtype == QTYPE_AAAA:
+        answers.append(
+            _record(
+                _encode("edge.example.net"),
+                QTYPE_AAAA,
+                socket.inet_pton(socket.AF_INET6, "2001:db8::1"),
+            )
+        )
+    header = struct.pack("!HHHHHH", query_id, 0x8180, 1, len(answers), 0, 0)
+    return header + question + b"".join(answers)
+
+
+def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+@pytest.fixture
+def fake_nameserver():
+    # UDP and TCP listen on the same port, like a real nameserver.
+    tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp_sock.bind(("127.0.0.1", 0))
+    tcp_sock.listen()
+    tcp_sock.settimeout(0.2)
+    port = tcp_sock.getsockname()[1]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", port))
+    sock.settimeout(0.2)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                data, addr = sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            sock.sendto(_answer(data), addr)
+
+    def serve_tcp():
+        while not stop.is_set():
+            try:
+                conn, _ = tcp_sock.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                length = struct.unpack("!H", _recv_exactly(conn, 2))[0]
+                response = _answer(_recv_exactly(conn, length), tcp=True)
+                conn.sendall(struct.pack("!H", len(response)) + response)
+
+    threads = [
+        threading.Thread(target=serve, daemon=True),
+        threading.Thread(target=serve_tcp, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    yield f"127.0.0.1:{port}"
+    stop.set()
+    for thread in threads:
+        thread.join()
+    sock.close()
+    tcp_sock.close()
+
+
+def test_parse_response_reads_compressed_cname_and_addresses():
+    response = _answer(build_query(4242, "www.example.com", QTYPE_A))
+    query_id, rcode, answers = parse_response(response)
+
+    assert query_id == 4242
+    assert rcode == 0
+    assert answers == [
+        ("www.example.com", QTYPE_CNAME, "edge.example.net"),
+        ("edge.example.net", QTYPE_A, "93.184.216.34"),
+    ]
+
+
+def test_resolve_hostnames_collects_a_aaaa_and_cname(fake_nameserver):
+    results = resolve_hostnames(
+        ["www.example.com", "missing.example.com"],
+        nameservers=[fake_nameserver],
+        timeout=1.0,
+        retries=0,
+    )
+
+    www = results["www.example.com"]
+    assert www.a == ["93.184.216.34"]
+    assert www.aaaa == ["2001:db8::1"]
+    assert www.cname == "edge.example.net"
+    assert not results["missing.example.com"].resolved
+
+
+def test_resolve_hostnames_keeps_dangling_cname(fake_nameserver):
+    results = resolve_hostnames(
+        ["dangling.example.com"], nameservers=[fake_nameserver], timeout=1.0, retries=0
+    )
+
+    dangling = results["dangling.example.com"]
+    assert dangling.cname == "edge.example.net"
+    assert not dangling.resolved
+    assert dangling.has_records
+
+
+def test_resolve_hostnames_retries_truncated_answers_over_tcp(fake_nameserver):
+    results = resolve_hostnames(
+        ["big.example.com"], nameservers=[fake_nameserver], timeout=1.0, retries=0
+    )
+
+    big = results["big.example.com"]
+    assert big.a == ["93.184.216.34"]
+    assert big.aaaa == ["2001:db8::1"]
+
+
+def test_get_dns_resolve_config_accepts_comma_separated_nameservers():
+    config = get_dns_resolve_config({"nameservers": "1.1.1.1, 9.9.9.9", "dns_retries": 0})
+    assert config["nameservers"] == ["1.1.1.1", "9.9.9.9"]
+    assert config["retries"] == 0
+
+
+def test_run_dns_resolve_walks_every_chunk(monkeypatch):
+    from server.app.crud import ip_address as crud_ip
+    from server.app.crud import subdomain as crud_subdomain
+
+    project_id = uuid4()
+    rows = [
+        SimpleNamespace(
+            subdomain=f"h{i}.example.com", root_domain="example.com", source="subfinder"
+        )
+        for i in range(5)
+    ]
+
+    def fake_batches(db, project_id, root_domain=None, batch_size=500):
+        for start in range(0, len(rows), batch_size):
+            yield rows[start : start + batch_size]
+
+    ip_calls = []
+    resolution_calls = []
+    monkeypatch.setattr(crud_subdomain, "iter_subdomain_batches", fake_batches)
+    monkeypatch.setattr(
+        crud_ip,
+        "bulk_upsert_ip_addresses",
+        lambda db, project_id, ips, source, commit: ip_calls.append((list(ips), commit)),
+    )
+    monkeypatch.setattr(
+        crud_subdomain,
+        "bulk_upsert_subdomain_resolutions",
+        lambda db, project_id, resolutions: resolution_calls.append(resolutions),
+    )
+    monkeypatch.setattr(
+        "worker.app.utils.dns_resolver.resolve_hostnames",
+        lambda names, **kw: {
+            n: DNSResult(name=n, a=["10.0.0.1"], cname="cdn.example.net") for n in names
+        },
+    )
+
+    task = SimpleNamespace(project_id=project_id, config={"batch_size": 2})
+    result = scan._run_dns_resolve(db=None, task=task)
+
+    assert result == {"subdomains_processed": 5, "resolved": 5, "cname_only": 0}
+    assert [len(call) for call in resolution_calls] == [2, 2, 1]
+    assert resolution_calls[0][0]["cname"] == "cdn.example.net"
+    assert ip_calls[0] == (["10.0.0.1", "10.0.0.1"], False)
+
+
+def test_run_dns_resolve_stores_cname_only_subdomains(monkeypatch):
+    from server.app.crud import ip_address as crud_ip
+    from server.app.crud import subdomain as crud_subdomain
+
+    rows = [
+        SimpleNamespace(subdomain=name, root_domain="example.com", source="subfinder")
+        for name in ("app.example.com", "old.example.com", "gone.example.com")
+    ]
+    resolution_calls = []
+    monkeypatch.setattr(
+        crud_subdomain,
+        "iter_subdomain_batches",
+        lambda db, project_id, root_domain=None, batch_size=500: iter([rows]),
+    )
+    monkeypatch.setattr(
+        crud_ip, "bulk_upsert_ip_addresses", lambda db, project_id, ips, source, commit: None
+    )
+    monkeypatch.setattr(
+        crud_subdomain,
+        "bulk_upsert_subdomain_resolutions",
+        lambda db, project_id, resolutions: resolution_calls.extend(resolutions),
+    )
+    monkeypatch.setattr(
+        "worker.app.utils.dns_resolver.resolve_hostnames",
+        lambda names, **kw: {
+            "app.example.com": DNSResult(name="app.example.com", a=["10.0.0.1"]),
+            "old.example.com": DNSResult(
+                name="old.example.com", cname="old-app.herokuapp.com"
+            ),
+            "gone.example.com": DNSResult(name="gone.example.com"),
+        },
+    )
+
+    task = SimpleNamespace(project_id=uuid4(), config={})
+    result = scan._run_dns_resolve(db=None, task=task)
+
+    assert result == {"subdomains_processed": 3, "resolved": 1, "cname_only": 1}
+    old = next(item for item in resolution_calls if item["subdomain"] == "old.example.com")
+    assert old == {
+        "root_domain": "example.com",
+        "subdomain": "old.example.com",
+        "source": "subfinder",
+        "ip_addresses": [],
+        "cname": "old-app.herokuapp.com",
+    }
+    assert "gone.example.com" not in {item["subdomain"] for item in resolution_calls}
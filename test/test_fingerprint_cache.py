@@ -0,0 +1,63 @@
+"""Tests for the precompiled fingerprint engine cache."""
+
+import json
+import os
+
+from worker.app.fingerprint import loader
+
+RULES = [
+    {
+        "id": "wp",
+        "info": {"name": "WordPress"},
+        "http": [{"matchers": [{"type": "word", "words": ["wp-content"]}]}],
+    }
+]
+
+
+def _write_rules(path, rules):
+    path.write_text(json.dumps(rules))
+    return str(path)
+
+
+def test_load_engine_builds_then_reuses_cache(tmp_path, monkeypatch):
+    source = _write_rules(tmp_path / "fp.json", RULES)
+
+    engine = loader.load_engine(source)
+    assert os.path.exists(loader.get_cache_path(source))
+    assert [r.name for r in engine.match("/wp-content/")] == ["WordPress"]
+
+    def fail_json_load(*args, **kwargs):
+        raise AssertionError("JSON should not be parsed when the cache is fresh")
+
+    monkeypatch.setattr(loader.json, "load", fail_json_load)
+    cached = loader.load_engine(source)
+    assert [r.name for r in cached.match("/wp-content/")] == ["WordPress"]
+
+
+def test_load_engine_rebuilds_when_source_changes(tmp_path):
+    source = _write_rules(tmp_path / "fp.json", RULES)
+    loader.load_engine(source)
+
+    changed = [dict(RULES[0], info={"name": "WordPress CMS"})]
+    _write_rules(tmp_path / "fp.json", changed)
+    os.utime(source, ns=(1, 1))
+
+    engine = loader.load_engine(source)
+    assert [r.name for r in engine.match("/wp-content/")] == ["WordPress CMS"]
+
+
+def test_touched_but_identical_source_keeps_cache(tmp_path, monkeypatch):
+    source = _write_rules(tmp_path / "fp.json", RULES)
+    loader.load_engine(source)
+    os.utime(source, ns=(1, 1))
+
+    monkeypatch.setattr(loader.json, "load", lambda *a, **k: [])
+    assert len(loader.load_engine(source).fingerprints) == 1
+
+
+def test_cache_with_other_format_version_is_ignored(tmp_path, monkeypatch):
+    source = _write_rules(tmp_path / "fp.json", RULES)
+    cache_path = loader.build_fingerprint_cache(source)
+    monkeypatch.setattr(loader, "CACHE_FORMAT_VERSION", loader.CACHE_FORMAT_VERSION + 1)
+
+    assert loader._read_engine_cache(cache_path, source) is None
@@ -0,0 +1,107 @@
+"""Tests for the compiled fingerprint word index."""
+
+import random
+
+from worker.app.fingerprint.automaton import AhoCorasick
+from worker.app.fingerprint.engine import FingerprintEngine
+
+
+def test_aho_corasick_reports_overlapping_and_nested_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers", "xyz"])
+
+    assert automaton.search("ushers") == {0, 1, 3}
+    assert automaton.search("") == set()
+
+
+def _reference_match(engine, body, headers, favicon_hash=None):
+    header_str = engine._headers_to_string(headers)
+    return [
+        fp["id"]
+        for fp in engine.fingerprints
+        if engine._match_fingerprint(fp, body, header_str, favicon_hash)
+    ]
+
+
+def test_indexed_match_equals_full_rule_walk():
+    rng = random.Random(1234)
+    vocabulary = ["wordpress", "WordPress", "wp-content", "nginx", "Server", "x-powered", "jquery"]
+    rules = []
+    for i in range(200):
+        matchers = []
+        for _ in range(rng.randint(0, 3)):
+            kind = rng.choice(["word", "word", "word", "regex", "favicon"])
+            matcher = {"type": kind, "part": rng.choice(["body", "header"])}
+            if kind == "word":
+                matcher["words"] = rng.sample(vocabulary, rng.randint(0, 3))
+                matcher["condition"] = rng.choice(["or", "and"])
+                matcher["case-insensitive"] = rng.random() < 0.5
+                matcher["negative"] = rng.random() < 0.1
+            elif kind == "regex":
+                matcher["regex"] = [rng.choice([r"wp-\w+", r"jquery[.-]\d", "("])]
+            else:
+                matcher["hash"] = ["abc123"]
+            matchers.append(matcher)
+        rules.append({"id": f"rule-{i}", "http": [{"matchers": matchers}]})
+
+    engine = FingerprintEngine(rules)
+    samples = [
+        ("<html>WordPress /wp-content/ jquery-3</html>", {"Server": "nginx"}, None),
+        ("plain page", {"X-Powered-By": "PHP"}, "abc123"),
+        ("", {}, None),
+    ]
+    for body, headers, favicon_hash in samples:
+        indexed = [r.fingerprint_id for r in engine.match(body, headers, favicon_hash)]
+        assert indexed == _reference_match(engine, body, headers, favicon_hash)
+
+
+def test_only_rules_with_hit_words_are_evaluated(monkeypatch):
+    rules = [
+        {"id": f"r{i}", "http": [{"matchers": [{"type": "word", "words": [f"token{i}x"]}]}]}
+        for i in range(50)
+    ]
+    engine = FingerprintEngine(rules)
+    evaluated = []
+    original = engine._match_compiled
+
+    def spy(matchers, *args):
+        evaluated.append(matchers)
+        return original(matchers, *args)
+
+    monkeypatch.setattr(engine, "_match_compiled", spy)
+
+    assert [r.fingerprint_id for r in engine.match("has token7x here")] == ["r7"]
+    assert len(evaluated) == 1
+
+
+def test_mmh3_matches_reference_vectors():
+    from worker.app.fingerprint.favicon import favicon_hashes, mmh3_hash32
+
+    assert mmh3_hash32(b"") == 0
+    assert mmh3_hash32(b"hello") == 613153351
+    assert mmh3_hash32(b"The quick brown fox jumps over the lazy dog") == 776992547
+    md5, mmh3 = favicon_hashes(b"\x00\x01icon")
+    assert len(md5) == 32
+    assert mmh3 == str(mmh3_hash32(b"AAFpY29u\n"))
+
+
+def test_favicon_rules_are_found_by_hash_lookup(monkeypatch):
+    rules = [
+        {"id": "md5", "http": [{"matchers": [{"type": "favicon", "hash": ["ABC123"]}]}]},
+        {"id": "shodan", "http": [{"matchers": [{"type": "favicon", "hash": [-1293291467]}]}]},
+        {"id": "other", "http": [{"matchers": [{"type": "favicon", "hash": ["fff"]}]}]},
+    ]
+    engine = FingerprintEngine(rules)
+    evaluated = []
+    original = engine._match_compiled
+    monkeypatch.setattr(
+        engine,
+        "_match_compiled",
+        lambda matchers, *args: evaluated.append(matchers) or original(matchers, *args),
+    )
+
+    results = engine.match("", {}, favicon_hash=["abc123", "-1293291467"])
+
+    assert [r.fingerprint_id for r in results] == ["md5", "shodan"]
+    assert len(evaluated) == 2
+    assert [r.fingerprint_id for r in engine.match("", {}, favicon_hash="FFF")] == ["other"]
+    assert engine.match("", {}, favicon_hash=None) == []
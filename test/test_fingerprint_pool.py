@@ -0,0 +1,212 @@
+"""Tests for process-pool fingerprint matching."""
+
+import json
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from worker.app.fingerprint import pool
+from worker.app.fingerprint.engine import FingerprintEngine
+from worker.app.tasks import fingerprint
+
+RULES = [
+    {
+        "id": "wp",
+        "info": {"name": "WordPress"},
+        "http": [{"matchers": [{"type": "word", "words": ["wp-content"]}]}],
+    },
+    {
+        "id": "nginx",
+        "info": {"name": "Nginx"},
+        "http": [{"matchers": [{"type": "word", "part": "header", "words": ["nginx"]}]}],
+    },
+]
+
+ITEMS = [
+    ("<a href='/wp-content/'>", {}, None),
+    ("hello", {"Server": "nginx"}, None),
+    ("nothing", {}, ["abc"]),
+]
+
+
+def _names(results):
+    return [[r.name for r in matches] for matches in results]
+
+
+def test_process_pool_matches_like_inline_engine(tmp_path):
+    source = tmp_path / "fp.json"
+    source.write_text(json.dumps(RULES))
+    engine = FingerprintEngine(RULES)
+
+    try:
+        results = pool.match_responses(
+            engine, ITEMS, processes=2, chunksize=1, path=str(source)
+        )
+    finally:
+        pool.shutdown_match_pool()
+
+    assert _names(results) == [["WordPress"], ["Nginx"], []]
+
+
+def test_match_pool_is_sized_once_and_falls_back_after_shutdown(tmp_path):
+    source = tmp_path / "fp.json"
+    source.write_text(json.dumps(RULES))
+
+    try:
+        first = pool.get_match_pool(1, path=str(source))
+        # A task asking for another size reuses the pool instead of replacing it.
+        assert pool.get_match_pool(3, path=str(source)) is first
+        # Another thread shutting the pool down must not lose this batch.
+        first.shutdown()
+        results = pool.match_responses(
+            FingerprintEngine(RULES), ITEMS, processes=1, path=str(source)
+        )
+    finally:
+        pool.shutdown_match_pool()
+
+    assert _names(results) == [["WordPress"], ["Nginx"], []]
+
+
+def test_daemonic_worker_matches_inline(monkeypatch):
+    monkeypatch.setattr(pool, "can_use_process_pool", lambda: False)
+
+    assert pool.get_match_pool(4) is None
+    results = pool.match_responses(FingerprintEngine(RULES), ITEMS, processes=4)
+    assert _names(results) == [["WordPress"], ["Nginx"], []]
+
+
+def test_run_fingerprint_merges_basic_and_engine_results(monkeypatch):
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [
+        SimpleNamespace(id=uuid4(), url="http://a", server="nginx/1.25", title=None),
+        SimpleNamespace(id=uuid4(), url="http://b", server=None, title="WordPress blog"),
+    ]
+    saved = {}
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    monkeypatch.setattr(
+        crud_web_asset,
+        "update_web_asset_fingerprints",
+        lambda db, updates: saved.update({item["id"]: item for item in updates}),
+    )
+    monkeypatch.setattr(fingerprint, "get_engine", lambda: FingerprintEngine(RULES))
+    monkeypatch.setattr(
+        fingerprint,
+        "_fetch_response",
+        lambda url, **kwargs: ("/wp-content/", {"Server": "nginx"}, None),
+    )
+
+    task = SimpleNamespace(project_id=uuid4(), config={"response_snapshots": False})
+    result = fingerprint._run_fingerprint(db=None, task=task)
+
+    assert result == {"assets_scanned": 2, "identified": 2, "not_modified": 0}
+    assert saved[assets[0].id]["fingerprints"] == ["Nginx", "WordPress"]
+    assert saved[assets[1].id]["fingerprints"] == ["WordPress", "Nginx"]
+    assert saved[assets[0].id]["headers"] == {"Server": "nginx"}
+
+
+def test_run_fingerprint_keeps_headers_when_fetch_fails(monkeypatch):
+    from server.app.crud import web_asset as crud_web_asset
+
+    asset = SimpleNamespace(
+        id=uuid4(), url="http://a", server="nginx", title=None, headers={"ETag": '"v1"'}
+    )
+    saved = []
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([[asset]]),
+    )
+    monkeypatch.setattr(
+        crud_web_asset, "update_web_asset_fingerprints", lambda db, updates: saved.extend(updates)
+    )
+    monkeypatch.setattr(fingerprint, "get_engine", lambda: FingerprintEngine(RULES))
+
+    def failing_fetch(url, **kwargs):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(fingerprint, "_fetch_response", failing_fetch)
+
+    task = SimpleNamespace(project_id=uuid4(), config={"response_snapshots": False})
+    fingerprint._run_fingerprint(db=None, task=task)
+
+    assert saved == [{"id": asset.id, "fingerprints": ["Nginx"], "headers": None}]
+
+
+def test_update_web_asset_fingerprints_leaves_probe_columns_alone():
+    from sqlalchemy.dialects import postgresql
+
+    from server.app.crud import web_asset as crud_web_asset
+
+    executed = []
+
+    class _Session:
+        def execute(self, stmt, rows):
+            executed.append((str(stmt.compile(dialect=postgresql.dialect())), rows))
+
+        def commit(self):
+            pass
+
+    fetched, failed = uuid4(), uuid4()
+    crud_web_asset.update_web_asset_fingerprints(
+        _Session(),
+        [
+            {"id": fetched, "fingerprints": ["Nginx"], "headers": {"ETag": '"v2"'}},
+            {"id": failed, "fingerprints": ["Nginx"], "headers": None},
+        ],
+    )
+
+    assert len(executed) == 2
+    for sql, _ in executed:
+        assert sql.startswith("UPDATE web_asset SET fingerprints=")
+        for column in ("title", "status_code", "screenshot_path", "is_alive"):
+            assert column not in sql
+    assert "headers=" in executed[0][0]
+    assert "headers=" not in executed[1][0]
+    assert executed[1][1] == [{"asset_id": failed, "fingerprints": ["Nginx"]}]
+
+
+def test_run_fingerprint_only_touches_not_modified_pages(monkeypatch):
+    from server.app.crud import web_asset as crud_web_asset
+
+    asset = SimpleNamespace(
+        id=uuid4(),
+        url="http://a",
+        server=None,
+        title=None,
+        fingerprints=["WordPress"],
+        headers={"ETag": '"v1"'},
+    )
+    touched = []
+    validators_seen = []
+
+    def fake_fetch(url, validators=None, **kwargs):
+        validators_seen.append(validators)
+        return fingerprint.NOT_MODIFIED
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([[asset]]),
+    )
+    monkeypatch.setattr(crud_web_asset, "touch_web_assets", lambda db, ids: touched.extend(ids))
+    monkeypatch.setattr(
+        crud_web_asset,
+        "update_web_asset_fingerprints",
+        lambda db, updates: pytest.fail("unchanged page must not be rewritten"),
+    )
+    monkeypatch.setattr(fingerprint, "get_engine", lambda: FingerprintEngine(RULES))
+    monkeypatch.setattr(fingerprint, "_fetch_response", fake_fetch)
+
+    task = SimpleNamespace(project_id=uuid4(), config={"response_snapshots": False})
+    result = fingerprint._run_fingerprint(db=None, task=task)
+
+    assert result == {"assets_scanned": 1, "identified": 1, "not_modified": 1}
+    assert touched == [asset.id]
+    assert validators_seen == [{"ETag": '"v1"'}]
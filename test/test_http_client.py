@@ -0,0 +1,131 @@
+"""Tests for the pooled keep-alive HTTP client."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from worker.app.tasks import fingerprint, http_probe, js_api_discovery
+from worker.app.utils.http_client import HTTPClientPool, conditional_headers, run_concurrently
+from worker.app.utils.js_analysis_cache import JSAnalysisCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        if self.path == "/redirect":
+            self._send(302, b"", {"Location": "/page"})
+        elif self.path == "/big":
+            self._send(200, b"x" * 4096)
+        elif self.path == "/app.js":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self._send(304, b"", {"ETag": '"v1"'})
+            else:
+                self._send(200, b'fetch("/api/items")', {"ETag": '"v1"'})
+        else:
+            self._send(200, b"<html><title> Demo </title></html>")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def version_string(self):
+        return "demo"
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    _Handler.connections = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_reuses_keep_alive_connection(server_url):
+    with HTTPClientPool(max_per_host=1) as client:
+        for _ in range(3):
+            assert client.request(f"{server_url}/page").status == 200
+
+    assert len(_Handler.connections) == 1
+
+
+def test_pool_follows_redirects_and_flags_truncated_body(server_url):
+    with HTTPClientPool() as client:
+        redirected = client.request(f"{server_url}/redirect")
+        big = client.request(f"{server_url}/big", max_body=1024)
+
+    assert redirected.url.endswith("/page")
+    assert redirected.status == 200
+    assert big.truncated is True
+    assert len(big.body) == 1024
+
+
+def test_pool_streams_body_in_chunks_and_reuses_connection(server_url):
+    with HTTPClientPool(max_per_host=1) as client:
+        with client.stream(f"{server_url}/redirect") as (resp, chunks):
+            assert resp.url.endswith("/page")
+            body = list(chunks)
+        with client.stream(f"{server_url}/big", chunk_size=1000) as (resp, chunks):
+            sizes = [len(chunk) for chunk in chunks]
+
+    assert b"".join(body) == b"<html><title> Demo </title></html>"
+    assert sizes == [1000, 1000, 1000, 1000, 96]
+    assert len(_Handler.connections) == 1
+
+
+def test_probe_with_requests_returns_web_asset_fields(server_url):
+    with HTTPClientPool() as client:
+        result = http_probe._probe_with_requests(f"{server_url}/page", client)
+
+    assert result["is_alive"] is True
+    assert result["title"] == "Demo"
+    assert result["status_code"] == 200
+    assert result["server"] == "demo"
+    assert result["content_type"] == "text/html"
+
+
+def test_run_concurrently_yields_every_item():
+    results = dict(run_concurrently(lambda x: x * 2, range(10), max_workers=4))
+    assert results == {i: i * 2 for i in range(10)}
+
+
+def test_conditional_headers_from_stored_validators():
+    assert conditional_headers(
+        {"etag": '"v1"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT", "Server": "x"}
+    ) == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 05 Oct 2026 10:00:00 GMT"}
+    assert conditional_headers(None) == {}
+
+
+def test_script_and_page_fetches_revalidate_with_etag(server_url):
+    url = f"{server_url}/app.js"
+    fetch = dict(verify_tls=False, analysis_cache=JSAnalysisCache(), max_size=1000)
+
+    with HTTPClientPool(max_per_host=1) as client:
+        fresh = js_api_discovery._fetch_and_analyze_script(url, client=client, **fetch)
+        cached = js_api_discovery._fetch_and_analyze_script(
+            url, client=client, validators=fresh.validators, **fetch
+        )
+
+    assert fresh.validators == {"ETag": '"v1"'}
+    assert [e["endpoint"] for e in fresh.endpoints] == ["/api/items"]
+    assert cached.not_modified is True
+    assert len(_Handler.connections) == 1
+
+    assert fingerprint._fetch_response(url, validators={"ETag": '"v1"'}) is fingerprint.NOT_MODIFIED
+    body, headers, _ = fingerprint._fetch_response(url, validators={"ETag": '"v0"'})
+    assert body == 'fetch("/api/items")'
+    assert headers["ETag"] == '"v1"'
@@ -0,0 +1,85 @@
+"""Tests for batched httpx probing."""
+
+import json
+import os
+import stat
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import http_probe
+
+FAKE_HTTPX = """#!{python}
+import json, sys
+args = sys.argv[1:]
+with open(args[args.index("-l") + 1]) as f:
+    urls = [line.strip() for line in f if line.strip()]
+with open({log!r}, "w") as log:
+    json.dump(args, log)
+for url in urls:
+    if url.endswith(":8080"):
+        continue
+    print(json.dumps({{"input": url, "url": url + "/", "status_code": 200,
+                      "title": "T", "webserver": "nginx", "tech": ["Nginx"]}}), flush=True)
+print("not json", flush=True)
+"""
+
+
+def _install_fake_httpx(tmp_path, monkeypatch):
+    import sys
+
+    log = tmp_path / "args.json"
+    script = tmp_path / "httpx"
+    script.write_text(FAKE_HTTPX.format(python=sys.executable, log=str(log)))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+    return log
+
+
+def test_probe_batch_with_httpx_runs_once_and_maps_results(tmp_path, monkeypatch):
+    log = _install_fake_httpx(tmp_path, monkeypatch)
+    urls = ["http://10.0.0.1:80", "http://10.0.0.1:8080", "https://10.0.0.2:443"]
+
+    results = dict(http_probe._probe_batch_with_httpx(urls, verify_tls=False, threads=7))
+
+    assert results["http://10.0.0.1:80"]["server"] == "nginx"
+    assert results["https://10.0.0.2:443"]["technologies"] == ["Nginx"]
+    assert results["http://10.0.0.1:8080"] == {"is_alive": False}
+    args = json.loads(log.read_text())
+    assert args[args.index("-threads") + 1] == "7"
+    assert "-insecure" in args
+
+
+def test_run_http_probe_flushes_httpx_results_in_chunks(monkeypatch):
+    from server.app.crud import ip_address as crud_ip
+    from server.app.crud import port as crud_port
+    from server.app.crud import web_asset as crud_web_asset
+
+    ips = [SimpleNamespace(id=uuid4(), ip=f"10.0.0.{i}") for i in range(1, 4)]
+    ports = {ip.id: [SimpleNamespace(id=uuid4(), port=80, service="http")] for ip in ips}
+    calls = []
+    batches = []
+
+    def fake_batch(urls, **kwargs):
+        batches.append(list(urls))
+        for url in urls:
+            yield url, {"status_code": 200, "is_alive": True}
+
+    monkeypatch.setattr("shutil.which", lambda name: "/usr/bin/httpx")
+    monkeypatch.setattr(
+        crud_ip, "iter_ip_address_batches", lambda db, project_id, batch_size: iter([ips])
+    )
+    monkeypatch.setattr(crud_port, "list_ports_by_ip", lambda db, ip_id, limit: ports[ip_id])
+    monkeypatch.setattr(
+        crud_web_asset,
+        "bulk_upsert_web_assets",
+        lambda db, project_id, assets: calls.append(list(assets)),
+    )
+    monkeypatch.setattr(http_probe, "_probe_batch_with_httpx", fake_batch)
+
+    task = SimpleNamespace(project_id=uuid4(), config={"probe_flush_size": 2})
+    result = http_probe._run_http_probe(db=None, task=task)
+
+    assert result == {"urls_probed": 3, "alive": 3}
+    assert len(batches) == 1
+    assert [len(call) for call in calls] == [2, 1]
+    assert calls[0][0]["port_id"] == ports[ips[0].id][0].id
@@ -0,0 +1,133 @@
+"""Tests for the JS endpoint analysis cache."""
+
+import hashlib
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import js_api_discovery
+from worker.app.utils import js_analysis_cache
+from worker.app.utils.js_analysis_cache import JSAnalysisCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def _fake_open_script(fake_fetch):
+    """Serve scripts from a fake text fetcher through the _open_script interface."""
+
+    @contextmanager
+    def fake_open(url, verify_tls, max_size=0, client=None, headers=None):
+        text = fake_fetch(url, verify_tls)
+        status = 200 if text else 404
+        yield SimpleNamespace(status=status, headers={}), iter([text or ""])
+
+    return fake_open
+
+
+def test_cached_analysis_is_reused_across_runs(monkeypatch):
+    client = _FakeRedis()
+    calls = []
+
+    def fake_extract(content):
+        calls.append(content)
+        return [{"method": "GET", "endpoint": "/api/v1", "evidence": "x"}]
+
+    monkeypatch.setattr(js_analysis_cache, "extract_endpoints_from_js", fake_extract)
+
+    first = JSAnalysisCache(redis_client=client).extract_endpoints("h1", "code")
+    second = JSAnalysisCache(redis_client=client).extract_endpoints("h1", "code")
+
+    assert first == second == [{"method": "GET", "endpoint": "/api/v1", "evidence": "x"}]
+    assert calls == ["code"]
+    assert list(client.data) == [f"jsendpoints:v{js_analysis_cache.JS_PARSER_VERSION}:h1"]
+
+
+def test_shared_script_is_fetched_and_parsed_once_per_run(monkeypatch):
+    from server.app.crud import api_endpoint as crud_api_endpoint
+    from server.app.crud import api_risk_finding as crud_api_risk
+    from server.app.crud import js_asset as crud_js_asset
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [
+        SimpleNamespace(id=uuid4(), url=f"https://site{i}.example.com") for i in range(3)
+    ]
+    fetched = []
+    parsed = []
+
+    def fake_fetch(url, verify_tls, max_size=512000, client=None):
+        fetched.append(url)
+        if url.endswith("/vendor.js"):
+            return 'fetch("/api/items")'
+        return '<script src="https://cdn.example.net/vendor.js"></script>'
+
+    def fake_extract(content):
+        parsed.append(content)
+        return [{"method": "GET", "endpoint": "/api/items", "evidence": content}]
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    monkeypatch.setattr(js_api_discovery, "_fetch_text", fake_fetch)
+    monkeypatch.setattr(js_api_discovery, "_open_script", _fake_open_script(fake_fetch))
+    monkeypatch.setattr(crud_js_asset, "get_latest_js_assets", lambda *args: {})
+    monkeypatch.setattr(js_analysis_cache, "extract_endpoints_from_js", fake_extract)
+    monkeypatch.setattr(crud_js_asset, "upsert_js_asset", lambda **kw: SimpleNamespace(id=uuid4()))
+    monkeypatch.setattr(
+        crud_api_endpoint,
+        "bulk_upsert_api_endpoints",
+        lambda db, project_id, endpoints, **kw: {
+            (e["method"], e["endpoint"]): uuid4() for e in endpoints
+        },
+    )
+    monkeypatch.setattr(crud_api_risk, "bulk_upsert_api_risk_findings", lambda *a, **kw: {})
+
+    task = SimpleNamespace(
+        project_id=uuid4(), config={"js_cache": False, "response_snapshots": False}
+    )
+    result = js_api_discovery._run_js_api_discovery(
+        db=SimpleNamespace(commit=lambda: None), task=task
+    )
+
+    assert result["scripts_discovered"] == 1
+    assert fetched.count("https://cdn.example.net/vendor.js") == 1
+    assert parsed == ['fetch("/api/items")']
+
+
+def test_oversized_script_is_streamed_instead_of_truncated():
+    cache = JSAnalysisCache(redis_client=None)
+    chunks = ["var pad = 1;\n" * 100, 'fetch("/api/late")']
+
+    analysis = js_api_discovery._analyze_script_chunks(cache, iter(chunks), max_size=100)
+
+    assert analysis.content_length == len("".join(chunks))
+    assert [e["endpoint"] for e in analysis.endpoints] == ["/api/late"]
+    assert cache.get(analysis.content_hash) == analysis.endpoints
+
+
+def test_oversized_script_cache_hit_skips_scanning(monkeypatch):
+    chunks = ["var pad = 1;\n" * 100, 'fetch("/api/late")']
+    content_hash = hashlib.sha256("".join(chunks).encode("utf-8")).hexdigest()
+    cache = JSAnalysisCache(redis_client=None)
+    cache.set(content_hash, [{"method": "GET", "endpoint": "/api/cached", "evidence": "x"}])
+
+    class _NoScanner:
+        def feed(self, chunk):
+            raise AssertionError("cached bundle was parsed again")
+
+    monkeypatch.setattr(js_api_discovery, "ChunkedEndpointScanner", _NoScanner)
+
+    analysis = js_api_discovery._analyze_script_chunks(cache, iter(chunks), max_size=100)
+
+    assert analysis.content_hash == content_hash
+    assert [e["endpoint"] for e in analysis.endpoints] == ["/api/cached"]
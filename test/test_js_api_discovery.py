@@ -1,9 +1,33 @@
 """Tests for JS deep discovery task."""
 
+from contextlib import contextmanager
 from types import SimpleNamespace
 from uuid import uuid4
 
+import pytest
+
 from worker.app.tasks import js_api_discovery
+from worker.app.utils.js_analysis_cache import JSAnalysisCache
+
+
+class _CommitCounter:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def _fake_open_script(fake_fetch):
+    """Serve scripts from a fake text fetcher through the _open_script interface."""
+
+    @contextmanager
+    def fake_open(url, verify_tls, max_size=0, client=None, headers=None):
+        text = fake_fetch(url, verify_tls)
+        status = 200 if text else 404
+        yield SimpleNamespace(status=status, headers={}), iter([text or ""])
+
+    return fake_open
 
 
 def test_run_js_api_discovery_discovers_scripts_endpoints_and_risks(monkeypatch):
@@ -25,11 +49,11 @@ def test_run_js_api_discovery_discovers_scripts_endpoints_and_risks(monkeypatch)
 
     monkeypatch.setattr(
         crud_web_asset,
-        "list_web_assets",
-        lambda db, project_id, is_alive, limit: assets,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
     )
 
-    def fake_fetch(url: str, verify_tls: bool, max_size: int = 512000):
+    def fake_fetch(url: str, verify_tls: bool, max_size: int = 512000, client=None):
         if url == "https://example.com":
             return '<script src="/static/app.js"></script><script>fetch("/graphql")</script>'
         if url == "https://example.com/static/app.js":
@@ -37,6 +61,8 @@ def test_run_js_api_discovery_discovers_scripts_endpoints_and_risks(monkeypatch)
         return None
 
     monkeypatch.setattr(js_api_discovery, "_fetch_text", fake_fetch)
+    monkeypatch.setattr(js_api_discovery, "_open_script", _fake_open_script(fake_fetch))
+    monkeypatch.setattr(crud_js_asset, "get_latest_js_assets", lambda *args: {})
 
     monkeypatch.setattr(
         crud_js_asset,
@@ -46,22 +72,27 @@ def test_run_js_api_discovery_discovers_scripts_endpoints_and_risks(monkeypatch)
 
     endpoints_seen = []
 
-    def fake_upsert_api_endpoint(**kwargs):
-        endpoints_seen.append((kwargs["method"], kwargs["endpoint"]))
-        return SimpleNamespace(id=endpoint_id, endpoint=kwargs["endpoint"], method=kwargs["method"])
+    def fake_bulk_endpoints(db, project_id, endpoints, js_asset_id=None, commit=True):
+        assert commit is False
+        pairs = [(item["method"], item["endpoint"]) for item in endpoints]
+        endpoints_seen.extend(pairs)
+        return {pair: endpoint_id for pair in pairs}
 
-    monkeypatch.setattr(crud_api_endpoint, "upsert_api_endpoint", fake_upsert_api_endpoint)
+    monkeypatch.setattr(crud_api_endpoint, "bulk_upsert_api_endpoints", fake_bulk_endpoints)
 
     risk_seen = []
 
-    def fake_upsert_risk(**kwargs):
-        risk_seen.append((str(kwargs["endpoint_id"]), kwargs["rule_name"]))
-        return SimpleNamespace(id=uuid4())
+    def fake_bulk_risks(db, project_id, findings, commit=True):
+        assert commit is False
+        risk_seen.extend((str(item["endpoint_id"]), item["rule_name"]) for item in findings)
+        return {}
 
-    monkeypatch.setattr(crud_api_risk, "create_or_update_api_risk_finding", fake_upsert_risk)
+    monkeypatch.setattr(crud_api_risk, "bulk_upsert_api_risk_findings", fake_bulk_risks)
+    db = _CommitCounter()
 
-    result = js_api_discovery._run_js_api_discovery(db=None, task=task)
+    result = js_api_discovery._run_js_api_discovery(db=db, task=task)
 
+    assert db.commits == 2  # one transaction per script
     assert result["pages_scanned"] == 1
     assert result["scripts_discovered"] == 2
     assert result["api_endpoints_discovered"] == 2
@@ -69,3 +100,152 @@ def test_run_js_api_discovery_discovers_scripts_endpoints_and_risks(monkeypatch)
     assert ("POST", "/admin/user") in endpoints_seen
     assert ("GET", "/graphql") in endpoints_seen
     assert ("insecure_transport" not in {name for _, name in risk_seen})
+
+
+def test_run_js_api_discovery_fetches_pages_concurrently(monkeypatch):
+    import threading
+
+    from server.app.crud import api_endpoint as crud_api_endpoint
+    from server.app.crud import js_asset as crud_js_asset
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [SimpleNamespace(id=uuid4(), url=f"https://site{i}.example.com") for i in range(2)]
+    # Both page fetches must be in flight at once to pass the barrier.
+    barrier = threading.Barrier(2, timeout=5)
+    scripts_seen = []
+
+    def fake_fetch(url, verify_tls, max_size=512000, client=None):
+        barrier.wait()
+        return "<script>var a = 1;</script>"
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    monkeypatch.setattr(js_api_discovery, "_fetch_text", fake_fetch)
+    monkeypatch.setattr(
+        crud_js_asset,
+        "upsert_js_asset",
+        lambda **kwargs: scripts_seen.append(kwargs["source_url"]) or SimpleNamespace(id=uuid4()),
+    )
+    monkeypatch.setattr(
+        crud_api_endpoint, "bulk_upsert_api_endpoints", lambda *args, **kwargs: {}
+    )
+
+    task = SimpleNamespace(
+        project_id=uuid4(),
+        config={"fetch_concurrency": 2, "js_cache": False, "response_snapshots": False},
+    )
+    result = js_api_discovery._run_js_api_discovery(db=_CommitCounter(), task=task)
+
+    assert result["pages_scanned"] == 2
+    assert sorted(scripts_seen) == [a.url for a in assets]
+
+
+def test_script_fetches_do_not_queue_behind_page_loads(monkeypatch):
+    import threading
+
+    from server.app.crud import api_endpoint as crud_api_endpoint
+    from server.app.crud import js_asset as crud_js_asset
+    from server.app.crud import web_asset as crud_web_asset
+
+    fast = SimpleNamespace(id=uuid4(), url="https://fast.example.com")
+    slow = SimpleNamespace(id=uuid4(), url="https://slow.example.com")
+    script_fetched = threading.Event()
+
+    def fake_fetch(url, verify_tls, max_size=512000, client=None):
+        if url == slow.url:
+            # Holds the only page worker until the fast page's script is in.
+            assert script_fetched.wait(timeout=5), "script fetch queued behind page load"
+            return "<html></html>"
+        if url == fast.url:
+            return '<script src="/app.js"></script>'
+        script_fetched.set()
+        return 'fetch("/api/items")'
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([[fast, slow]]),
+    )
+    monkeypatch.setattr(js_api_discovery, "_fetch_text", fake_fetch)
+    monkeypatch.setattr(js_api_discovery, "_open_script", _fake_open_script(fake_fetch))
+    monkeypatch.setattr(crud_js_asset, "get_latest_js_assets", lambda *args: {})
+    monkeypatch.setattr(
+        crud_js_asset, "upsert_js_asset", lambda **kwargs: SimpleNamespace(id=uuid4())
+    )
+    monkeypatch.setattr(
+        crud_api_endpoint, "bulk_upsert_api_endpoints", lambda *args, **kwargs: {}
+    )
+
+    task = SimpleNamespace(
+        project_id=uuid4(),
+        config={"fetch_concurrency": 1, "js_cache": False, "response_snapshots": False},
+    )
+    result = js_api_discovery._run_js_api_discovery(db=_CommitCounter(), task=task)
+
+    assert result["pages_scanned"] == 2
+    assert result["scripts_discovered"] == 1
+
+
+def test_not_modified_script_is_only_touched(monkeypatch):
+    from server.app.crud import api_endpoint as crud_api_endpoint
+    from server.app.crud import js_asset as crud_js_asset
+    from server.app.crud import web_asset as crud_web_asset
+
+    known = SimpleNamespace(
+        id=uuid4(), content_hash="abc", scan_metadata={"validators": {"ETag": '"v1"'}}
+    )
+    requests_seen = []
+    touched = []
+
+    @contextmanager
+    def fake_open(url, verify_tls, max_size=0, client=None, headers=None):
+        requests_seen.append((url, headers))
+        yield SimpleNamespace(status=304, headers={}), iter([])
+
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter(
+            [[SimpleNamespace(id=uuid4(), url="https://example.com")]]
+        ),
+    )
+    monkeypatch.setattr(
+        js_api_discovery,
+        "_fetch_text",
+        lambda url, verify_tls, max_size=512000, client=None: '<script src="/app.js"></script>',
+    )
+    monkeypatch.setattr(js_api_discovery, "_open_script", fake_open)
+    monkeypatch.setattr(
+        crud_js_asset,
+        "get_latest_js_assets",
+        lambda db, project_id, urls: {"https://example.com/app.js": known},
+    )
+    monkeypatch.setattr(
+        crud_js_asset, "touch_js_assets", lambda db, ids, commit: touched.extend(ids)
+    )
+    monkeypatch.setattr(
+        crud_api_endpoint,
+        "touch_api_endpoints",
+        lambda db, ids, commit: [("GET", "/api/a"), ("POST", "/api/b")],
+    )
+    monkeypatch.setattr(
+        crud_js_asset, "upsert_js_asset", lambda **kwargs: pytest.fail("script was rewritten")
+    )
+    cache = JSAnalysisCache(redis_client=None)
+    cache.set("abc", [{"method": "GET", "endpoint": "/api/a", "evidence": "x"}])
+    monkeypatch.setattr(js_api_discovery, "get_js_analysis_cache", lambda config: cache)
+
+    task = SimpleNamespace(
+        project_id=uuid4(), config={"js_cache": False, "response_snapshots": False}
+    )
+    result = js_api_discovery._run_js_api_discovery(db=_CommitCounter(), task=task)
+
+    assert requests_seen == [("https://example.com/app.js", {"If-None-Match": '"v1"'})]
+    assert touched == [known.id]
+    assert result["scripts_discovered"] == 1
+    assert result["scripts_not_modified"] == 1
+    # Endpoints of the unchanged script are still counted.
+    assert result["api_endpoints_discovered"] == 2
@@ -1,6 +1,7 @@
 """Tests for JS endpoint extraction and risk classification."""
 
 from worker.app.utils.js_api_parser import (
+    ChunkedEndpointScanner,
     classify_endpoint_risks,
     extract_endpoints_from_js,
     extract_scripts_from_html,
@@ -40,6 +41,57 @@ def test_extract_endpoints_from_js_parses_fetch_axios_and_generic():
     assert ("GET", "/graphql") in pairs
 
 
+def test_extract_scripts_from_html_ignores_unclosed_inline_script():
+    html = "<script>var a = 1;</script><script src='/x.js'></script>" + "<script>" * 1000
+    scripts = extract_scripts_from_html(html, "https://example.com/")
+    assert [s["script_type"] for s in scripts] == ["external", "inline"]
+
+
+def test_scanner_gives_same_endpoints_for_chunked_input():
+    js = ";\n".join(
+        [
+            'axios.get("/api/users")',
+            'fetch("/api/orders", {\n  method: "DELETE"\n})',
+            "const label = 'not an endpoint'",
+            "const tpl = `/v2/items`",
+        ]
+        * 500
+    )
+    whole = extract_endpoints_from_js(js)
+
+    scanner = ChunkedEndpointScanner()
+    for i in range(0, len(js), 997):
+        scanner.feed(js[i : i + 997])
+
+    assert scanner.finish() == whole
+    pairs = {(item["method"], item["endpoint"]) for item in whole}
+    assert ("DELETE", "/api/orders") in pairs
+    assert ("GET", "/v2/items") in pairs
+    assert not any("not an endpoint" in endpoint for _, endpoint in pairs)
+
+
+def test_quote_in_regex_literal_does_not_hide_later_endpoints():
+    js = (
+        'a.replace(/"/g,"&quot;")};fetch("/api/one");var u="/api/two";'
+        'axios.post("/api/three");var k="/api/four";'
+    )
+
+    pairs = {(item["method"], item["endpoint"]) for item in extract_endpoints_from_js(js)}
+
+    assert {
+        ("GET", "/api/one"),
+        ("GET", "/api/two"),
+        ("POST", "/api/three"),
+        ("GET", "/api/four"),
+    } <= pairs
+
+
+def test_call_inside_template_interpolation_is_found():
+    endpoints = extract_endpoints_from_js('const s = `${fetch("/api/in")}`;')
+
+    assert [(item["method"], item["endpoint"]) for item in endpoints] == [("GET", "/api/in")]
+
+
 def test_normalize_endpoint_rejects_dynamic_templates():
     assert normalize_endpoint("/api/users") == "/api/users"
     assert normalize_endpoint("api/v1/users") == "/api/v1/users"
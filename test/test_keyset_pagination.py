@@ -0,0 +1,52 @@
+"""Tests for keyset pagination over CRUD targets."""
+
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import Session, declarative_base
+
+from server.app.crud.pagination import iter_keyset_batches
+
+Base = declarative_base()
+
+
+class Target(Base):
+    __tablename__ = "target"
+
+    id = Column(Integer, primary_key=True)
+    project = Column(String(16), nullable=False)
+    host = Column(String(64), nullable=False, unique=True)
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    db.add_all(
+        [Target(project="a", host=f"h{i:02d}.example.com") for i in range(7)]
+        + [Target(project="b", host="other.example.com")]
+    )
+    db.commit()
+    return db
+
+
+def test_iter_keyset_batches_streams_every_row_in_key_order():
+    db = _session()
+    stmt = select(Target).where(Target.project == "a")
+
+    batches = list(iter_keyset_batches(db, stmt, Target.host, batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    hosts = [row.host for batch in batches for row in batch]
+    assert hosts == sorted(f"h{i:02d}.example.com" for i in range(7))
+
+
+def test_iter_keyset_batches_rows_survive_commits_between_pages():
+    db = _session()
+    stmt = select(Target).where(Target.project == "a")
+
+    seen = []
+    for batch in iter_keyset_batches(db, stmt, Target.host, batch_size=4):
+        db.commit()
+        seen.extend(row.host for row in batch)
+
+    assert len(seen) == 7
+    assert len(db.identity_map) == 0
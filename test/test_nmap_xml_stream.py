@@ -0,0 +1,65 @@
+"""Tests for batched nmap XML streaming."""
+
+import io
+
+from worker.app.tasks import scan
+
+NMAP_XML = b"""<?xml version="1.0"?>
+<nmaprun scanner="nmap">
+<host><status state="up"/>
+<address addr="10.0.0.1" addrtype="ipv4"/>
+<ports>
+<port protocol="tcp" portid="22"><state state="open"/><service name="ssh"/></port>
+<port protocol="tcp" portid="80"><state state="open"/></port>
+</ports>
+</host>
+<host><status state="up"/>
+<address addr="10.0.0.2" addrtype="ipv4"/>
+<address addr="00:11:22:33:44:55" addrtype="mac"/>
+<ports>
+<port protocol="tcp" portid="443"><state state="open"/><service name="https"/></port>
+<port protocol="tcp" portid="8080"><state state="filtered"/></port>
+</ports>
+</host>
+</nmaprun>
+"""
+
+
+class TestParseNmapXmlStream:
+    """Test incremental nmap XML parsing."""
+
+    def test_yields_each_host_with_open_ports(self):
+        results = list(scan._parse_nmap_xml_stream(io.BytesIO(NMAP_XML)))
+
+        assert results == [
+            ("10.0.0.1", [{"port": 22, "service": "ssh"}, {"port": 80, "service": None}]),
+            ("10.0.0.2", [{"port": 443, "service": "https"}]),
+        ]
+
+    def test_truncated_output_keeps_finished_hosts(self):
+        truncated = NMAP_XML[
+            : NMAP_XML.index(b'<host><status state="up"/>\n<address addr="10.0.0.2"')
+        ]
+        truncated += b"<host><address addr="
+
+        results = list(scan._parse_nmap_xml_stream(io.BytesIO(truncated)))
+
+        assert [ip for ip, _ in results] == ["10.0.0.1"]
+
+
+def test_iter_ip_port_results_batches_hosts_per_nmap_run(monkeypatch):
+    batches = []
+
+    def fake_batch(ips, ports, config, tick_interval=None):
+        batches.append(list(ips))
+        for ip in ips:
+            yield ip, [{"port": 80, "service": "http"}]
+
+    monkeypatch.setattr("shutil.which", lambda name: "/usr/bin/nmap")
+    monkeypatch.setattr(scan, "_scan_ports_nmap_batch", fake_batch)
+
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    results = dict(scan._iter_ip_port_results(ips, [80], {"nmap_batch_size": 2}))
+
+    assert batches == [["10.0.0.1", "10.0.0.2"], ["10.0.0.3"]]
+    assert set(results) == set(ips)
@@ -0,0 +1,145 @@
+"""Tests for sharded nuclei scans."""
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import nuclei_scan
+
+
+class _FakeDB:
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_nuclei_scan_dispatches_shards(monkeypatch):
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [SimpleNamespace(url=f"http://a/{i}") for i in range(10)]
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    progress = []
+    monkeypatch.setattr(
+        crud_scan_task,
+        "update_scan_task_progress",
+        lambda db, task_id, completed, total_targets=None: progress.append(
+            (completed, total_targets)
+        ),
+    )
+    dispatched = {}
+
+    def fake_chord(header):
+        dispatched["header"] = header
+        return lambda callback: dispatched.setdefault("callback", callback)
+
+    monkeypatch.setattr(nuclei_scan, "chord", fake_chord)
+
+    task = SimpleNamespace(
+        id=uuid4(), project_id=uuid4(), config={"shards": 4, "min_shard_size": 4}
+    )
+    result = nuclei_scan._run_nuclei_scan(db=None, task=task)
+
+    assert result is None
+    # 10 URLs with at least 4 per shard leaves room for 3 shards, not 4.
+    shard_urls = [sig.args[2] for sig in dispatched["header"]]
+    assert [len(urls) for urls in shard_urls] == [4, 3, 3]
+    assert sorted(u for urls in shard_urls for u in urls) == sorted(a.url for a in assets)
+    assert dispatched["callback"].args == (str(task.id),)
+    errbacks = dispatched["callback"].options["link_error"]
+    assert [(e.task, e.args) for e in errbacks] == [
+        ("worker.app.tasks.nuclei_scan.fail_nuclei_shards", (str(task.id),))
+    ]
+    assert progress == [(0, 10)]
+
+
+def test_finalize_nuclei_shards_merges_and_notifies_once(monkeypatch):
+    import server.app.db.session as db_session
+    from server.app.crud import scan_task as crud_scan_task
+
+    task = SimpleNamespace(id=uuid4(), project_id=uuid4())
+    transitions = iter([task, None])
+    statuses, notified = [], []
+    monkeypatch.setattr(db_session, "SessionLocal", _FakeDB)
+    monkeypatch.setattr(crud_scan_task, "get_scan_task", lambda db, task_id: task)
+    monkeypatch.setattr(
+        crud_scan_task,
+        "transition_scan_task_status",
+        lambda db, task_id, project_id, from_statuses, to_status: next(transitions),
+    )
+    monkeypatch.setattr(
+        crud_scan_task,
+        "update_scan_task_status",
+        lambda db, task_id, status, error_message=None, result_summary=None: statuses.append(
+            (status, error_message, result_summary)
+        ),
+    )
+    monkeypatch.setattr(
+        nuclei_scan,
+        "notify_dag_node_completion",
+        lambda db, scan_task_id, success: notified.append(success),
+    )
+
+    shard_results = [
+        {"shard": 0, "urls_scanned": 5, "vulnerabilities_found": 2, "timed_out": True},
+        {"shard": 1, "urls_scanned": 0, "vulnerabilities_found": 0, "error": "boom"},
+    ]
+    nuclei_scan.finalize_nuclei_shards.run(shard_results, str(task.id))
+    # A redelivered callback finds the task already finished.
+    nuclei_scan.finalize_nuclei_shards.run(shard_results, str(task.id))
+
+    assert statuses == [
+        (
+            "failed",
+            "boom",
+            {
+                "urls_scanned": 5,
+                "vulnerabilities_found": 2,
+                "timed_out": True,
+                "cancelled": False,
+                "shards": 2,
+                "failed_shards": 1,
+            },
+        )
+    ]
+    assert notified == [False]
+
+
+def test_fail_nuclei_shards_fails_running_task_once(monkeypatch):
+    import server.app.db.session as db_session
+    from server.app.crud import scan_task as crud_scan_task
+
+    task = SimpleNamespace(id=uuid4(), project_id=uuid4())
+    transitions = iter([task, None])
+    statuses, notified = [], []
+    monkeypatch.setattr(db_session, "SessionLocal", _FakeDB)
+    monkeypatch.setattr(crud_scan_task, "get_scan_task", lambda db, task_id: task)
+    monkeypatch.setattr(
+        crud_scan_task,
+        "transition_scan_task_status",
+        lambda db, task_id, project_id, from_statuses, to_status: next(transitions),
+    )
+    monkeypatch.setattr(
+        crud_scan_task,
+        "update_scan_task_status",
+        lambda db, task_id, status, error_message=None: statuses.append((status, error_message)),
+    )
+    monkeypatch.setattr(
+        nuclei_scan,
+        "notify_dag_node_completion",
+        lambda db, scan_task_id, success: notified.append(success),
+    )
+
+    # Celery calls the errback with the failed request, the exception and a traceback.
+    exc = RuntimeError("Worker exited prematurely")
+    nuclei_scan.fail_nuclei_shards.run(None, exc, None, str(task.id))
+    # The join step's own errback firing as well must not report twice.
+    nuclei_scan.fail_nuclei_shards.run(None, exc, None, str(task.id))
+
+    assert statuses == [("failed", "Nuclei shard failed: Worker exited prematurely")]
+    assert notified == [False]
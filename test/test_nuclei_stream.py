@@ -0,0 +1,109 @@
+"""Tests for streaming nuclei execution."""
+
+import os
+import stat
+import sys
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import nuclei_scan
+
+# Emits two findings, a stats line, then hangs until killed.
+FAKE_NUCLEI = """#!{python}
+import json, sys, time
+def finding(i):
+    return {{"template-id": f"t{{i}}", "matched-at": f"http://a/{{i}}",
+             "info": {{"name": "N", "severity": "high"}}}}
+print(json.dumps(finding(1)), flush=True)
+print("[INF] banner", file=sys.stderr, flush=True)
+print(json.dumps({{"percent": "50", "total": "4"}}), file=sys.stderr, flush=True)
+print(json.dumps(finding(2)), flush=True)
+time.sleep({sleep})
+print(json.dumps(finding(3)), flush=True)
+"""
+
+
+def _install_fake_nuclei(tmp_path, monkeypatch, sleep):
+    script = tmp_path / "nuclei"
+    script.write_text(FAKE_NUCLEI.format(python=sys.executable, sleep=sleep))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+
+
+def _patch_task_io(monkeypatch, saved, progress, status="running"):
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [SimpleNamespace(url=f"http://a/{i}") for i in range(4)]
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+
+    def fake_progress(db, task_id, completed_targets, total_targets=None):
+        progress.append(completed_targets)
+        return SimpleNamespace(status=status)
+
+    monkeypatch.setattr(crud_scan_task, "update_scan_task_progress", fake_progress)
+    monkeypatch.setattr(
+        nuclei_scan,
+        "_save_vulnerabilities",
+        lambda db, project_id, task_id, results: saved.append(
+            [r["template-id"] for r in results]
+        )
+        or len(results),
+    )
+
+
+def test_nuclei_timeout_keeps_streamed_findings(tmp_path, monkeypatch):
+    _install_fake_nuclei(tmp_path, monkeypatch, sleep=30)
+    saved, progress = [], []
+    _patch_task_io(monkeypatch, saved, progress)
+
+    task = SimpleNamespace(
+        id=uuid4(),
+        project_id=uuid4(),
+        config={"nuclei_timeout": 1, "result_flush_size": 1, "progress_interval": 0.2},
+    )
+    result = nuclei_scan._run_nuclei_scan(db=None, task=task)
+
+    assert saved == [["t1"], ["t2"]]
+    assert result["vulnerabilities_found"] == 2
+    assert result["timed_out"] is True
+    assert 2 in progress
+
+
+def test_nuclei_stops_when_task_is_cancelled(tmp_path, monkeypatch):
+    _install_fake_nuclei(tmp_path, monkeypatch, sleep=30)
+    saved, progress = [], []
+    _patch_task_io(monkeypatch, saved, progress, status="cancelled")
+
+    task = SimpleNamespace(
+        id=uuid4(),
+        project_id=uuid4(),
+        config={"nuclei_timeout": 60, "result_flush_size": 10, "progress_interval": 0.2},
+    )
+    result = nuclei_scan._run_nuclei_scan(db=None, task=task)
+
+    assert result["cancelled"] is True
+    assert result["vulnerabilities_found"] == sum(len(batch) for batch in saved)
+    assert "t3" not in [t for batch in saved for t in batch]
+
+
+def test_nuclei_run_to_completion(tmp_path, monkeypatch):
+    _install_fake_nuclei(tmp_path, monkeypatch, sleep=0)
+    saved, progress = [], []
+    _patch_task_io(monkeypatch, saved, progress)
+
+    task = SimpleNamespace(id=uuid4(), project_id=uuid4(), config={"result_flush_size": 2})
+    result = nuclei_scan._run_nuclei_scan(db=None, task=task)
+
+    assert saved == [["t1", "t2"], ["t3"]]
+    assert result == {
+        "urls_scanned": 4,
+        "vulnerabilities_found": 3,
+        "timed_out": False,
+        "cancelled": False,
+    }
+    assert progress[0] == 0 and progress[-1] == 4
@@ -0,0 +1,149 @@
+"""Tests for the asyncio TCP connect scanner."""
+
+import socket
+
+from worker.app.tasks import scan
+from worker.app.utils.port_scanner import get_connect_scan_config, scan_tcp_ports
+
+
+def _closed_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_scan_tcp_ports_reports_listening_port_only():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(16)
+        open_port = listener.getsockname()[1]
+        closed_port = _closed_port()
+
+        result = scan_tcp_ports(
+            ["127.0.0.1"],
+            [closed_port, open_port],
+            concurrency=4,
+            per_host=2,
+            timeout=1.0,
+        )
+
+    assert result == {"127.0.0.1": [open_port]}
+
+
+def test_scan_tcp_ports_handles_empty_input():
+    assert scan_tcp_ports([], [80]) == {}
+    assert scan_tcp_ports(["127.0.0.1"], []) == {"127.0.0.1": []}
+
+
+def test_get_connect_scan_config_reads_task_overrides():
+    config = get_connect_scan_config(
+        {"connect_concurrency": 50, "connect_per_host": 4, "connect_timeout": 0.5}
+    )
+    assert config == {"concurrency": 50, "per_host": 4, "timeout": 0.5}
+    assert get_connect_scan_config(None)["timeout"] == 2.0
+
+
+def test_iter_ip_port_results_uses_connect_scanner_without_nmap(monkeypatch):
+    captured = {}
+
+    def fake_scan(ips, ports, concurrency, per_host, timeout):
+        captured.update(ips=ips, concurrency=concurrency)
+        return {ip: [22] for ip in ips}
+
+    monkeypatch.setattr("shutil.which", lambda name: None)
+    monkeypatch.setattr("worker.app.utils.port_scanner.scan_tcp_ports", fake_scan)
+
+    result = dict(
+        scan._iter_ip_port_results(["10.0.0.1", "10.0.0.2"], [22], {"connect_concurrency": 10})
+    )
+
+    assert captured == {"ips": ["10.0.0.1", "10.0.0.2"], "concurrency": 10}
+    assert result["10.0.0.2"] == [{"port": 22, "service": "ssh"}]
+
+
+def test_run_port_scan_bulk_upserts_ports_per_flush(monkeypatch):
+    from types import SimpleNamespace
+    from uuid import uuid4
+
+    from server.app.crud import ip_address as crud_ip
+    from server.app.crud import port as crud_port
+
+    ips = [SimpleNamespace(id=uuid4(), ip=f"10.0.0.{i}") for i in range(1, 4)]
+    calls = []
+
+    monkeypatch.setattr(
+        crud_ip, "iter_ip_address_batches", lambda db, project_id, batch_size: iter([ips])
+    )
+    monkeypatch.setattr(
+        crud_port, "bulk_upsert_ports", lambda db, ports: calls.append(list(ports)) or ports
+    )
+    monkeypatch.setattr(
+        scan,
+        "_iter_ip_port_results",
+        lambda ips, ports, config, tick_interval: (
+            (ip, [{"port": 80, "service": "http"}]) for ip in ips
+        ),
+    )
+
+    task = SimpleNamespace(project_id=uuid4(), config={"port_flush_size": 2})
+    result = scan._run_port_scan(db=None, task=task)
+
+    assert result == {"ips_scanned": 3, "open_ports": 3}
+    assert [len(call) for call in calls] == [2, 1]
+    assert calls[0][0]["ip_id"] == ips[0].id
+
+
+def test_run_port_scan_flushes_on_idle_ticks(monkeypatch):
+    import time
+    from types import SimpleNamespace
+    from uuid import uuid4
+
+    from server.app.crud import ip_address as crud_ip
+    from server.app.crud import port as crud_port
+
+    ips = [SimpleNamespace(id=uuid4(), ip=f"10.0.0.{i}") for i in range(1, 3)]
+    events = []
+
+    monkeypatch.setattr(
+        crud_ip, "iter_ip_address_batches", lambda db, project_id, batch_size: iter([ips])
+    )
+    monkeypatch.setattr(
+        crud_port,
+        "bulk_upsert_ports",
+        lambda db, ports: events.append(("flush", len(ports))) or ports,
+    )
+
+    def fake_results(ips, ports, config, tick_interval):
+        yield ips[0], [{"port": 80, "service": "http"}]
+        # nmap is still busy with the second host; only ticks arrive.
+        time.sleep(tick_interval * 2)
+        yield None
+        events.append(("host", ips[1]))
+        yield ips[1], [{"port": 443, "service": "https"}]
+
+    monkeypatch.setattr(scan, "_iter_ip_port_results", fake_results)
+
+    task = SimpleNamespace(
+        project_id=uuid4(), config={"port_flush_size": 100, "port_flush_interval": 0.05}
+    )
+    result = scan._run_port_scan(db=None, task=task)
+
+    assert result == {"ips_scanned": 2, "open_ports": 2}
+    assert events == [("flush", 1), ("host", "10.0.0.2"), ("flush", 1)]
+
+
+def test_iter_with_ticks_reports_idle_intervals():
+    import threading
+
+    release = threading.Event()
+
+    def slow():
+        yield "a"
+        release.wait(timeout=5)
+        yield "b"
+
+    items = scan._iter_with_ticks(slow(), 0.01)
+    assert next(items) == "a"
+    assert next(items) is None
+    release.set()
+    assert [item for item in items if item is not None] == ["b"]
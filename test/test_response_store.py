@@ -0,0 +1,134 @@
+"""Tests for the response snapshot store and its readers."""
+
+from types import SimpleNamespace
+
+import redis
+
+from worker.app.tasks import fingerprint
+from worker.app.utils.response_store import ResponseSnapshotStore
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, *args, **kwargs):
+        self.ops.append((args, kwargs))
+
+    def execute(self):
+        for args, kwargs in self.ops:
+            self.client.set(*args, **kwargs)
+
+
+def test_snapshot_round_trip_dedupes_identical_bodies():
+    client = _FakeRedis()
+    store = ResponseSnapshotStore(redis_client=client, ttl=60, max_body=10)
+
+    first = store.save("http://a", 200, {"Server": "nginx"}, b"<html>hello world</html>")
+    second = store.save(
+        "http://b", 200, {}, b"<html>hello world</html>", favicon=b"ico", favicon_fetched=True
+    )
+
+    assert first == second
+    blob_keys = [key for key in client.data if ":blob:" in key]
+    assert len(blob_keys) == 2  # one shared body, one favicon
+    assert set(client.ttls.values()) == {60}
+
+    snapshot = store.get("http://a", max_age=60, response_hash=first)
+    assert snapshot.body == b"<html>hell"
+    assert snapshot.truncated
+    assert snapshot.headers == {"Server": "nginx"}
+    assert not snapshot.favicon_fetched
+    assert store.get("http://b").favicon == b"ico"
+
+
+def test_stale_or_mismatched_snapshot_is_a_miss(monkeypatch):
+    store = ResponseSnapshotStore(redis_client=_FakeRedis())
+    response_hash = store.save("http://a", 200, {}, b"body")
+
+    assert store.get("http://a", response_hash="other") is None
+    assert store.get("http://missing") is None
+
+    monkeypatch.setattr("time.time", lambda: 10**12)
+    assert store.get("http://a", max_age=60) is None
+    assert store.get("http://a", response_hash=response_hash) is not None
+
+
+def test_corrupt_snapshot_is_a_miss_and_discarded():
+    client = _FakeRedis()
+    store = ResponseSnapshotStore(redis_client=client)
+    response_hash = store.save("http://a", 200, {}, b"body")
+    # A truncated body blob must not break the reading stage.
+    blob_key = store._blob_key(response_hash)
+    client.data[blob_key] = client.data[blob_key][:3]
+
+    assert store.get("http://a") is None
+    assert store._url_key("http://a") not in client.data
+
+    store.save("http://a", 200, {}, b"body")
+    assert store.get("http://a").body == b"body"
+
+
+def test_redis_errors_are_treated_as_misses():
+    class _Broken:
+        def get(self, key):
+            raise redis.ConnectionError("down")
+
+        def pipeline(self, transaction=True):
+            raise redis.ConnectionError("down")
+
+    store = ResponseSnapshotStore(redis_client=_Broken())
+
+    assert store.save("http://a", 200, {}, b"body") == store.save("http://a", 200, {}, b"body")
+    assert store.get("http://a") is None
+
+
+def test_fingerprint_uses_snapshot_instead_of_fetching(monkeypatch):
+    store = ResponseSnapshotStore(redis_client=_FakeRedis())
+    response_hash = store.save(
+        "http://a",
+        200,
+        {"Server": "nginx"},
+        b"<html>wp-content</html>",
+        favicon=b"ico",
+        favicon_fetched=True,
+    )
+
+    def fail(*args, **kwargs):
+        raise AssertionError("should not fetch")
+
+    monkeypatch.setattr("urllib.request.urlopen", fail)
+
+    body, headers, favicons = fingerprint._fetch_response(
+        "http://a", store=store, snapshot_max_age=60, response_hash=response_hash
+    )
+
+    assert body == "<html>wp-content</html>"
+    assert headers == {"Server": "nginx"}
+    assert len(favicons) == 2
+
+    error_snapshot = SimpleNamespace(status=404, body=b"not found")
+    assert fingerprint._response_from_snapshot("http://a", error_snapshot) == ("", {}, None)
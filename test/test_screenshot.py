@@ -0,0 +1,114 @@
+"""Tests for screenshot capture task."""
+
+import threading
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import screenshot
+
+
+def _asset(url, response_hash=None, screenshot_path=None):
+    return SimpleNamespace(
+        id=uuid4(), url=url, response_hash=response_hash, screenshot_path=screenshot_path
+    )
+
+
+def test_run_screenshot_dedupes_identical_pages(monkeypatch, tmp_path):
+    from server.app.crud import web_asset as crud_web_asset
+
+    parked = [_asset(f"http://parked{i}.example.com", response_hash="parked") for i in range(3)]
+    known = _asset("http://lb.example.com", response_hash="lb")
+    unique = _asset("http://app.example.com")
+    done = _asset("http://done.example.com", screenshot_path="/screenshots/done.png")
+    captured = []
+    saved = {}
+
+    def fake_capture(url, screenshots):
+        captured.append(url)
+        return f"/screenshots/{url.split('//')[1]}.png"
+
+    monkeypatch.setattr(screenshot, "SCREENSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(screenshot, "_capture_screenshot", fake_capture)
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([[*parked, known, unique, done]]),
+    )
+    monkeypatch.setattr(
+        crud_web_asset,
+        "get_screenshot_paths_by_response_hash",
+        lambda db, project_id, hashes: {"lb": "/screenshots/lb.png"} if "lb" in hashes else {},
+    )
+    monkeypatch.setattr(
+        crud_web_asset, "update_screenshot_paths", lambda db, paths: saved.update(paths)
+    )
+
+    task = SimpleNamespace(project_id=uuid4(), config={"response_snapshots": False})
+    result = screenshot._run_screenshot(db=None, task=task)
+
+    assert sorted(captured) == ["http://app.example.com", "http://parked0.example.com"]
+    assert {saved[a.id] for a in parked} == {"/screenshots/parked0.example.com.png"}
+    assert saved[known.id] == "/screenshots/lb.png"
+    assert done.id not in saved
+    assert result == {
+        "assets_processed": 6,
+        "captured": 2,
+        "reused": 3,
+        "skipped_blank": 0,
+    }
+
+
+def test_run_screenshot_captures_in_parallel(monkeypatch, tmp_path):
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [_asset(f"http://site{i}.example.com") for i in range(3)]
+    # All three captures must be in flight at once to pass the barrier.
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_capture(url, screenshots):
+        barrier.wait()
+        return "/screenshots/x.png"
+
+    monkeypatch.setattr(screenshot, "SCREENSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(screenshot, "_capture_screenshot", fake_capture)
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    monkeypatch.setattr(crud_web_asset, "update_screenshot_paths", lambda db, paths: None)
+
+    task = SimpleNamespace(
+        project_id=uuid4(), config={"response_snapshots": False, "capture_concurrency": 3}
+    )
+    result = screenshot._run_screenshot(db=None, task=task)
+
+    assert result["captured"] == 3
+
+
+def test_run_screenshot_schedules_garbage_collection_after_captures(monkeypatch):
+    import server.app.db.session as db_session
+    from server.app.crud import scan_task as crud_scan_task
+
+    task = SimpleNamespace(id=uuid4(), project_id=uuid4(), status="pending", config={})
+    scheduled = []
+    monkeypatch.setattr(
+        db_session,
+        "SessionLocal",
+        lambda: SimpleNamespace(close=lambda: None, rollback=lambda: None),
+    )
+    monkeypatch.setattr(crud_scan_task, "get_scan_task", lambda db, task_id: task)
+    monkeypatch.setattr(crud_scan_task, "update_scan_task_status", lambda *a, **kw: None)
+    monkeypatch.setattr(screenshot, "wait_for_project_rate_limit", lambda **kw: True)
+    monkeypatch.setattr(screenshot, "notify_dag_node_completion", lambda **kw: None)
+    monkeypatch.setattr(
+        screenshot.collect_screenshot_garbage, "delay", lambda: scheduled.append(True)
+    )
+
+    for captured in (0, 2):
+        monkeypatch.setattr(
+            screenshot, "_run_screenshot", lambda db, task, n=captured: {"captured": n}
+        )
+        screenshot.run_screenshot.run(str(task.id))
+
+    assert scheduled == [True]
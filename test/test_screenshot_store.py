@@ -0,0 +1,74 @@
+"""Tests for content-addressed screenshot storage."""
+
+import os
+import time
+
+import pytest
+
+from worker.app.utils import screenshot_store
+from worker.app.utils.screenshot_store import ScreenshotStore, thumbnail_path
+
+
+def test_put_deduplicates_by_image_hash_without_pillow(monkeypatch, tmp_path):
+    monkeypatch.setattr(screenshot_store, "_encode_webp", lambda data, quality, size: None)
+    store = ScreenshotStore(str(tmp_path))
+
+    first = store.put(b"\x89PNG same image")
+    second = store.put(b"\x89PNG same image")
+
+    assert first == second
+    assert first.startswith("/screenshots/") and first.endswith(".png")
+    assert [path for path, _ in store.iter_objects()] == [first]
+    assert thumbnail_path(first) is None
+
+
+def test_put_stores_webp_with_thumbnail(tmp_path):
+    image_module = pytest.importorskip("PIL.Image")
+    import io
+
+    png = io.BytesIO()
+    image_module.new("RGB", (1280, 800), "white").save(png, format="PNG")
+    store = ScreenshotStore(str(tmp_path))
+
+    path = store.put(png.getvalue())
+
+    stored = {public: file for public, file in store.iter_objects()}
+    assert set(stored) == {path, thumbnail_path(path)}
+    with image_module.open(stored[thumbnail_path(path)]) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size[0] <= 320 and thumb.size[1] <= 200
+
+
+def test_collect_garbage_removes_old_unreferenced_objects(monkeypatch, tmp_path):
+    monkeypatch.setattr(screenshot_store, "_encode_webp", lambda data, quality, size: None)
+    store = ScreenshotStore(str(tmp_path))
+    kept = store.put(b"kept")
+    orphan = store.put(b"orphan")
+    recent = store.put(b"recent")
+    files = dict(store.iter_objects())
+    old = time.time() - 7200
+    for path in (kept, orphan):
+        os.utime(files[path], (old, old))
+
+    removed = store.collect_garbage({kept}, min_age=3600)
+
+    assert removed == 1
+    assert set(dict(store.iter_objects())) == {kept, recent}
+
+
+def test_deduplicated_put_protects_old_object_from_garbage_collection(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        screenshot_store, "_encode_webp", lambda data, quality, size: (b"image", b"thumb")
+    )
+    store = ScreenshotStore(str(tmp_path))
+    path = store.put(b"parked page")
+    old = time.time() - 7200
+    for _, file_path in store.iter_objects():
+        os.utime(file_path, (old, old))
+
+    # A new capture lands on the orphan before its reference is committed.
+    assert store.put(b"parked page") == path
+    removed = store.collect_garbage(set(), min_age=3600)
+
+    assert removed == 0
+    assert set(dict(store.iter_objects())) == {path, thumbnail_path(path)}
@@ -0,0 +1,76 @@
+"""Tests for streaming subfinder ingest."""
+
+import os
+import stat
+import sys
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from worker.app.tasks import scan
+
+FAKE_SUBFINDER = """#!{python}
+for name in ["a.example.com", "B.example.com", "a.example.com", "", "c.example.com",
+             "b.example.com", "d.example.com"]:
+    print(name, flush=True)
+"""
+
+
+def test_subdomain_scan_streams_and_flushes_unique_names(tmp_path, monkeypatch):
+    from server.app.crud import subdomain as crud_subdomain
+
+    script = tmp_path / "subfinder"
+    script.write_text(FAKE_SUBFINDER.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ.get('PATH', '')}")
+    flushed = []
+    monkeypatch.setattr(
+        crud_subdomain,
+        "bulk_upsert_subdomains",
+        lambda db, project_id, root_domain, subdomains, source: flushed.append(
+            list(subdomains)
+        )
+        or len(subdomains),
+    )
+
+    task = SimpleNamespace(
+        project_id=uuid4(), config={"domain": "example.com", "flush_size": 2}
+    )
+    result = scan._run_subdomain_scan(db=None, task=task)
+
+    assert flushed == [
+        ["a.example.com", "b.example.com"],
+        ["c.example.com", "d.example.com"],
+    ]
+    assert result == {"domain": "example.com", "subdomains_found": 4}
+
+
+def test_bulk_upsert_subdomains_splits_on_bind_parameter_limit():
+    from server.app.crud import subdomain as crud_subdomain
+    from server.app.crud.bulk import POSTGRES_MAX_BIND_PARAMS
+
+    class _Session:
+        def __init__(self):
+            self.statements = []
+            self.commits = 0
+
+        def execute(self, stmt):
+            self.statements.append(stmt)
+
+        def commit(self):
+            self.commits += 1
+
+    db = _Session()
+    names = [f"h{i}.example.com" for i in range(20000)] + ["h0.example.com"]
+
+    count = crud_subdomain.bulk_upsert_subdomains(
+        db, uuid4(), "example.com", names, source="subfinder"
+    )
+
+    assert count == 20000
+    assert db.commits == 1
+    assert len(db.statements) > 1
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert len(compiled.params) <= POSTGRES_MAX_BIND_PARAMS
+    assert "ON CONFLICT (project_id, subdomain) DO UPDATE" in str(compiled)
@@ -0,0 +1,54 @@
+"""Tests for parallel xray scans."""
+
+import threading
+from types import SimpleNamespace
+from uuid import uuid4
+
+from worker.app.tasks import xray_scan
+
+
+def test_run_xray_scan_runs_targets_in_parallel(monkeypatch):
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.crud import web_asset as crud_web_asset
+
+    assets = [SimpleNamespace(url=f"http://site{i}.example.com") for i in range(3)]
+    # All three scans must be in flight at once to pass the barrier.
+    barrier = threading.Barrier(3, timeout=5)
+    saved, progress = {}, []
+
+    def fake_execute(url, plugins, use_crawler, timeout=300):
+        barrier.wait()
+        assert timeout == 60
+        if url.endswith("site1.example.com"):
+            return []
+        return [{"plugin": "xss", "url": url}]
+
+    monkeypatch.setattr(xray_scan, "_execute_xray", fake_execute)
+    monkeypatch.setattr(
+        crud_web_asset,
+        "iter_web_asset_batches",
+        lambda db, project_id, is_alive, batch_size: iter([assets]),
+    )
+    monkeypatch.setattr(
+        crud_scan_task,
+        "update_scan_task_progress",
+        lambda db, task_id, completed, total_targets=None: progress.append(completed),
+    )
+    monkeypatch.setattr(
+        xray_scan,
+        "_save_vulnerabilities",
+        lambda db, project_id, task_id, results: saved.update(
+            {r["url"]: len(results) for r in results}
+        ),
+    )
+
+    task = SimpleNamespace(
+        id=uuid4(),
+        project_id=uuid4(),
+        config={"max_concurrency": 3, "xray_timeout": 60},
+    )
+    result = xray_scan._run_xray_scan(db=None, task=task)
+
+    assert result == {"urls_scanned": 3, "vulnerabilities_found": 2}
+    assert saved == {"http://site0.example.com": 1, "http://site2.example.com": 1}
+    assert progress == [0, 1, 2, 3]
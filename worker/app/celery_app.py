@@ -37,7 +37,11 @@ celery_app.conf.update(
         "worker.app.tasks.http_probe.run_http_probe": {"queue": "scan"},
         "worker.app.tasks.fingerprint.run_fingerprint": {"queue": "scan"},
         "worker.app.tasks.screenshot.run_screenshot": {"queue": "scan"},
+        "worker.app.tasks.screenshot.collect_screenshot_garbage": {"queue": "default"},
         "worker.app.tasks.nuclei_scan.run_nuclei_scan": {"queue": "scan"},
+        "worker.app.tasks.nuclei_scan.run_nuclei_shard": {"queue": "scan"},
+        "worker.app.tasks.nuclei_scan.finalize_nuclei_shards": {"queue": "orchestration"},
+        "worker.app.tasks.nuclei_scan.fail_nuclei_shards": {"queue": "orchestration"},
         "worker.app.tasks.xray_scan.run_xray_scan": {"queue": "scan"},
         "worker.app.tasks.js_api_discovery.run_js_api_discovery": {"queue": "scan"},
         "worker.app.tasks.dag_executor.execute_dag": {"queue": "orchestration"},
@@ -1,5 +1,9 @@
 """Fingerprint engine module."""
 from worker.app.fingerprint.engine import FingerprintEngine
-from worker.app.fingerprint.loader import load_fingerprints
+from worker.app.fingerprint.loader import (
+    build_fingerprint_cache,
+    load_engine,
+    load_fingerprints,
+)
 
-__all__ = ["FingerprintEngine", "load_fingerprints"]
+__all__ = ["FingerprintEngine", "build_fingerprint_cache", "load_engine", "load_fingerprints"]
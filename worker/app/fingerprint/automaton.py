@@ -0,0 +1,74 @@
+"""Aho-Corasick multi-pattern matcher used by the fingerprint index."""
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+
+class AhoCorasick:
+    """
+    Find which of many substrings occur in a text with a single pass.
+
+    Patterns are identified by their position in the list passed to the
+    constructor. ``search`` returns the ids of every pattern that occurs at
+    least once, which is all word matchers need.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[FrozenSet[int]] = [frozenset()]
+
+        outputs: List[Set[int]] = [set()]
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("AhoCorasick patterns must be non-empty")
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(pattern_id)
+
+        # Breadth-first failure links; each state inherits the outputs of its
+        # failure state so a match never has to walk the suffix chain.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                outputs[next_state] |= outputs[self._fail[next_state]]
+
+        self._out = [frozenset(out) for out in outputs]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def search(self, text: str) -> Set[int]:
+        """Return ids of all patterns occurring in ``text``."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        visited: Set[int] = set()
+        state = 0
+
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                visited.add(state)
+
+        hits: Set[int] = set()
+        for state in visited:
+            hits |= out[state]
+        return hits
@@ -2,11 +2,20 @@
 import logging
 import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from worker.app.fingerprint.automaton import AhoCorasick
 
 logger = logging.getLogger(__name__)
 
 
+# Word matchers are grouped by (part, case_insensitive); one automaton each.
+_WordKey = Tuple[str, bool]
+
+# A favicon may be identified by several hashes (md5, Shodan mmh3).
+FaviconHashes = Union[str, Sequence[str], None]
+
+
 @dataclass
 class MatchResult:
     """Result of a fingerprint match."""
@@ -25,34 +34,164 @@ class FingerprintEngine:
         """Initialize the engine with fingerprint rules."""
         self.fingerprints = fingerprints
         self._compiled_regex: Dict[str, re.Pattern] = {}
+        self._compile_index()
         logger.info(f"FingerprintEngine initialized with {len(fingerprints)} rules")
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # Compiled regexes are rebuilt lazily after unpickling.
+        state = self.__dict__.copy()
+        state["_compiled_regex"] = {}
+        return state
+
+    def _compile_index(self) -> None:
+        """
+        Build the word index used by ``match``.
+
+        Every plain word matcher is answered from one Aho-Corasick pass per
+        (part, case) group. A rule is only evaluated when one of its words
+        occurs in the response or one of its favicon hashes equals the
+        response favicon, unless it has a matcher the index cannot rule out
+        (regex, negative or empty words).
+        """
+        word_ids: Dict[_WordKey, Dict[str, int]] = {}
+        self._rule_matchers: List[List[tuple]] = []
+        self._always_rules: List[int] = []
+        self._rules_by_word: Dict[_WordKey, Dict[int, List[int]]] = {}
+        self._rules_by_favicon: Dict[str, List[int]] = {}
+
+        for rule_index, fp in enumerate(self.fingerprints):
+            compiled = []
+            triggers: Set[Tuple[_WordKey, int]] = set()
+            favicon_triggers: Set[str] = set()
+            always = False
+
+            for probe in fp.get("http", []) or []:
+                for matcher in probe.get("matchers", []) or []:
+                    if matcher.get("type") == "favicon" and not matcher.get("negative", False):
+                        hashes = frozenset(str(h).lower() for h in matcher.get("hash", []))
+                        if hashes:
+                            compiled.append(("favicon", hashes))
+                            favicon_triggers |= hashes
+                        continue
+
+                    words = matcher.get("words", [])
+                    if matcher.get("type", "word") == "word" and not words:
+                        continue
+                    if (
+                        matcher.get("type", "word") != "word"
+                        or matcher.get("negative", False)
+                        or not all(isinstance(w, str) and w for w in words)
+                    ):
+                        compiled.append(("raw", matcher))
+                        always = True
+                        continue
+
+                    case_insensitive = bool(matcher.get("case-insensitive", False))
+                    part = "header" if matcher.get("part", "body") == "header" else "body"
+                    key = (part, case_insensitive)
+                    ids = word_ids.setdefault(key, {})
+                    pattern_ids = tuple(
+                        ids.setdefault(w.lower() if case_insensitive else w, len(ids))
+                        for w in words
+                    )
+                    require_all = matcher.get("condition", "or") == "and"
+                    compiled.append(("word", key, pattern_ids, require_all))
+                    # An "and" matcher can only hit if its first word does.
+                    for pattern_id in pattern_ids[:1] if require_all else pattern_ids:
+                        triggers.add((key, pattern_id))
+
+            self._rule_matchers.append(compiled)
+            if not compiled:
+                continue
+            if always:
+                self._always_rules.append(rule_index)
+                continue
+            for key, pattern_id in triggers:
+                self._rules_by_word.setdefault(key, {}).setdefault(pattern_id, []).append(
+                    rule_index
+                )
+            for favicon in favicon_triggers:
+                self._rules_by_favicon.setdefault(favicon, []).append(rule_index)
+
+        self._automata: Dict[_WordKey, AhoCorasick] = {
+            key: AhoCorasick(sorted(ids, key=ids.get)) for key, ids in word_ids.items()
+        }
+
     def match(
         self,
         body: str = "",
         headers: Optional[Dict[str, str]] = None,
-        favicon_hash: Optional[str] = None,
+        favicon_hash: FaviconHashes = None,
     ) -> List[MatchResult]:
-        """Match response against all fingerprints."""
+        """Match response against all fingerprints.
+
+        ``favicon_hash`` may be a single hash or all hashes of the favicon.
+        """
         results = []
         headers = headers or {}
         header_str = self._headers_to_string(headers)
-
-        for fp in self.fingerprints:
-            if self._match_fingerprint(fp, body, header_str, favicon_hash):
-                result = self._create_result(fp)
-                results.append(result)
+        contents = {"body": body, "header": header_str}
+        folded: Dict[str, str] = {}
+        favicons = _normalize_favicon_hashes(favicon_hash)
+
+        word_hits: Dict[_WordKey, Set[int]] = {}
+        candidates = set(self._always_rules)
+        for favicon in favicons:
+            candidates.update(self._rules_by_favicon.get(favicon, ()))
+        for key, automaton in self._automata.items():
+            part, case_insensitive = key
+            content = contents[part]
+            if case_insensitive:
+                if part not in folded:
+                    folded[part] = content.lower()
+                content = folded[part]
+            hits = automaton.search(content)
+            word_hits[key] = hits
+            rules_by_word = self._rules_by_word.get(key, {})
+            for pattern_id in hits:
+                candidates.update(rules_by_word.get(pattern_id, ()))
+
+        for rule_index in sorted(candidates):
+            if self._match_compiled(
+                self._rule_matchers[rule_index], word_hits, body, header_str, favicons
+            ):
+                results.append(self._create_result(self.fingerprints[rule_index]))
 
         return results
 
+    def _match_compiled(
+        self,
+        matchers: List[tuple],
+        word_hits: Dict[_WordKey, Set[int]],
+        body: str,
+        header_str: str,
+        favicons: List[str],
+    ) -> bool:
+        """Check a compiled rule; any matching matcher matches the rule."""
+        for matcher in matchers:
+            if matcher[0] == "word":
+                _, key, pattern_ids, require_all = matcher
+                hits = word_hits.get(key, set())
+                if require_all:
+                    if all(pattern_id in hits for pattern_id in pattern_ids):
+                        return True
+                elif any(pattern_id in hits for pattern_id in pattern_ids):
+                    return True
+            elif matcher[0] == "favicon":
+                if any(favicon in matcher[1] for favicon in favicons):
+                    return True
+            elif self._match_single_matcher(matcher[1], body, header_str, favicons):
+                return True
+        return False
+
     def _match_fingerprint(
         self,
         fp: Dict[str, Any],
         body: str,
         header_str: str,
-        favicon_hash: Optional[str],
+        favicon_hash: FaviconHashes,
     ) -> bool:
-        """Check if a single fingerprint matches."""
+        """Check if a single fingerprint matches without the compiled index."""
         http_probes = fp.get("http", [])
         if not http_probes:
             return False
@@ -73,7 +212,7 @@ class FingerprintEngine:
         matcher: Dict[str, Any],
         body: str,
         header_str: str,
-        favicon_hash: Optional[str],
+        favicon_hash: FaviconHashes,
     ) -> bool:
         """Match a single matcher against response."""
         matcher_type = matcher.get("type", "word")
@@ -138,15 +277,16 @@ class FingerprintEngine:
         return not matched if negative else matched
 
     def _match_favicon(
-        self, matcher: Dict[str, Any], favicon_hash: Optional[str]
+        self, matcher: Dict[str, Any], favicon_hash: FaviconHashes
     ) -> bool:
         """Match favicon hash."""
-        if not favicon_hash:
+        favicons = _normalize_favicon_hashes(favicon_hash)
+        if not favicons:
             return False
 
-        hashes = matcher.get("hash", [])
+        hashes = {str(h).lower() for h in matcher.get("hash", [])}
         negative = matcher.get("negative", False)
-        matched = favicon_hash.lower() in [h.lower() for h in hashes]
+        matched = any(favicon in hashes for favicon in favicons)
 
         return not matched if negative else matched
 
@@ -168,3 +308,12 @@ class FingerprintEngine:
             version=metadata.get("version"),
             tags=info.get("tags"),
         )
+
+
+def _normalize_favicon_hashes(favicon_hash: FaviconHashes) -> List[str]:
+    """Return the lowercased favicon hashes of a response."""
+    if not favicon_hash:
+        return []
+    if isinstance(favicon_hash, str):
+        return [favicon_hash.lower()]
+    return [str(h).lower() for h in favicon_hash if h]
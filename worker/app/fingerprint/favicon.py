@@ -0,0 +1,64 @@
+"""Favicon hashing compatible with common fingerprint databases."""
+import base64
+import hashlib
+import re
+from typing import List
+from urllib.parse import urljoin
+
+_C1 = 0xCC9E2D51
+_C2 = 0x1B873593
+_MASK = 0xFFFFFFFF
+
+_FAVICON_LINK_RE = re.compile(
+    r'<link[^>]+rel=["\'](?:shortcut )?icon["\'][^>]+href=["\']([^"\']+)["\']',
+    re.I,
+)
+
+
+def _rotl32(value: int, count: int) -> int:
+    return ((value << count) | (value >> (32 - count))) & _MASK
+
+
+def mmh3_hash32(data: bytes, seed: int = 0) -> int:
+    """MurmurHash3 x86 32-bit, returned as a signed int like ``mmh3.hash``."""
+    length = len(data)
+    h = seed & _MASK
+    block_end = length - (length % 4)
+
+    for offset in range(0, block_end, 4):
+        k = int.from_bytes(data[offset : offset + 4], "little")
+        k = _rotl32((k * _C1) & _MASK, 15)
+        h ^= (k * _C2) & _MASK
+        h = (_rotl32(h, 13) * 5 + 0xE6546B64) & _MASK
+
+    tail = data[block_end:]
+    if tail:
+        k = int.from_bytes(tail, "little")
+        k = _rotl32((k * _C1) & _MASK, 15)
+        h ^= (k * _C2) & _MASK
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def favicon_mmh3(data: bytes) -> str:
+    """Shodan-style favicon hash: mmh3 of the newline-wrapped base64 body."""
+    return str(mmh3_hash32(base64.encodebytes(data)))
+
+
+def find_favicon_url(url: str, body: str) -> str:
+    """Return the favicon URL linked from a page, or the default /favicon.ico."""
+    match = _FAVICON_LINK_RE.search(body)
+    if match:
+        return urljoin(url, match.group(1))
+    return urljoin(url, "/favicon.ico")
+
+
+def favicon_hashes(data: bytes) -> List[str]:
+    """Return the md5 and mmh3 hashes a favicon can be matched by."""
+    return [hashlib.md5(data).hexdigest(), favicon_mmh3(data)]
@@ -1,9 +1,14 @@
 """Fingerprint loader module for loading FingerprintHub rules."""
+import hashlib
 import json
 import logging
 import os
+import pickle
+import tempfile
 from typing import Any, Dict, List, Optional
 
+from worker.app.fingerprint.engine import FingerprintEngine
+
 logger = logging.getLogger(__name__)
 
 # Default path for fingerprint database
@@ -18,9 +23,27 @@ LOCAL_FINGERPRINT_PATH = os.path.join(
     "../../../data/fingerprints/web_fingerprint_v4.json"
 )
 
+# Bump when the pickled engine layout changes to invalidate old cache files.
+CACHE_FORMAT_VERSION = 1
+
+# Directory for precompiled caches; defaults to the fingerprint file's directory.
+FINGERPRINT_CACHE_DIR = os.environ.get("EASM_FINGERPRINT_CACHE_DIR")
+
 _fingerprint_cache: Optional[List[Dict[str, Any]]] = None
 
 
+def resolve_fingerprint_path(path: Optional[str] = None) -> str:
+    """Return the fingerprint JSON path, preferring the local copy in development."""
+    fp_path = path or DEFAULT_FINGERPRINT_PATH
+
+    # Try local development path if default doesn't exist
+    if not os.path.exists(fp_path):
+        local_path = os.path.normpath(LOCAL_FINGERPRINT_PATH)
+        if os.path.exists(local_path):
+            fp_path = local_path
+    return fp_path
+
+
 def load_fingerprints(path: Optional[str] = None) -> List[Dict[str, Any]]:
     """Load fingerprints from JSON file.
 
@@ -35,14 +58,7 @@ def load_fingerprints(path: Optional[str] = None) -> List[Dict[str, Any]]:
     if _fingerprint_cache is not None:
         return _fingerprint_cache
 
-    fp_path = path or DEFAULT_FINGERPRINT_PATH
-
-    # Try local development path if default doesn't exist
-    if not os.path.exists(fp_path):
-        local_path = os.path.normpath(LOCAL_FINGERPRINT_PATH)
-        if os.path.exists(local_path):
-            fp_path = local_path
-
+    fp_path = resolve_fingerprint_path(path)
     if not os.path.exists(fp_path):
         logger.warning(f"Fingerprint database not found: {fp_path}")
         return []
@@ -63,3 +79,136 @@ def clear_cache() -> None:
     """Clear the fingerprint cache."""
     global _fingerprint_cache
     _fingerprint_cache = None
+
+
+def get_cache_path(source_path: str) -> str:
+    """Return the precompiled cache path for a fingerprint JSON file."""
+    cache_dir = FINGERPRINT_CACHE_DIR or os.path.dirname(os.path.abspath(source_path))
+    name = f"{os.path.basename(source_path)}.v{CACHE_FORMAT_VERSION}.cache"
+    return os.path.join(cache_dir, name)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_engine_cache(cache_path: str, source_path: str) -> Optional[FingerprintEngine]:
+    """Load a cached engine if it was built from the current source file."""
+    try:
+        with open(cache_path, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict) or header.get("version") != CACHE_FORMAT_VERSION:
+                return None
+
+            stat = os.stat(source_path)
+            unchanged = (
+                header.get("source_mtime_ns") == stat.st_mtime_ns
+                and header.get("source_size") == stat.st_size
+            )
+            # A touched but identical file (e.g. a fresh checkout) keeps the cache.
+            if not unchanged and header.get("source_sha256") != _file_sha256(source_path):
+                return None
+
+            engine = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable fingerprint cache {cache_path}: {e}")
+        return None
+
+    if not isinstance(engine, FingerprintEngine):
+        return None
+    logger.info(f"Loaded {len(engine.fingerprints)} precompiled fingerprints from {cache_path}")
+    return engine
+
+
+def _write_engine_cache(cache_path: str, source_path: str, engine: FingerprintEngine) -> bool:
+    """Atomically write the engine cache; return False if it cannot be written."""
+    stat = os.stat(source_path)
+    header = {
+        "version": CACHE_FORMAT_VERSION,
+        "source_path": os.path.abspath(source_path),
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "source_sha256": _file_sha256(source_path),
+    }
+
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(engine, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to write fingerprint cache {cache_path}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return False
+
+
+def build_fingerprint_cache(
+    path: Optional[str] = None, cache_path: Optional[str] = None
+) -> Optional[str]:
+    """Compile the fingerprint JSON into a binary cache; return its path."""
+    source_path = resolve_fingerprint_path(path)
+    if not os.path.exists(source_path):
+        logger.warning(f"Fingerprint database not found: {source_path}")
+        return None
+
+    with open(source_path, "r", encoding="utf-8") as f:
+        engine = FingerprintEngine(json.load(f))
+    cache_path = cache_path or get_cache_path(source_path)
+    return cache_path if _write_engine_cache(cache_path, source_path, engine) else None
+
+
+def load_engine(path: Optional[str] = None, use_cache: bool = True) -> FingerprintEngine:
+    """Load a compiled FingerprintEngine, using and refreshing the binary cache.
+
+    The cache is keyed by the source file's mtime, size and sha256 and is
+    rebuilt automatically when the JSON changes.
+    """
+    source_path = resolve_fingerprint_path(path)
+    if not os.path.exists(source_path):
+        logger.warning(f"Fingerprint database not found: {source_path}")
+        return FingerprintEngine([])
+
+    cache_path = get_cache_path(source_path)
+    if use_cache:
+        engine = _read_engine_cache(cache_path, source_path)
+        if engine is not None:
+            return engine
+
+    try:
+        with open(source_path, "r", encoding="utf-8") as f:
+            fingerprints = json.load(f)
+    except Exception as e:
+        logger.error(f"Failed to load fingerprints: {e}")
+        return FingerprintEngine([])
+
+    logger.info(f"Loaded {len(fingerprints)} fingerprints from {source_path}")
+    engine = FingerprintEngine(fingerprints)
+    if use_cache:
+        _write_engine_cache(cache_path, source_path, engine)
+    return engine
+
+
+def main() -> None:
+    """Build the precompiled fingerprint cache (run at image build or deploy)."""
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    cache_path = build_fingerprint_cache(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not cache_path:
+        raise SystemExit(1)
+    print(f"fingerprint cache written to {cache_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Process pool for CPU-bound fingerprint matching."""
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from worker.app.fingerprint.engine import FaviconHashes, FingerprintEngine, MatchResult
+from worker.app.fingerprint.loader import load_engine
+
+logger = logging.getLogger(__name__)
+
+# (body, headers, favicon hashes) of one response.
+MatchInput = Tuple[str, Dict[str, str], FaviconHashes]
+
+DEFAULT_MATCH_CHUNKSIZE = 16
+
+# Engine of a pool worker process, loaded once by the initializer.
+_worker_engine: Optional[FingerprintEngine] = None
+
+_pool: Optional["FingerprintMatchPool"] = None
+_pool_lock = threading.Lock()
+_warned_daemonic = False
+
+
+def _init_worker(path: Optional[str]) -> None:
+    global _worker_engine
+    _worker_engine = load_engine(path)
+
+
+def _match_chunk(items: Sequence[MatchInput]) -> List[List[MatchResult]]:
+    return [
+        _worker_engine.match(body=body, headers=headers, favicon_hash=favicons)
+        for body, headers, favicons in items
+    ]
+
+
+class FingerprintMatchPool:
+    """Persistent worker processes that each hold a loaded FingerprintEngine."""
+
+    def __init__(self, processes: int, path: Optional[str] = None):
+        self.processes = max(1, processes)
+        self.path = path
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_worker,
+            initargs=(path,),
+        )
+
+    def match_many(
+        self, items: Sequence[MatchInput], chunksize: int = DEFAULT_MATCH_CHUNKSIZE
+    ) -> List[List[MatchResult]]:
+        """Match responses in worker processes, preserving input order."""
+        chunksize = max(1, chunksize)
+        chunks = [items[i : i + chunksize] for i in range(0, len(items), chunksize)]
+        results: List[List[MatchResult]] = []
+        for chunk_results in self._executor.map(_match_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def can_use_process_pool() -> bool:
+    """Daemonic processes (Celery prefork children) cannot start a pool."""
+    return not multiprocessing.current_process().daemon
+
+
+def get_match_pool(processes: int, path: Optional[str] = None) -> Optional[FingerprintMatchPool]:
+    """
+    Return the shared match pool, creating it on first use.
+
+    The pool is sized once per worker process: it is never replaced while
+    other threads may be matching in it, so a later request for a
+    different size or engine path reuses it or matches inline.
+    """
+    global _pool, _warned_daemonic
+    if processes <= 0:
+        return None
+    if not can_use_process_pool():
+        if not _warned_daemonic:
+            _warned_daemonic = True
+            logger.warning(
+                "match_processes is ignored in a daemonic worker process; "
+                "run the worker with --pool threads or --pool solo to match in a process pool"
+            )
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = FingerprintMatchPool(processes, path=path)
+        pool = _pool
+    if pool.path != path:
+        return None
+    return pool
+
+
+@atexit.register
+def shutdown_match_pool() -> None:
+    """Stop the shared match pool."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _discard_match_pool(pool: FingerprintMatchPool) -> None:
+    """Drop a broken pool unless another thread already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    pool.shutdown()
+
+
+def match_responses(
+    engine: FingerprintEngine,
+    items: Sequence[MatchInput],
+    processes: int = 0,
+    chunksize: int = DEFAULT_MATCH_CHUNKSIZE,
+    path: Optional[str] = None,
+) -> List[List[MatchResult]]:
+    """
+    Match many responses, in a process pool when ``processes`` > 0.
+
+    Falls back to matching inline with ``engine`` when a pool cannot be
+    used (daemonic worker process), breaks, or was shut down meanwhile.
+    """
+    pool = get_match_pool(processes, path=path) if items else None
+    if pool is not None:
+        try:
+            return pool.match_many(items, chunksize=chunksize)
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Fingerprint match pool failed, matching inline: {e}")
+            _discard_match_pool(pool)
+        except RuntimeError as e:
+            # Shut down by another thread or at interpreter exit.
+            logger.warning(f"Fingerprint match pool unavailable, matching inline: {e}")
+
+    return [
+        engine.match(body=body, headers=headers, favicon_hash=favicons)
+        for body, headers, favicons in items
+    ]
@@ -1,13 +1,25 @@
 """Fingerprint identification tasks."""
-import hashlib
 import logging
+from dataclasses import dataclass, field
+from functools import partial
 from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from uuid import UUID
 
+from celery.signals import worker_init
+
 from shared.config import settings
 from worker.app.celery_app import celery_app
-from worker.app.fingerprint import FingerprintEngine, load_fingerprints
+from worker.app.fingerprint import FingerprintEngine, load_engine
+from worker.app.fingerprint.engine import MatchResult
+from worker.app.fingerprint.favicon import favicon_hashes, find_favicon_url
+from worker.app.fingerprint.pool import match_responses
 from worker.app.tasks.dag_callback import notify_dag_node_completion
+from worker.app.utils.http_client import conditional_headers, run_concurrently
+from worker.app.utils.response_store import (
+    ResponseSnapshotStore,
+    get_snapshot_max_age,
+    get_snapshot_store,
+)
 from worker.app.utils.scan_helpers import wait_for_project_rate_limit
 from worker.app.utils.tls import create_ssl_context
 
@@ -16,19 +28,30 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Returned by _fetch_response when the server answers 304 Not Modified.
+NOT_MODIFIED = object()
+
 # Global engine instance (lazy loaded)
 _engine: Optional[FingerprintEngine] = None
 
 
 def get_engine() -> FingerprintEngine:
-    """Get or create the fingerprint engine."""
+    """Get or create the fingerprint engine from the precompiled cache."""
     global _engine
     if _engine is None:
-        fingerprints = load_fingerprints()
-        _engine = FingerprintEngine(fingerprints)
+        _engine = load_engine()
     return _engine
 
 
+@worker_init.connect
+def _preload_engine(**kwargs) -> None:
+    """Load the engine in the parent so prefork children share its pages."""
+    try:
+        get_engine()
+    except Exception:
+        logger.exception("Failed to preload fingerprint engine")
+
+
 @celery_app.task(bind=True, name="worker.app.tasks.fingerprint.run_fingerprint")
 def run_fingerprint(self, task_id: str):
     """Run fingerprint identification for web assets."""
@@ -74,55 +97,150 @@ def run_fingerprint(self, task_id: str):
 
 def _run_fingerprint(db, task) -> Dict[str, Any]:
     """Identify fingerprints for web assets."""
-    from server.app.crud.web_asset import list_web_assets, upsert_web_asset
+    from server.app.crud.web_asset import (
+        iter_web_asset_batches,
+        touch_web_assets,
+        update_web_asset_fingerprints,
+    )
 
     config = task.config or {}
     batch_size = config.get("batch_size", 500)
     use_engine = config.get("use_fingerprinthub", True)
     verify_tls = settings.scan_verify_tls and not bool(config.get("insecure", False))
+    snapshot_max_age = get_snapshot_max_age(config)
+    store = get_snapshot_store(config) if use_engine and snapshot_max_age > 0 else None
+
+    fetch_concurrency = max(1, int(config.get("fetch_concurrency", 16)))
+    # Worker processes for engine matching; 0 matches inline in this process.
+    # Only takes effect on a worker started with --pool threads or --pool solo:
+    # the default prefork children are daemonic and always match inline.
+    match_processes = int(config.get("match_processes", 0))
 
-    assets = list_web_assets(db, task.project_id, is_alive=True, limit=batch_size)
+    scanned_count = 0
     identified_count = 0
+    not_modified_count = 0
 
     engine = get_engine() if use_engine else None
 
-    for asset in assets:
-        fingerprints = _identify_fingerprints_for_asset(asset, engine, verify_tls=verify_tls)
-        if fingerprints:
-            upsert_web_asset(
-                db=db,
-                project_id=task.project_id,
-                url=asset.url,
-                fingerprints=fingerprints,
+    for assets in iter_web_asset_batches(
+        db, task.project_id, is_alive=True, batch_size=batch_size
+    ):
+        scanned_count += len(assets)
+        engine_results = {}
+        if engine:
+            engine_results = _match_assets(
+                assets,
+                engine,
+                verify_tls=verify_tls,
+                store=store,
+                snapshot_max_age=snapshot_max_age,
+                fetch_concurrency=fetch_concurrency,
+                match_processes=match_processes,
             )
-            identified_count += 1
 
-    return {"assets_scanned": len(assets), "identified": identified_count}
+        unchanged_ids = []
+        updates = []
+        for asset in assets:
+            page = engine_results.get(asset.url)
+            if page is not None and page.not_modified:
+                # Unchanged since the stored fingerprints were computed.
+                unchanged_ids.append(asset.id)
+                if asset.fingerprints:
+                    identified_count += 1
+                continue
+
+            # Always run basic fingerprinting
+            fingerprints = _identify_fingerprints_basic(asset)
+            for r in page.results if page is not None else []:
+                if r.name and r.name not in fingerprints:
+                    fingerprints.append(r.name)
+            if fingerprints:
+                # A failed fetch has no headers, so the stored validators stay.
+                headers = page.headers if page is not None else None
+                updates.append({"id": asset.id, "fingerprints": fingerprints, "headers": headers})
+                identified_count += 1
+
+        if updates:
+            update_web_asset_fingerprints(db, updates)
+
+        if unchanged_ids:
+            touch_web_assets(db, unchanged_ids)
+            not_modified_count += len(unchanged_ids)
+
+    return {
+        "assets_scanned": scanned_count,
+        "identified": identified_count,
+        "not_modified": not_modified_count,
+    }
 
 
-def _identify_fingerprints_for_asset(
-    asset: "WebAsset",
-    engine: Optional[FingerprintEngine],
+@dataclass
+class PageMatch:
+    """Engine matches for one page, with the response headers they came from."""
+
+    results: List[MatchResult] = field(default_factory=list)
+    headers: Dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+
+
+def _match_assets(
+    assets: List["WebAsset"],
+    engine: FingerprintEngine,
     verify_tls: bool = True,
-) -> List[str]:
-    """Identify fingerprints for a single asset."""
-    fingerprints = []
+    store: Optional[ResponseSnapshotStore] = None,
+    snapshot_max_age: Optional[float] = None,
+    fetch_concurrency: int = 16,
+    match_processes: int = 0,
+) -> Dict[str, PageMatch]:
+    """Fetch responses for a page of assets concurrently, then match them in one batch."""
+    fetch = partial(
+        _fetch_asset_response,
+        verify_tls=verify_tls,
+        store=store,
+        snapshot_max_age=snapshot_max_age,
+    )
+    pages: Dict[str, PageMatch] = {}
+    urls = []
+    items = []
+    for asset, response in run_concurrently(fetch, assets, fetch_concurrency):
+        if response is NOT_MODIFIED:
+            pages[asset.url] = PageMatch(not_modified=True)
+        elif response is not None:
+            urls.append(asset.url)
+            items.append(response)
 
-    # Always run basic fingerprinting
-    fingerprints.extend(_identify_fingerprints_basic(asset))
+    try:
+        results = match_responses(engine, items, processes=match_processes)
+    except Exception as e:
+        logger.warning(f"Engine matching failed: {e}")
+        return pages
+    for url, (_, headers, _), matched in zip(urls, items, results):
+        pages[url] = PageMatch(results=matched, headers=headers)
+    return pages
 
-    # Use FingerprintHub engine if available
-    if engine:
-        try:
-            body, headers, favicon_hash = _fetch_response(asset.url, verify_tls=verify_tls)
-            results = engine.match(body=body, headers=headers, favicon_hash=favicon_hash)
-            for r in results:
-                if r.name and r.name not in fingerprints:
-                    fingerprints.append(r.name)
-        except Exception as e:
-            logger.debug(f"Engine matching failed for {asset.url}: {e}")
 
-    return fingerprints
+def _fetch_asset_response(
+    asset: "WebAsset",
+    verify_tls: bool = True,
+    store: Optional[ResponseSnapshotStore] = None,
+    snapshot_max_age: Optional[float] = None,
+) -> Optional[tuple]:
+    try:
+        return _fetch_response(
+            asset.url,
+            verify_tls=verify_tls,
+            store=store,
+            snapshot_max_age=snapshot_max_age,
+            response_hash=getattr(asset, "response_hash", None),
+            # Headers are only stored alongside fingerprints, so a 304 means
+            # the stored fingerprints still describe the page.
+            validators=(
+                getattr(asset, "headers", None) if getattr(asset, "fingerprints", None) else None
+            ),
+        )
+    except Exception as e:
+        logger.debug(f"Engine fetch failed for {asset.url}: {e}")
+        return None
 
 
 def _identify_fingerprints(asset) -> List[str]:
@@ -176,50 +294,74 @@ def _check_title_fingerprints(title: str, fingerprints: List[str]) -> None:
             fingerprints.append(name)
 
 
-def _fetch_response(url: str, verify_tls: bool = True) -> tuple:
-    """Fetch URL and return body, headers, and favicon hash."""
+def _fetch_response(
+    url: str,
+    verify_tls: bool = True,
+    store: Optional[ResponseSnapshotStore] = None,
+    snapshot_max_age: Optional[float] = None,
+    response_hash: Optional[str] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> tuple:
+    """Fetch URL and return body, headers, and favicon hashes.
+
+    A fresh http_probe snapshot is used instead of fetching when available.
+    With stored ``validators`` the request is conditional, and NOT_MODIFIED
+    is returned if the server answers 304.
+    """
+    import urllib.error
     import urllib.request
 
     body = ""
     headers = {}
-    favicon_hash = None
+    favicons = None
+
+    if store is not None:
+        snapshot = store.get(url, max_age=snapshot_max_age, response_hash=response_hash)
+        if snapshot is not None:
+            return _response_from_snapshot(url, snapshot, verify_tls=verify_tls)
 
     try:
         ctx = create_ssl_context(verify_tls=verify_tls)
 
         req = urllib.request.Request(
-            url, headers={"User-Agent": "EASM-Scanner/1.0"}
+            url,
+            headers={"User-Agent": "EASM-Scanner/1.0", **conditional_headers(validators)},
         )
         with urllib.request.urlopen(req, timeout=10, context=ctx) as resp:
             body = resp.read(65536).decode("utf-8", errors="ignore")
             headers = dict(resp.headers)
 
             # Try to fetch favicon
-            favicon_hash = _fetch_favicon_hash(url, body, ctx)
+            favicons = _fetch_favicon_hashes(url, body, ctx)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return NOT_MODIFIED
+        logger.debug(f"Failed to fetch {url}: {e}")
     except Exception as e:
         logger.debug(f"Failed to fetch {url}: {e}")
 
-    return body, headers, favicon_hash
+    return body, headers, favicons
 
 
-def _fetch_favicon_hash(url: str, body: str, ctx) -> Optional[str]:
-    """Extract and hash favicon from page."""
-    import re
-    import urllib.request
-    from urllib.parse import urljoin
-
-    # Try to find favicon link in HTML
-    favicon_url = None
-    match = re.search(
-        r'<link[^>]+rel=["\'](?:shortcut )?icon["\'][^>]+href=["\']([^"\']+)["\']',
-        body,
-        re.I,
-    )
-    if match:
-        favicon_url = urljoin(url, match.group(1))
+def _response_from_snapshot(url: str, snapshot, verify_tls: bool = True) -> tuple:
+    """Build the _fetch_response tuple from a stored probe response."""
+    # urlopen raises on error statuses, so a live fetch would match nothing.
+    if snapshot.status >= 400:
+        return "", {}, None
+
+    body = snapshot.text(max_size=65536)
+    if snapshot.favicon_fetched:
+        favicons = favicon_hashes(snapshot.favicon) if snapshot.favicon else None
     else:
-        # Default favicon path
-        favicon_url = urljoin(url, "/favicon.ico")
+        favicons = _fetch_favicon_hashes(url, body, create_ssl_context(verify_tls=verify_tls))
+    return body, dict(snapshot.headers), favicons
+
+
+def _fetch_favicon_hashes(url: str, body: str, ctx) -> Optional[List[str]]:
+    """Extract favicon from page and return its md5 and mmh3 hashes."""
+    import urllib.request
+
+    favicon_url = find_favicon_url(url, body)
 
     try:
         req = urllib.request.Request(
@@ -228,7 +370,7 @@ def _fetch_favicon_hash(url: str, body: str, ctx) -> Optional[str]:
         with urllib.request.urlopen(req, timeout=5, context=ctx) as resp:
             favicon_data = resp.read(32768)
             if favicon_data:
-                return hashlib.md5(favicon_data).hexdigest()
+                return favicon_hashes(favicon_data)
     except Exception:
         pass
 
@@ -1,13 +1,15 @@
 """HTTP probe and web asset discovery tasks."""
 import logging
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 from shared.config import settings
 from worker.app.celery_app import celery_app
 from worker.app.tasks.dag_callback import notify_dag_node_completion
+from worker.app.utils.http_client import HTTPClientPool, HTTPResponse, run_concurrently
+from worker.app.utils.response_store import ResponseSnapshotStore, get_snapshot_store
 from worker.app.utils.scan_helpers import wait_for_project_rate_limit
-from worker.app.utils.tls import create_ssl_context
 
 logger = logging.getLogger(__name__)
 
@@ -57,56 +59,98 @@ def run_http_probe(self, task_id: str):
 
 def _run_http_probe(db, task) -> Dict[str, Any]:
     """Probe HTTP services for open ports."""
-    from server.app.crud.ip_address import list_ip_addresses
+    import shutil
+
+    from server.app.crud.ip_address import iter_ip_address_batches
     from server.app.crud.port import list_ports_by_ip
-    from server.app.crud.web_asset import upsert_web_asset
+    from server.app.crud.web_asset import bulk_upsert_web_assets
 
     config = task.config or {}
     batch_size = config.get("batch_size", 500)
     verify_tls = settings.scan_verify_tls and not bool(config.get("insecure", False))
+    concurrency = max(1, int(config.get("probe_concurrency", 50)))
+    timeout = float(config.get("probe_timeout", 10))
+    flush_size = max(1, int(config.get("probe_flush_size", 200)))
+    # Responses are kept for fingerprint, JS discovery and screenshot stages.
+    store = get_snapshot_store(config)
+
+    # With the httpx CLI, each page of targets is probed by one httpx process;
+    # otherwise every probe in this run shares one keep-alive pool.
+    use_httpx = bool(shutil.which("httpx"))
+    client = None
+    if not use_httpx:
+        client = HTTPClientPool(
+            verify_tls=verify_tls,
+            timeout=timeout,
+            max_per_host=int(config.get("probe_per_host", 4)),
+        )
 
-    ips = list_ip_addresses(db, task.project_id, limit=batch_size)
     probed_count = 0
     alive_count = 0
+    pending = []
+
+    def flush() -> None:
+        if pending:
+            bulk_upsert_web_assets(db, task.project_id, pending)
+            pending.clear()
 
-    for ip_obj in ips:
-        ports = list_ports_by_ip(db, ip_obj.id, limit=100)
-        http_ports = [
-            p for p in ports
-            if p.port in (80, 443, 8080, 8443) or p.service in ("http", "https")
-        ]
-
-        for port in http_ports:
-            scheme = "https" if port.port in (443, 8443) else "http"
-            url = f"{scheme}://{ip_obj.ip}:{port.port}"
-
-            result = _probe_url(url, verify_tls=verify_tls)
-            if result:
-                upsert_web_asset(
-                    db=db,
-                    project_id=task.project_id,
-                    url=url,
-                    ip_id=ip_obj.id,
-                    port_id=port.id,
-                    **result,
+    try:
+        for ips in iter_ip_address_batches(db, task.project_id, batch_size=batch_size):
+            targets = {}
+            for ip_obj in ips:
+                ports = list_ports_by_ip(db, ip_obj.id, limit=100)
+                for port in ports:
+                    if port.port in (80, 443, 8080, 8443) or port.service in ("http", "https"):
+                        scheme = "https" if port.port in (443, 8443) else "http"
+                        targets[f"{scheme}://{ip_obj.ip}:{port.port}"] = (ip_obj.id, port.id)
+
+            if use_httpx:
+                results = _probe_batch_with_httpx(
+                    list(targets),
+                    verify_tls=verify_tls,
+                    threads=concurrency,
+                    timeout=timeout,
+                    batch_timeout=float(config.get("httpx_batch_timeout", 1800)),
+                    store=store,
                 )
+            else:
+                probe = partial(_probe_url, verify_tls=verify_tls, client=client, store=store)
+                results = run_concurrently(probe, list(targets), concurrency)
+
+            for url, result in results:
+                ip_id, port_id = targets[url]
+                pending.append({"url": url, "ip_id": ip_id, "port_id": port_id, **result})
                 if result.get("is_alive"):
                     alive_count += 1
-            probed_count += 1
+                probed_count += 1
+                if len(pending) >= flush_size:
+                    flush()
+            flush()
+    finally:
+        if client:
+            client.close()
 
     return {"urls_probed": probed_count, "alive": alive_count}
 
 
-def _probe_url(url: str, verify_tls: bool = True) -> Dict[str, Any]:
-    """Probe a single URL using httpx or requests."""
+def _probe_url(
+    url: str,
+    verify_tls: bool = True,
+    client: Optional[HTTPClientPool] = None,
+    store: Optional[ResponseSnapshotStore] = None,
+) -> Dict[str, Any]:
+    """Probe a single URL using httpx or the pooled HTTP client."""
     import shutil
 
     # Try httpx CLI first
-    if shutil.which("httpx"):
+    if client is None and shutil.which("httpx"):
         return _probe_with_httpx(url, verify_tls=verify_tls)
 
-    # Fallback to Python requests
-    return _probe_with_requests(url, verify_tls=verify_tls)
+    # Fallback to the Python client
+    if client is None:
+        with HTTPClientPool(verify_tls=verify_tls) as one_shot:
+            return _probe_with_requests(url, one_shot, store=store)
+    return _probe_with_requests(url, client, store=store)
 
 
 def _probe_with_httpx(url: str, verify_tls: bool = True) -> Dict[str, Any]:
@@ -127,43 +171,199 @@ def _probe_with_httpx(url: str, verify_tls: bool = True) -> Dict[str, Any]:
         )
         if result.returncode == 0 and result.stdout.strip():
             data = json.loads(result.stdout.strip())
-            return {
-                "title": data.get("title"),
-                "status_code": data.get("status_code"),
-                "content_length": data.get("content_length"),
-                "content_type": data.get("content_type"),
-                "server": data.get("webserver"),
-                "technologies": data.get("tech", []),
-                "is_alive": True,
-            }
+            return _httpx_result(data)
     except Exception as e:
         logger.warning(f"httpx probe failed for {url}: {e}")
 
     return {"is_alive": False}
 
 
-def _probe_with_requests(url: str, verify_tls: bool = True) -> Dict[str, Any]:
-    """Probe URL using Python urllib."""
+def _httpx_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map one httpx JSON line to web asset fields."""
+    return {
+        "title": data.get("title"),
+        "status_code": data.get("status_code"),
+        "content_length": data.get("content_length"),
+        "content_type": data.get("content_type"),
+        "server": data.get("webserver"),
+        "technologies": data.get("tech", []),
+        "is_alive": True,
+    }
+
+
+def _probe_batch_with_httpx(
+    urls: List[str],
+    verify_tls: bool = True,
+    threads: int = 50,
+    timeout: float = 10,
+    batch_timeout: float = 1800,
+    store: Optional[ResponseSnapshotStore] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Probe many URLs with a single ``httpx -l`` run, yielding (url, result).
+
+    JSON lines are streamed as httpx emits them and mapped back to the input
+    URL. URLs without an output line are reported as not alive once the
+    process exits or the batch timeout kills it. With a snapshot store,
+    httpx also returns raw responses and they are saved for later stages.
+    """
+    import json
+    import os
+    import subprocess
+    import tempfile
+    import threading
+
+    if not urls:
+        return
+
+    pending = set(urls)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(urls))
+        list_file = f.name
+
+    command = [
+        "httpx",
+        "-l",
+        list_file,
+        "-json",
+        "-silent",
+        "-threads",
+        str(threads),
+        "-timeout",
+        str(int(timeout)),
+    ]
+    if not verify_tls:
+        command.append("-insecure")
+    if store is not None:
+        command.append("-irr")
+
+    try:
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+        except OSError as e:
+            logger.warning(f"httpx batch probe failed to start: {e}")
+            process = None
+
+        if process is not None:
+            watchdog = threading.Timer(batch_timeout, process.kill)
+            watchdog.start()
+            try:
+                for line in process.stdout:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    url = _match_httpx_input(data, pending)
+                    if url is None:
+                        continue
+                    pending.discard(url)
+                    result = _httpx_result(data)
+                    if store is not None and "body" in data:
+                        result["response_hash"] = store.save(
+                            url,
+                            data.get("status_code") or 0,
+                            _parse_raw_headers(data.get("raw_header", "")),
+                            str(data["body"]).encode("utf-8"),
+                        )
+                    yield url, result
+                process.wait()
+            finally:
+                watchdog.cancel()
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+    finally:
+        os.unlink(list_file)
+
+    for url in urls:
+        if url in pending:
+            yield url, {"is_alive": False}
+
+
+def _parse_raw_headers(raw: str) -> Dict[str, str]:
+    """Parse an httpx ``raw_header`` block into a header dict."""
+    headers = {}
+    for line in raw.splitlines()[1:]:
+        name, sep, value = line.partition(":")
+        if sep and name.strip():
+            headers[name.strip()] = value.strip()
+    return headers
+
+
+def _match_httpx_input(data: Dict[str, Any], pending: set) -> Optional[str]:
+    """Find the input URL an httpx JSON line belongs to."""
+    for key in ("input", "url"):
+        value = data.get(key)
+        if not value:
+            continue
+        for candidate in (value, value.rstrip("/")):
+            if candidate in pending:
+                return candidate
+    return None
+
+
+def _probe_with_requests(
+    url: str, client: HTTPClientPool, store: Optional[ResponseSnapshotStore] = None
+) -> Dict[str, Any]:
+    """Probe URL using the pooled keep-alive HTTP client."""
     import re
-    import urllib.request
 
     try:
-        ctx = create_ssl_context(verify_tls=verify_tls)
-
-        req = urllib.request.Request(url, headers={"User-Agent": "EASM-Scanner/1.0"})
-        with urllib.request.urlopen(req, timeout=10, context=ctx) as resp:
-            body = resp.read(8192).decode("utf-8", errors="ignore")
-            title_match = re.search(r"<title>([^<]+)</title>", body, re.I)
-
-            return {
-                "title": title_match.group(1).strip() if title_match else None,
-                "status_code": resp.status,
-                "content_length": int(resp.headers.get("Content-Length", 0)),
-                "content_type": resp.headers.get("Content-Type"),
-                "server": resp.headers.get("Server"),
-                "is_alive": True,
-            }
+        resp = client.request(url, max_body=store.max_body if store else 8192)
+        body = resp.body[:8192].decode("utf-8", errors="ignore")
+        title_match = re.search(r"<title>([^<]+)</title>", body, re.I)
+        headers = {k.lower(): v for k, v in resp.headers.items()}
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+
+        result = {
+            "title": title_match.group(1).strip() if title_match else None,
+            "status_code": resp.status,
+            "content_length": content_length,
+            "content_type": headers.get("content-type"),
+            "server": headers.get("server"),
+            "is_alive": True,
+        }
     except Exception as e:
         logger.debug(f"Request probe failed for {url}: {e}")
+        return {"is_alive": False}
 
-    return {"is_alive": False}
+    if store is not None:
+        result["response_hash"] = _save_snapshot(url, resp, client, store)
+    return result
+
+
+def _save_snapshot(
+    url: str, resp: HTTPResponse, client: HTTPClientPool, store: ResponseSnapshotStore
+) -> str:
+    """Fetch the favicon and store the probed response for later stages."""
+    from worker.app.fingerprint.favicon import find_favicon_url
+
+    favicon = None
+    try:
+        icon = client.request(find_favicon_url(url, resp.text()), max_body=32768)
+        if icon.status < 400 and icon.body:
+            favicon = icon.body
+    except Exception as e:
+        logger.debug(f"Favicon fetch failed for {url}: {e}")
+
+    return store.save(
+        url,
+        resp.status,
+        resp.headers,
+        resp.body,
+        truncated=resp.truncated,
+        favicon=favicon,
+        favicon_fetched=True,
+    )
@@ -1,24 +1,59 @@
 """JS and API deep discovery tasks."""
 
+import codecs
 import hashlib
+import itertools
 import logging
-from typing import Any, Dict, Optional
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional
 from urllib.parse import urlparse
 from uuid import UUID
 
 from shared.config import settings
 from worker.app.celery_app import celery_app
 from worker.app.tasks.dag_callback import notify_dag_node_completion
+from worker.app.utils.http_client import (
+    HTTPClientPool,
+    HTTPResponse,
+    conditional_headers,
+    response_validators,
+)
+from worker.app.utils.js_analysis_cache import JSAnalysisCache, get_js_analysis_cache
 from worker.app.utils.js_api_parser import (
+    ChunkedEndpointScanner,
     classify_endpoint_risks,
-    extract_endpoints_from_js,
     extract_scripts_from_html,
 )
+from worker.app.utils.response_store import (
+    ResponseSnapshotStore,
+    get_snapshot_max_age,
+    get_snapshot_store,
+)
 from worker.app.utils.scan_helpers import wait_for_project_rate_limit
-from worker.app.utils.tls import create_ssl_context
 
 logger = logging.getLogger(__name__)
 
+JS_ANALYZER_USER_AGENT = "EASM-JS-Analyzer/1.0"
+DEFAULT_MAX_STREAM_SIZE = 32 * 1024 * 1024
+# Characters read back from a spooled bundle per scanner feed.
+SCAN_CHUNK_CHARS = 65536
+
+
+@dataclass
+class ScriptAnalysis:
+    """Endpoints extracted from one script, or a not-modified revalidation."""
+
+    content_hash: str = ""
+    content_length: int = 0
+    endpoints: list[dict] = field(default_factory=list)
+    # ETag/Last-Modified of the fetched script, stored for the next revalidation.
+    validators: dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+
 
 @celery_app.task(bind=True, name="worker.app.tasks.js_api_discovery.run_js_api_discovery")
 def run_js_api_discovery(self, task_id: str):
@@ -66,108 +101,374 @@ def run_js_api_discovery(self, task_id: str):
 def _run_js_api_discovery(db, task) -> Dict[str, Any]:
     """Discover JS assets, endpoints and API risks from project web assets."""
     from server.app.crud import api_endpoint as crud_api_endpoint
-    from server.app.crud import api_risk_finding as crud_api_risk
     from server.app.crud import js_asset as crud_js_asset
-    from server.app.crud.web_asset import list_web_assets
+    from server.app.crud.web_asset import iter_web_asset_batches
 
     config = task.config or {}
     batch_size = int(config.get("batch_size", 100))
     max_scripts_per_page = int(config.get("max_scripts_per_page", 20))
     max_script_size = int(config.get("max_script_size", 512000))
+    max_stream_size = int(config.get("max_stream_size", DEFAULT_MAX_STREAM_SIZE))
     verify_tls = settings.scan_verify_tls and not bool(config.get("insecure", False))
+    snapshot_max_age = get_snapshot_max_age(config)
+    store = get_snapshot_store(config) if snapshot_max_age > 0 else None
+    fetch_concurrency = max(1, int(config.get("fetch_concurrency", 16)))
 
-    assets = list_web_assets(db, task.project_id, is_alive=True, limit=batch_size)
+    analysis_cache = get_js_analysis_cache(config)
+    client = HTTPClientPool(
+        verify_tls=verify_tls,
+        timeout=float(config.get("fetch_timeout", 15)),
+        max_per_host=int(config.get("fetch_per_host", 4)),
+        user_agent=JS_ANALYZER_USER_AGENT,
+    )
+    load_page = partial(
+        _load_page_html,
+        verify_tls=verify_tls,
+        store=store,
+        snapshot_max_age=snapshot_max_age,
+        client=client,
+        max_size=max_script_size,
+    )
+    fetch_script = partial(
+        _fetch_and_analyze_script,
+        verify_tls=verify_tls,
+        analysis_cache=analysis_cache,
+        client=client,
+        max_size=max_script_size,
+        max_stream_size=max_stream_size,
+    )
+    # Script URL -> future of its analysis; shared bundles are fetched once per run.
+    script_futures: dict[str, Future] = {}
+    # Script URL -> (id, content_hash) of its stored JS asset, for 304 responses.
+    known_scripts: dict[str, tuple[UUID, str]] = {}
+    not_modified_ids: set[UUID] = set()
+
+    pages_scanned = 0
     script_keys: set[tuple[str, str]] = set()
     endpoint_keys: set[tuple[str, str]] = set()
     risk_keys: set[tuple[str, str]] = set()
 
-    for asset in assets:
-        html = _fetch_text(asset.url, verify_tls=verify_tls, max_size=max_script_size)
-        if not html:
-            continue
-
-        scripts = extract_scripts_from_html(html, asset.url)
-        for script in scripts[:max_scripts_per_page]:
-            script_content = script.get("content")
-            if script.get("script_type") == "external":
-                script_content = _fetch_text(
-                    script["script_url"],
-                    verify_tls=verify_tls,
-                    max_size=max_script_size,
-                )
-            if not script_content:
-                continue
-
-            content_hash = hashlib.sha256(script_content.encode("utf-8")).hexdigest()
-            js_asset = crud_js_asset.upsert_js_asset(
-                db=db,
-                project_id=task.project_id,
-                web_asset_id=asset.id,
-                script_url=script["script_url"],
-                script_type=script["script_type"],
-                content_hash=content_hash,
-                source_url=asset.url,
-                scan_metadata={"content_length": len(script_content)},
-            )
-            script_keys.add((script["script_url"], content_hash))
-
-            endpoints = extract_endpoints_from_js(script_content)
-            for endpoint_result in endpoints:
-                method = endpoint_result["method"]
-                endpoint = endpoint_result["endpoint"]
-                endpoint_record = crud_api_endpoint.upsert_api_endpoint(
-                    db=db,
-                    project_id=task.project_id,
-                    js_asset_id=js_asset.id,
-                    endpoint=endpoint,
-                    method=method,
-                    host=_extract_host(endpoint),
-                    evidence={
-                        "script_url": script["script_url"],
-                        "source_url": asset.url,
-                        "snippet": endpoint_result.get("evidence"),
-                    },
+    # Worker threads fetch pages and scripts (and parse them); this thread
+    # consumes finished pages in completion order and owns the DB session.
+    # Scripts get their own pool so they never queue behind pending page loads.
+    page_executor = ThreadPoolExecutor(max_workers=fetch_concurrency)
+    script_executor = ThreadPoolExecutor(max_workers=fetch_concurrency)
+    with client, page_executor, script_executor:
+        for assets in iter_web_asset_batches(
+            db, task.project_id, is_alive=True, batch_size=batch_size
+        ):
+            pages_scanned += len(assets)
+            page_futures = {page_executor.submit(load_page, asset): asset for asset in assets}
+            for page_future in as_completed(page_futures):
+                asset = page_futures[page_future]
+                html = page_future.result()
+                if not html:
+                    continue
+
+                scripts = extract_scripts_from_html(html, asset.url)[:max_scripts_per_page]
+                new_urls = list(
+                    dict.fromkeys(
+                        script["script_url"]
+                        for script in scripts
+                        if script.get("script_type") == "external"
+                        and script["script_url"] not in script_futures
+                    )
                 )
-                endpoint_keys.add((method, endpoint))
-
-                for risk in classify_endpoint_risks(endpoint, method):
-                    crud_api_risk.create_or_update_api_risk_finding(
-                        db=db,
-                        project_id=task.project_id,
-                        endpoint_id=endpoint_record.id,
-                        rule_name=risk["rule_name"],
-                        severity=risk["severity"],
-                        title=risk["title"],
-                        description=risk["description"],
-                        evidence={
-                            "endpoint": endpoint,
-                            "method": method,
-                            "script_url": script["script_url"],
-                            "risk_tags": risk.get("risk_tags", []),
-                        },
+                previous = crud_js_asset.get_latest_js_assets(db, task.project_id, new_urls)
+                for script_url in new_urls:
+                    validators = None
+                    known = previous.get(script_url)
+                    if known is not None:
+                        known_scripts[script_url] = (known.id, known.content_hash)
+                        validators = (known.scan_metadata or {}).get("validators")
+                    script_futures[script_url] = script_executor.submit(
+                        fetch_script, script_url, validators=validators
                     )
-                    risk_keys.add((str(endpoint_record.id), risk["rule_name"]))
+
+                for script in scripts:
+                    script_url = script["script_url"]
+                    if script.get("script_type") == "external":
+                        analysis = script_futures[script_url].result()
+                    else:
+                        analysis = _analyze_script(analysis_cache, script.get("content"))
+                    if analysis is None:
+                        continue
+
+                    if analysis.not_modified:
+                        js_asset_id, content_hash = known_scripts[script_url]
+                        not_modified_ids.add(js_asset_id)
+                        script_keys.add((script_url, content_hash))
+                        # The unchanged script still contributes its endpoints.
+                        cached = analysis_cache.get(content_hash) or []
+                        endpoint_keys.update((e["method"], e["endpoint"]) for e in cached)
+                        continue
+
+                    _persist_script(db, task.project_id, asset, script, analysis, risk_keys)
+                    script_keys.add((script_url, analysis.content_hash))
+                    endpoint_keys.update((e["method"], e["endpoint"]) for e in analysis.endpoints)
+
+    # Unchanged scripts are only marked as seen, along with their endpoints.
+    if not_modified_ids:
+        crud_js_asset.touch_js_assets(db, list(not_modified_ids), commit=False)
+        endpoint_keys.update(
+            crud_api_endpoint.touch_api_endpoints(db, list(not_modified_ids), commit=False)
+        )
+        db.commit()
 
     return {
-        "pages_scanned": len(assets),
+        "pages_scanned": pages_scanned,
         "scripts_discovered": len(script_keys),
         "api_endpoints_discovered": len(endpoint_keys),
         "api_risks_flagged": len(risk_keys),
+        "scripts_not_modified": len(not_modified_ids),
     }
 
 
-def _fetch_text(url: str, verify_tls: bool, max_size: int = 512000) -> Optional[str]:
-    """Fetch text response from URL with size guard."""
-    import urllib.request
+def _persist_script(
+    db,
+    project_id: UUID,
+    asset,
+    script: dict,
+    analysis: ScriptAnalysis,
+    risk_keys: set[tuple[str, str]],
+) -> None:
+    """Store a script, its endpoints and their risk findings in one transaction."""
+    from server.app.crud import api_endpoint as crud_api_endpoint
+    from server.app.crud import api_risk_finding as crud_api_risk
+    from server.app.crud import js_asset as crud_js_asset
+
+    script_url = script["script_url"]
+    js_asset = crud_js_asset.upsert_js_asset(
+        db=db,
+        project_id=project_id,
+        web_asset_id=asset.id,
+        script_url=script_url,
+        script_type=script["script_type"],
+        content_hash=analysis.content_hash,
+        source_url=asset.url,
+        scan_metadata={
+            "content_length": analysis.content_length,
+            "validators": analysis.validators,
+        },
+        commit=False,
+    )
+    endpoint_ids = crud_api_endpoint.bulk_upsert_api_endpoints(
+        db,
+        project_id,
+        [
+            {
+                "endpoint": item["endpoint"],
+                "method": item["method"],
+                "host": _extract_host(item["endpoint"]),
+                "evidence": {
+                    "script_url": script_url,
+                    "source_url": asset.url,
+                    "snippet": item.get("evidence"),
+                },
+            }
+            for item in analysis.endpoints
+        ],
+        js_asset_id=js_asset.id,
+        commit=False,
+    )
+
+    findings = []
+    for (method, endpoint), endpoint_id in endpoint_ids.items():
+        for risk in classify_endpoint_risks(endpoint, method):
+            findings.append(
+                {
+                    "endpoint_id": endpoint_id,
+                    "rule_name": risk["rule_name"],
+                    "severity": risk["severity"],
+                    "title": risk["title"],
+                    "description": risk["description"],
+                    "evidence": {
+                        "endpoint": endpoint,
+                        "method": method,
+                        "script_url": script_url,
+                        "risk_tags": risk.get("risk_tags", []),
+                    },
+                }
+            )
+            risk_keys.add((str(endpoint_id), risk["rule_name"]))
+    if findings:
+        crud_api_risk.bulk_upsert_api_risk_findings(db, project_id, findings, commit=False)
+    db.commit()
+
+
+def _load_page_html(
+    asset,
+    verify_tls: bool,
+    store: Optional[ResponseSnapshotStore],
+    snapshot_max_age: Optional[float],
+    client: HTTPClientPool,
+    max_size: int,
+) -> Optional[str]:
+    """Return page HTML from a fresh probe snapshot or by fetching it."""
+    snapshot = None
+    if store is not None:
+        snapshot = store.get(
+            asset.url,
+            max_age=snapshot_max_age,
+            response_hash=getattr(asset, "response_hash", None),
+        )
+    # Truncated snapshots shorter than the page limit are refetched.
+    if snapshot is not None and (not snapshot.truncated or len(snapshot.body) >= max_size):
+        return snapshot.text(max_size=max_size) if snapshot.status < 400 else None
+    return _fetch_text(asset.url, verify_tls=verify_tls, max_size=max_size, client=client)
+
+
+def _fetch_and_analyze_script(
+    script_url: str,
+    verify_tls: bool,
+    analysis_cache: JSAnalysisCache,
+    client: HTTPClientPool,
+    max_size: int,
+    max_stream_size: int = DEFAULT_MAX_STREAM_SIZE,
+    validators: Optional[dict[str, str]] = None,
+) -> Optional[ScriptAnalysis]:
+    """Fetch and analyze a script, revalidating it when validators are known."""
+    try:
+        with _open_script(
+            script_url,
+            verify_tls=verify_tls,
+            max_size=max_stream_size,
+            client=client,
+            headers=conditional_headers(validators),
+        ) as (resp, chunks):
+            if resp.status == 304:
+                # Drain the empty body so the connection can be reused.
+                for _ in chunks:
+                    pass
+                return ScriptAnalysis(not_modified=True)
+            if resp.status >= 400:
+                return None
+            analysis = _analyze_script_chunks(analysis_cache, chunks, max_size)
+    except Exception as exc:
+        logger.debug(f"Failed to fetch {script_url}: {exc}")
+        return None
+
+    if analysis is not None:
+        analysis.validators = response_validators(resp.headers)
+    return analysis
+
+
+def _analyze_script(
+    analysis_cache: JSAnalysisCache, content: Optional[str]
+) -> Optional[ScriptAnalysis]:
+    """Return the content hash, length and endpoints of script content."""
+    if not content:
+        return None
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return ScriptAnalysis(
+        content_hash=content_hash,
+        content_length=len(content),
+        endpoints=analysis_cache.extract_endpoints(content_hash, content),
+    )
 
+
+def _analyze_script_chunks(
+    analysis_cache: JSAnalysisCache, chunks: Iterable[str], max_size: int
+) -> Optional[ScriptAnalysis]:
+    """
+    Analyze script source arriving in chunks.
+
+    Scripts up to ``max_size`` characters are joined and go through the
+    cached ``_analyze_script`` path. Larger bundles are hashed while they
+    are spooled to a temporary file, and only streamed through
+    ``ChunkedEndpointScanner`` if the hash misses the analysis cache.
+    """
+    chunks = iter(chunks)
+    head: list[str] = []
+    head_size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_size += len(chunk)
+        if head_size > max_size:
+            break
+    else:
+        return _analyze_script(analysis_cache, "".join(head))
+
+    digest = hashlib.sha256()
+    content_length = 0
+    with tempfile.SpooledTemporaryFile(
+        max_size=max_size, mode="w+", encoding="utf-8", errors="ignore"
+    ) as spool:
+        for chunk in itertools.chain(head, chunks):
+            digest.update(chunk.encode("utf-8"))
+            content_length += len(chunk)
+            spool.write(chunk)
+        content_hash = digest.hexdigest()
+
+        endpoints = analysis_cache.get(content_hash)
+        if endpoints is None:
+            spool.seek(0)
+            scanner = ChunkedEndpointScanner()
+            for chunk in iter(partial(spool.read, SCAN_CHUNK_CHARS), ""):
+                scanner.feed(chunk)
+            endpoints = scanner.finish()
+            analysis_cache.set(content_hash, endpoints)
+    return ScriptAnalysis(
+        content_hash=content_hash, content_length=content_length, endpoints=endpoints
+    )
+
+
+@contextmanager
+def _open_script(
+    url: str,
+    verify_tls: bool,
+    max_size: int = DEFAULT_MAX_STREAM_SIZE,
+    client: Optional[HTTPClientPool] = None,
+    headers: Optional[dict[str, str]] = None,
+) -> Iterator[tuple[HTTPResponse, Iterator[str]]]:
+    """Yield the response of a script URL and its decoded text, up to ``max_size`` bytes."""
+    if client is None:
+        with HTTPClientPool(
+            verify_tls=verify_tls, timeout=15, user_agent=JS_ANALYZER_USER_AGENT
+        ) as one_shot:
+            with _open_script(url, verify_tls, max_size, one_shot, headers) as opened:
+                yield opened
+        return
+
+    with client.stream(url, headers=headers) as (resp, body):
+        yield resp, _decode_chunks(body, max_size)
+
+
+def _decode_chunks(body: Iterable[bytes], max_size: int) -> Iterator[str]:
+    """Decode UTF-8 body chunks incrementally, stopping after ``max_size`` bytes."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    remaining = max_size
+    for data in body:
+        data = data[:remaining]
+        remaining -= len(data)
+        text = decoder.decode(data)
+        if text:
+            yield text
+        if remaining <= 0:
+            break
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _fetch_text(
+    url: str,
+    verify_tls: bool,
+    max_size: int = 512000,
+    client: Optional[HTTPClientPool] = None,
+) -> Optional[str]:
+    """Fetch text response from URL with size guard."""
     try:
-        context = create_ssl_context(verify_tls=verify_tls)
-        req = urllib.request.Request(url, headers={"User-Agent": "EASM-JS-Analyzer/1.0"})
-        with urllib.request.urlopen(req, timeout=15, context=context) as resp:
-            data = resp.read(max_size + 1)
-            if len(data) > max_size:
-                data = data[:max_size]
-            return data.decode("utf-8", errors="ignore")
+        if client is None:
+            with HTTPClientPool(
+                verify_tls=verify_tls, timeout=15, user_agent=JS_ANALYZER_USER_AGENT
+            ) as one_shot:
+                return _fetch_text(url, verify_tls, max_size=max_size, client=one_shot)
+
+        resp = client.request(url, max_body=max_size)
+        if resp.status >= 400:
+            return None
+        return resp.text()
     except Exception as exc:
         logger.debug(f"Failed to fetch {url}: {exc}")
         return None
@@ -3,9 +3,11 @@ import json
 import logging
 import os
 import re
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
+from celery import chord
 from sqlalchemy.orm import Session
 
 from worker.app.celery_app import celery_app
@@ -45,6 +47,9 @@ def run_nuclei_scan(self, task_id: str):
         ):
             raise RuntimeError("Rate limit wait timeout for project scan execution")
         result = _run_nuclei_scan(db, task)
+        if result is None:
+            # Sharded: finalize_nuclei_shards completes the task and notifies the DAG.
+            return
         crud_scan_task.update_scan_task_status(
             db, task.id, "completed", result_summary=result
         )
@@ -64,34 +69,236 @@ def run_nuclei_scan(self, task_id: str):
         db.close()
 
 
-def _run_nuclei_scan(db: Session, task) -> Dict[str, Any]:
-    """Execute Nuclei scan on web assets."""
-    from server.app.crud.web_asset import list_web_assets
+@celery_app.task(bind=True, name="worker.app.tasks.nuclei_scan.run_nuclei_shard")
+def run_nuclei_shard(self, task_id: str, shard_index: int, urls: List[str]) -> Dict[str, Any]:
+    """Scan one shard of a sharded nuclei task and return its summary for the join step."""
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        task = crud_scan_task.get_scan_task(db, UUID(task_id))
+        if not task or task.status == "cancelled":
+            return {"shard": shard_index, "urls_scanned": 0, "vulnerabilities_found": 0}
+        result = _scan_urls(db, task, urls, track_progress=False)
+        return {"shard": shard_index, **result}
+    except Exception as e:
+        # Errors are reported to the join step instead of breaking the chord.
+        logger.exception(f"Shard {shard_index} of task {task_id} failed")
+        db.rollback()
+        return {
+            "shard": shard_index,
+            "urls_scanned": 0,
+            "vulnerabilities_found": 0,
+            "error": str(e),
+        }
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="worker.app.tasks.nuclei_scan.finalize_nuclei_shards")
+def finalize_nuclei_shards(self, shard_results: List[Dict[str, Any]], task_id: str):
+    """Join step of a sharded nuclei scan: record the merged summary and finish the task."""
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        task = crud_scan_task.get_scan_task(db, UUID(task_id))
+        if not task:
+            logger.error(f"Task {task_id} not found")
+            return
+
+        summary = _merge_shard_results(shard_results)
+        errors = [r["error"] for r in shard_results if r.get("error")]
+        status = "failed" if errors else "completed"
+        # Only the call that moves the task out of "running" reports to the DAG,
+        # so a redelivered callback or a cancelled task never notifies twice.
+        if not crud_scan_task.transition_scan_task_status(
+            db, task.id, task.project_id, from_statuses=["running"], to_status=status
+        ):
+            logger.info("Task %s already finished, skip shard join", task_id)
+            return
+
+        crud_scan_task.update_scan_task_status(
+            db,
+            task.id,
+            status,
+            error_message="; ".join(errors) or None,
+            result_summary=summary,
+        )
+        if not errors:
+            crud_scan_task.update_scan_task_progress(db, task.id, summary["urls_scanned"])
+        notify_dag_node_completion(db=db, scan_task_id=task.id, success=not errors)
+    finally:
+        db.close()
+
+
+@celery_app.task(name="worker.app.tasks.nuclei_scan.fail_nuclei_shards")
+def fail_nuclei_shards(request, exc, traceback, task_id: str):
+    """
+    Chord errback: fail the task when a shard dies before reaching the join step.
+
+    A shard lost with its worker, killed by a time limit or failing outside its
+    own error handling never reports a result, so the join step never runs.
+    """
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        task = crud_scan_task.get_scan_task(db, UUID(task_id))
+        if not task:
+            logger.error(f"Task {task_id} not found")
+            return
+        if not crud_scan_task.transition_scan_task_status(
+            db, task.id, task.project_id, from_statuses=["running"], to_status="failed"
+        ):
+            logger.info("Task %s already finished, skip shard failure", task_id)
+            return
+
+        logger.error("Nuclei shard of task %s failed: %s", task_id, exc)
+        crud_scan_task.update_scan_task_status(
+            db, task.id, "failed", error_message=f"Nuclei shard failed: {exc}"
+        )
+        notify_dag_node_completion(db=db, scan_task_id=task.id, success=False)
+    finally:
+        db.close()
+
+
+def _run_nuclei_scan(db: Session, task) -> Optional[Dict[str, Any]]:
+    """
+    Execute Nuclei scan on web assets.
+
+    With ``shards`` > 1 the targets are split across a chord of shard tasks
+    and None is returned; the join step finishes the task.
+    """
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.crud.web_asset import iter_web_asset_batches
 
     config = task.config or {}
     batch_size = config.get("batch_size", 100)
-    severity = config.get("severity", "medium,high,critical")
-    templates = config.get("templates", [])
-
-    # Validate severity input
-    severity = _validate_severity(severity)
-    # Validate templates input
-    templates = _validate_templates(templates)
+    shards = max(1, int(config.get("shards", 1)))
+    min_shard_size = max(1, int(config.get("min_shard_size", 50)))
 
-    assets = list_web_assets(db, task.project_id, is_alive=True, limit=batch_size)
-    urls = [a.url for a in assets]
+    urls = [
+        asset.url
+        for assets in iter_web_asset_batches(
+            db, task.project_id, is_alive=True, batch_size=batch_size
+        )
+        for asset in assets
+    ]
 
     if not urls:
         return {"urls_scanned": 0, "vulnerabilities_found": 0}
 
-    results = _execute_nuclei(urls, severity, templates)
+    shards = min(shards, -(-len(urls) // min_shard_size))
+    if shards > 1:
+        crud_scan_task.update_scan_task_progress(db, task.id, 0, total_targets=len(urls))
+        # Round-robin keeps URLs of one host spread across shards.
+        header = [
+            run_nuclei_shard.s(str(task.id), index, urls[index::shards])
+            for index in range(shards)
+        ]
+        callback = finalize_nuclei_shards.s(str(task.id))
+        callback.link_error(fail_nuclei_shards.s(str(task.id)))
+        chord(header)(callback)
+        logger.info("Task %s dispatched %d nuclei shards for %d URLs", task.id, shards, len(urls))
+        return None
+
+    return _scan_urls(db, task, urls)
+
+
+def _scan_urls(
+    db: Session, task, urls: List[str], track_progress: bool = True
+) -> Dict[str, Any]:
+    """
+    Run nuclei over ``urls`` and persist findings as they stream in.
+
+    With ``track_progress`` the task's progress is updated; shards only
+    poll for cancellation, as they share one task row.
+    """
+    from server.app.crud import scan_task as crud_scan_task
+
+    config = task.config or {}
+    severity = _validate_severity(config.get("severity", "medium,high,critical"))
+    templates = _validate_templates(config.get("templates", []))
+    flush_size = max(1, int(config.get("result_flush_size", 25)))
+    timeout = float(config.get("nuclei_timeout", 600))
+    progress_interval = float(config.get("progress_interval", 10))
+
+    if track_progress:
+        crud_scan_task.update_scan_task_progress(db, task.id, 0, total_targets=len(urls))
+
     vuln_count = 0
+    completed = 0
+    timed_out = False
+    cancelled = False
+    pending: List[Dict[str, Any]] = []
+    last_progress = time.monotonic()
+
+    events = _iter_nuclei_events(
+        urls, severity, templates, timeout=timeout, tick_interval=progress_interval
+    )
+    try:
+        for kind, payload in events:
+            if kind == "result":
+                pending.append(payload)
+                if len(pending) >= flush_size:
+                    vuln_count += _save_vulnerabilities(db, task.project_id, task.id, pending)
+                    pending = []
+            elif kind == "stats":
+                completed = max(completed, _completed_targets(payload, len(urls)))
+            elif kind == "timeout":
+                timed_out = True
+
+            if time.monotonic() - last_progress >= progress_interval:
+                last_progress = time.monotonic()
+                # Progress updates also pick up a cancellation made through the API.
+                if track_progress:
+                    current = crud_scan_task.update_scan_task_progress(db, task.id, completed)
+                    status = current.status if current is not None else None
+                else:
+                    status = crud_scan_task.get_scan_task_status(db, task.id)
+                if status == "cancelled":
+                    logger.info("Task %s was cancelled, stopping nuclei", task.id)
+                    cancelled = True
+                    break
+    finally:
+        events.close()
+
+    if pending:
+        vuln_count += _save_vulnerabilities(db, task.project_id, task.id, pending)
+    if track_progress and not (timed_out or cancelled):
+        crud_scan_task.update_scan_task_progress(db, task.id, len(urls))
+
+    return {
+        "urls_scanned": len(urls),
+        "vulnerabilities_found": vuln_count,
+        "timed_out": timed_out,
+        "cancelled": cancelled,
+    }
+
+
+def _merge_shard_results(shard_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate shard summaries into the parent task's result summary."""
+    return {
+        "urls_scanned": sum(r.get("urls_scanned", 0) for r in shard_results),
+        "vulnerabilities_found": sum(r.get("vulnerabilities_found", 0) for r in shard_results),
+        "timed_out": any(r.get("timed_out") for r in shard_results),
+        "cancelled": any(r.get("cancelled") for r in shard_results),
+        "shards": len(shard_results),
+        "failed_shards": sum(1 for r in shard_results if r.get("error")),
+    }
 
-    for result in results:
-        _save_vulnerability(db, task.project_id, task.id, result)
-        vuln_count += 1
 
-    return {"urls_scanned": len(urls), "vulnerabilities_found": vuln_count}
+def _completed_targets(stats: Dict[str, Any], total: int) -> int:
+    """Estimate finished targets from a nuclei stats line."""
+    try:
+        percent = float(stats.get("percent", 0))
+    except (TypeError, ValueError):
+        return 0
+    return min(total, int(total * percent / 100))
 
 
 def _validate_severity(severity: str) -> str:
@@ -112,89 +319,158 @@ def _validate_templates(templates: List[str]) -> List[str]:
     return valid_templates
 
 
-def _execute_nuclei(
-    urls: List[str], severity: str, templates: List[str]
-) -> List[Dict[str, Any]]:
-    """Execute nuclei command and parse results."""
+def _iter_nuclei_events(
+    urls: List[str],
+    severity: str,
+    templates: List[str],
+    timeout: float = 600,
+    tick_interval: float = 10,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run nuclei and yield its events as they are produced.
+
+    Events are ("result", finding) for each JSONL finding on stdout,
+    ("stats", stats) for each ``-stats -sj`` line on stderr, ("tick", {})
+    when nothing arrived for ``tick_interval`` seconds, and a final
+    ("timeout", {}) if the process was killed after ``timeout`` seconds.
+    Closing the generator kills nuclei; findings already yielded are kept.
+    """
+    import queue
     import shutil
     import subprocess
     import tempfile
+    import threading
 
     if not shutil.which("nuclei"):
         logger.warning("nuclei not found, skipping scan")
-        return []
-
-    results = []
-    targets_file = None
+        return
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(urls))
+        targets_file = f.name
+
+    cmd = [
+        "nuclei",
+        "-l", targets_file,
+        "-severity", severity,
+        "-json",
+        "-silent",
+        "-stats",
+        "-sj",
+        "-si", str(max(1, int(tick_interval))),
+    ]
+
+    if templates:
+        cmd.extend(["-t", ",".join(templates)])
 
     try:
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
-            f.write("\n".join(urls))
-            targets_file = f.name
-
-        cmd = [
-            "nuclei",
-            "-l", targets_file,
-            "-severity", severity,
-            "-json",
-            "-silent",
-        ]
-
-        if templates:
-            cmd.extend(["-t", ",".join(templates)])
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except OSError as e:
+            logger.error(f"nuclei execution failed: {e}")
+            return
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=600,
-        )
+        events: "queue.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = queue.Queue()
+        expired = threading.Event()
+
+        def expire() -> None:
+            expired.set()
+            process.kill()
+
+        def pump(stream, kind: str) -> None:
+            try:
+                for line in stream:
+                    line = line.strip()
+                    if not line.startswith("{"):
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    if kind == "stats" and "percent" not in data:
+                        continue
+                    events.put((kind, data))
+            finally:
+                events.put(None)
+
+        readers = [
+            threading.Thread(target=pump, args=(process.stdout, "result"), daemon=True),
+            threading.Thread(target=pump, args=(process.stderr, "stats"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        watchdog = threading.Timer(timeout, expire)
+        watchdog.start()
 
-        for line in result.stdout.strip().split("\n"):
-            if line.strip():
+        try:
+            open_streams = len(readers)
+            while open_streams:
                 try:
-                    results.append(json.loads(line))
-                except json.JSONDecodeError:
+                    event = events.get(timeout=tick_interval)
+                except queue.Empty:
+                    yield "tick", {}
                     continue
-
-    except subprocess.TimeoutExpired:
-        logger.warning("nuclei scan timed out")
-    except Exception as e:
-        logger.error(f"nuclei execution failed: {e}")
+                if event is None:
+                    open_streams -= 1
+                    continue
+                yield event
+            process.wait()
+            if expired.is_set():
+                logger.warning("nuclei scan timed out, keeping partial results")
+                yield "timeout", {}
+        finally:
+            watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            for reader in readers:
+                reader.join(timeout=5)
+            process.stdout.close()
+            process.stderr.close()
     finally:
-        if targets_file and os.path.exists(targets_file):
-            os.unlink(targets_file)
+        os.unlink(targets_file)
+
 
-    return results
+def _save_vulnerabilities(db, project_id, task_id, results: List[Dict[str, Any]]) -> int:
+    """Upsert a batch of nuclei results in one statement and transaction."""
+    from server.app.crud.vulnerability import bulk_upsert_vulnerabilities
 
+    inserted, _ = bulk_upsert_vulnerabilities(
+        db, project_id, [_vulnerability_row(task_id, result) for result in results]
+    )
+    if inserted:
+        logger.info("Task %s found %d new vulnerabilities", task_id, len(inserted))
+    return len(results)
 
-def _save_vulnerability(db, project_id, task_id, result: Dict[str, Any]) -> None:
-    """Save nuclei result as vulnerability."""
-    from server.app.crud.vulnerability import upsert_vulnerability
 
+def _vulnerability_row(task_id, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a nuclei result to vulnerability columns."""
     info = result.get("info", {})
 
-    upsert_vulnerability(
-        db=db,
-        project_id=project_id,
-        target_url=result.get("matched-at", result.get("host", "")),
-        template_id=result.get("template-id", "unknown"),
-        template_name=result.get("template", info.get("name")),
-        severity=_map_severity(info.get("severity", "info")),
-        vuln_type=result.get("type"),
-        title=info.get("name"),
-        description=info.get("description"),
-        reference=info.get("reference", []),
-        tags=info.get("tags", []),
-        matched_at=result.get("matched-at"),
-        matcher_name=result.get("matcher-name"),
-        extracted_results=result.get("extracted-results", []),
-        curl_command=result.get("curl-command"),
-        request=result.get("request"),
-        response=result.get("response"),
-        scan_task_id=task_id,
-        raw_output=result,
-    )
+    return {
+        "target_url": result.get("matched-at", result.get("host", "")),
+        "template_id": result.get("template-id", "unknown"),
+        "template_name": result.get("template", info.get("name")),
+        "severity": _map_severity(info.get("severity", "info")),
+        "vuln_type": result.get("type"),
+        "title": info.get("name"),
+        "description": info.get("description"),
+        "reference": info.get("reference", []),
+        "tags": info.get("tags", []),
+        "matched_at": result.get("matched-at"),
+        "matcher_name": result.get("matcher-name"),
+        "extracted_results": result.get("extracted-results", []),
+        "curl_command": result.get("curl-command"),
+        "request": result.get("request"),
+        "response": result.get("response"),
+        "scan_task_id": task_id,
+        "raw_output": result,
+    }
 
 
 def _map_severity(severity: str) -> str:
@@ -1,6 +1,6 @@
 import logging
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 from worker.app.celery_app import celery_app
@@ -83,136 +83,400 @@ def _run_subdomain_scan(db, task) -> Dict[str, Any]:
 
     logger.info(f"Starting subdomain scan for {domain}")
 
-    subdomains = _enumerate_subdomains(domain)
-    count = bulk_upsert_subdomains(
-        db=db,
-        project_id=task.project_id,
-        root_domain=domain,
-        subdomains=subdomains,
-        source="subfinder",
-    )
+    flush_size = max(1, int(config.get("flush_size", 1000)))
+    timeout = float(config.get("subfinder_timeout", 300))
+
+    # Names are written as they stream in, so only the seen set grows.
+    seen = set()
+    pending: List[str] = []
+    count = 0
+    for subdomain in _iter_subdomains(domain, timeout=timeout):
+        if subdomain in seen:
+            continue
+        seen.add(subdomain)
+        pending.append(subdomain)
+        if len(pending) >= flush_size:
+            count += bulk_upsert_subdomains(
+                db=db,
+                project_id=task.project_id,
+                root_domain=domain,
+                subdomains=pending,
+                source="subfinder",
+            )
+            pending = []
+    if pending:
+        count += bulk_upsert_subdomains(
+            db=db,
+            project_id=task.project_id,
+            root_domain=domain,
+            subdomains=pending,
+            source="subfinder",
+        )
 
     return {"domain": domain, "subdomains_found": count}
 
 
-def _enumerate_subdomains(domain: str) -> List[str]:
-    """Enumerate subdomains using subfinder or fallback to simulation."""
+def _iter_subdomains(domain: str, timeout: float = 300) -> Iterator[str]:
+    """
+    Stream subdomains from subfinder, or fall back to simulation.
+
+    Names are yielded line by line, lower-cased. The fallback is only used
+    when subfinder is missing or fails before reporting anything.
+    """
     import shutil
     import subprocess
+    import threading
 
+    found = False
     if shutil.which("subfinder"):
+        proc = None
         try:
-            result = subprocess.run(
+            proc = subprocess.Popen(
                 ["subfinder", "-d", domain, "-silent"],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
                 text=True,
-                timeout=300,
             )
-            if result.returncode == 0:
-                subs = [s.strip() for s in result.stdout.strip().split("\n") if s.strip()]
-                return subs
-        except Exception as e:
+            watchdog = threading.Timer(timeout, proc.kill)
+            watchdog.start()
+            try:
+                for line in proc.stdout:
+                    subdomain = line.strip().lower()
+                    if subdomain:
+                        found = True
+                        yield subdomain
+            finally:
+                watchdog.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+            if proc.returncode != 0:
+                logger.warning(f"subfinder exited with {proc.returncode} for {domain}")
+        except OSError as e:
             logger.warning(f"subfinder failed: {e}, using simulation")
+        finally:
+            if proc is not None and proc.stdout:
+                proc.stdout.close()
+        if found or (proc is not None and proc.returncode == 0):
+            return
 
     # Fallback: simulate some common subdomains for MVP
     common_prefixes = ["www", "api", "mail", "dev", "test", "staging"]
-    return [f"{p}.{domain}" for p in common_prefixes]
+    yield from (f"{p}.{domain}" for p in common_prefixes)
 
 
 def _run_dns_resolve(db, task) -> Dict[str, Any]:
-    """Resolve DNS for subdomains in the project."""
-    import socket
-
-    from server.app.crud.ip_address import upsert_ip_address
-    from server.app.crud.subdomain import list_subdomains, upsert_subdomain
+    """Resolve DNS for all subdomains in the project, chunk by chunk."""
+    from server.app.crud.ip_address import bulk_upsert_ip_addresses
+    from server.app.crud.subdomain import (
+        bulk_upsert_subdomain_resolutions,
+        iter_subdomain_batches,
+    )
+    from worker.app.utils.dns_resolver import get_dns_resolve_config, resolve_hostnames
 
     config = task.config or {}
     root_domain = config.get("root_domain")
     batch_size = config.get("batch_size", 1000)
+    resolver_config = get_dns_resolve_config(config)
 
-    subdomains = list_subdomains(db, task.project_id, root_domain=root_domain, limit=batch_size)
+    processed_count = 0
     resolved_count = 0
-
-    for sub in subdomains:
-        try:
-            ips = socket.gethostbyname_ex(sub.subdomain)[2]
-            if ips:
-                upsert_subdomain(
-                    db=db,
-                    project_id=task.project_id,
-                    root_domain=sub.root_domain,
-                    subdomain=sub.subdomain,
-                    source=sub.source,
-                    ip_addresses=ips,
-                )
-                for ip in ips:
-                    upsert_ip_address(db, task.project_id, ip, source="dns_resolve")
-                resolved_count += 1
-        except socket.gaierror:
+    cname_only_count = 0
+
+    for subdomains in iter_subdomain_batches(
+        db, task.project_id, root_domain=root_domain, batch_size=batch_size
+    ):
+        processed_count += len(subdomains)
+        results = resolve_hostnames([sub.subdomain for sub in subdomains], **resolver_config)
+        resolutions = []
+        for sub in subdomains:
+            result = results.get(sub.subdomain)
+            # CNAME-only names are kept: a dangling CNAME is a takeover candidate.
+            if not result or not result.has_records:
+                continue
+            resolutions.append({
+                "root_domain": sub.root_domain,
+                "subdomain": sub.subdomain,
+                "source": sub.source,
+                "ip_addresses": result.ip_addresses,
+                "cname": result.cname,
+            })
+        if not resolutions:
             continue
 
-    return {"subdomains_processed": len(subdomains), "resolved": resolved_count}
+        # IPs and subdomain records for the chunk go in one transaction.
+        bulk_upsert_ip_addresses(
+            db,
+            task.project_id,
+            (ip for item in resolutions for ip in item["ip_addresses"]),
+            source="dns_resolve",
+            commit=False,
+        )
+        bulk_upsert_subdomain_resolutions(db, task.project_id, resolutions)
+        cname_only = sum(1 for item in resolutions if not item["ip_addresses"])
+        resolved_count += len(resolutions) - cname_only
+        cname_only_count += cname_only
+
+    return {
+        "subdomains_processed": processed_count,
+        "resolved": resolved_count,
+        "cname_only": cname_only_count,
+    }
 
 
 def _run_port_scan(db, task) -> Dict[str, Any]:
     """Scan ports for IPs in the project."""
-    from server.app.crud.ip_address import list_ip_addresses
-    from server.app.crud.port import upsert_port
+    import time
+
+    from server.app.crud.ip_address import iter_ip_address_batches
+    from server.app.crud.port import bulk_upsert_ports
 
     config = task.config or {}
     ports_to_scan = config.get("ports", [80, 443, 22, 21, 8080, 8443, 3306, 3389])
     batch_size = config.get("batch_size", 1000)
+    flush_size = max(1, int(config.get("port_flush_size", 500)))
+    flush_interval = float(config.get("port_flush_interval", 5.0))
 
-    ips = list_ip_addresses(db, task.project_id, limit=batch_size)
+    ips_scanned = 0
     open_ports_count = 0
+    pending: List[Dict[str, Any]] = []
+    last_flush = time.monotonic()
+
+    def flush() -> None:
+        nonlocal pending, open_ports_count, last_flush
+        if pending:
+            open_ports_count += len(bulk_upsert_ports(db, pending))
+            pending = []
+        last_flush = time.monotonic()
+
+    for ips in iter_ip_address_batches(db, task.project_id, batch_size=batch_size):
+        ips_scanned += len(ips)
+        ip_ids = {ip_obj.ip: ip_obj.id for ip_obj in ips}
+
+        # Hosts stream in as the scanner finishes them; flush by size or age
+        # so results land early without one commit per port. Ticks (None)
+        # keep the age check running while nmap has no host to report.
+        for result in _iter_ip_port_results(
+            list(ip_ids), ports_to_scan, config, tick_interval=flush_interval
+        ):
+            if result is not None:
+                ip, open_ports = result
+                ip_id = ip_ids.get(ip)
+                if ip_id is not None:
+                    pending.extend(
+                        {
+                            "ip_id": ip_id,
+                            "port": port_info["port"],
+                            "protocol": "tcp",
+                            "state": "open",
+                            "service": port_info.get("service"),
+                        }
+                        for port_info in open_ports
+                    )
+            if len(pending) >= flush_size or time.monotonic() - last_flush >= flush_interval:
+                flush()
+        flush()
+
+    return {"ips_scanned": ips_scanned, "open_ports": open_ports_count}
+
+
+def _iter_ip_port_results(
+    ips: List[str],
+    ports: List[int],
+    config: Optional[Dict[str, Any]] = None,
+    tick_interval: Optional[float] = None,
+) -> Iterator[Optional[Tuple[str, List[Dict[str, Any]]]]]:
+    """
+    Yield (ip, open_ports) per host, preferring batched nmap runs.
+
+    With ``tick_interval``, None is also yielded whenever a batched nmap run
+    reported no host for that many seconds.
+    """
+    import shutil
 
-    for ip_obj in ips:
-        open_ports = _scan_ports(ip_obj.ip, ports_to_scan)
-        for port_info in open_ports:
-            upsert_port(
-                db=db,
-                ip_id=ip_obj.id,
-                port=port_info["port"],
-                protocol="tcp",
-                state="open",
-                service=port_info.get("service"),
+    config = config or {}
+    if not shutil.which("nmap"):
+        yield from _connect_scan(ips, ports, config).items()
+        return
+
+    if not config.get("nmap_batch", True):
+        for ip in ips:
+            yield ip, _scan_ports(ip, ports, config)
+        return
+
+    # nmap needs -6 for IPv6 targets, so each address family gets its own runs.
+    nmap_batch_size = max(1, int(config.get("nmap_batch_size", 1024)))
+    for family_ips in ([ip for ip in ips if ":" not in ip], [ip for ip in ips if ":" in ip]):
+        for start in range(0, len(family_ips), nmap_batch_size):
+            batch = family_ips[start : start + nmap_batch_size]
+            yield from _scan_ports_nmap_batch(batch, ports, config, tick_interval=tick_interval)
+
+
+def _scan_ports_nmap_batch(
+    ips: List[str],
+    ports: List[int],
+    config: Optional[Dict[str, Any]] = None,
+    tick_interval: Optional[float] = None,
+) -> Iterator[Optional[Tuple[str, List[Dict[str, Any]]]]]:
+    """
+    Scan a batch of IPs with one nmap run, yielding hosts as they finish.
+
+    With ``tick_interval`` the XML is parsed on a reader thread and None is
+    yielded when no host arrived for that many seconds.
+    """
+    import os
+    import subprocess
+    import tempfile
+    import threading
+
+    config = config or {}
+    host_timeout = int(config.get("nmap_host_timeout", 120))
+    batch_timeout = int(config.get("nmap_batch_timeout", 3600))
+    targets_file = None
+    proc = None
+
+    try:
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+            f.write("\n".join(ips))
+            targets_file = f.name
+
+        port_str = ",".join(str(p) for p in ports)
+        cmd = [
+            "nmap", "-sT", "-p", port_str, "--open",
+            "--host-timeout", f"{host_timeout}s",
+            "-oX", "-", "-iL", targets_file,
+        ]
+        if ":" in ips[0]:
+            cmd.append("-6")
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
             )
-            open_ports_count += 1
+        except OSError as e:
+            logger.warning(f"nmap failed: {e}, using connect scan")
+            yield from _connect_scan(ips, ports, config).items()
+            return
+
+        watchdog = threading.Timer(batch_timeout, proc.kill)
+        watchdog.start()
+        try:
+            hosts = _parse_nmap_xml_stream(proc.stdout)
+            if tick_interval:
+                hosts = _iter_with_ticks(hosts, tick_interval)
+            yield from hosts
+        finally:
+            watchdog.cancel()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+    finally:
+        if proc is not None and proc.stdout:
+            proc.stdout.close()
+        if targets_file and os.path.exists(targets_file):
+            os.unlink(targets_file)
 
-    return {"ips_scanned": len(ips), "open_ports": open_ports_count}
 
+def _iter_with_ticks(items: Iterator[Any], tick_interval: float) -> Iterator[Any]:
+    """Consume ``items`` on a reader thread, yielding None after each idle interval."""
+    import queue
+    import threading
 
-def _scan_ports(ip: str, ports: List[int]) -> List[Dict[str, Any]]:
-    """Scan ports using socket or nmap."""
+    done = object()
+    events: "queue.Queue[Any]" = queue.Queue()
+
+    def pump() -> None:
+        try:
+            for item in items:
+                events.put(item)
+        finally:
+            events.put(done)
+
+    threading.Thread(target=pump, daemon=True).start()
+    while True:
+        try:
+            item = events.get(timeout=tick_interval)
+        except queue.Empty:
+            yield None
+            continue
+        if item is done:
+            return
+        yield item
+
+
+def _parse_nmap_xml_stream(stream) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """Incrementally parse nmap XML output, yielding each host once it closes."""
+    import xml.etree.ElementTree as ET
+
+    try:
+        for _, elem in ET.iterparse(stream, events=("end",)):
+            if elem.tag != "host":
+                continue
+            ip = None
+            for address in elem.findall("address"):
+                if address.get("addrtype") in ("ipv4", "ipv6"):
+                    ip = address.get("addr")
+                    break
+            open_ports = []
+            for port in elem.findall("ports/port"):
+                state = port.find("state")
+                if port.get("protocol") != "tcp" or state is None:
+                    continue
+                if state.get("state") != "open":
+                    continue
+                service = port.find("service")
+                service_name = service.get("name") if service is not None else None
+                open_ports.append({
+                    "port": int(port.get("portid")),
+                    "service": service_name or None,
+                })
+            elem.clear()
+            if ip:
+                yield ip, open_ports
+    except ET.ParseError as e:
+        # A killed or timed-out run leaves truncated XML; keep what was parsed.
+        logger.warning(f"nmap XML output ended early: {e}")
+
+
+def _scan_ports(
+    ip: str, ports: List[int], config: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Scan ports using nmap or the connect scanner."""
     import shutil
-    import socket
     import subprocess
 
     # Try nmap first
     if shutil.which("nmap"):
         try:
             port_str = ",".join(str(p) for p in ports)
+            cmd = ["nmap", "-sT", "-p", port_str, "--open", "-oG", "-", ip]
+            if ":" in ip:
+                cmd.append("-6")
             result = subprocess.run(
-                ["nmap", "-sT", "-p", port_str, "--open", "-oG", "-", ip],
+                cmd,
                 capture_output=True,
                 text=True,
                 timeout=120,
             )
             return _parse_nmap_output(result.stdout)
         except Exception as e:
-            logger.warning(f"nmap failed: {e}, using socket scan")
+            logger.warning(f"nmap failed: {e}, using connect scan")
 
-    # Fallback to socket scan
-    open_ports = []
-    for port in ports:
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(2)
-                if sock.connect_ex((ip, port)) == 0:
-                    open_ports.append({"port": port, "service": _guess_service(port)})
-        except Exception:
-            pass
-    return open_ports
+    return _connect_scan([ip], ports, config).get(ip, [])
+
+
+def _connect_scan(
+    ips: List[str], ports: List[int], config: Optional[Dict[str, Any]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Run the asyncio connect scanner and format open ports as records."""
+    from worker.app.utils.port_scanner import get_connect_scan_config, scan_tcp_ports
+
+    open_ports = scan_tcp_ports(ips, ports, **get_connect_scan_config(config))
+    return {
+        ip: [{"port": port, "service": _guess_service(port)} for port in ports_found]
+        for ip, ports_found in open_ports.items()
+    }
 
 
 def _parse_nmap_output(output: str) -> List[Dict[str, Any]]:
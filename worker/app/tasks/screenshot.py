@@ -1,12 +1,20 @@
 """Screenshot capture tasks."""
 import logging
 import os
-from typing import Any, Dict
+from functools import partial
+from typing import Any, Dict, List
 from uuid import UUID
 
 from worker.app.celery_app import celery_app
 from worker.app.tasks.dag_callback import notify_dag_node_completion
+from worker.app.utils.http_client import run_concurrently
+from worker.app.utils.response_store import get_snapshot_max_age, get_snapshot_store
 from worker.app.utils.scan_helpers import wait_for_project_rate_limit
+from worker.app.utils.screenshot_store import (
+    DEFAULT_GC_MIN_AGE,
+    DEFAULT_WEBP_QUALITY,
+    ScreenshotStore,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +49,9 @@ def run_screenshot(self, task_id: str):
             db, task.id, "completed", result_summary=result
         )
         notify_dag_node_completion(db=db, scan_task_id=task.id, success=True)
+        if result.get("captured"):
+            # New captures may replace older ones; sweep objects left unreferenced.
+            _schedule_screenshot_garbage_collection()
     except Exception as e:
         logger.exception(f"Task {task_id} failed")
         task_uuid = UUID(task_id)
@@ -58,44 +69,103 @@ def run_screenshot(self, task_id: str):
 
 def _run_screenshot(db, task) -> Dict[str, Any]:
     """Capture screenshots for web assets."""
-    from server.app.crud.web_asset import list_web_assets, upsert_web_asset
+    from server.app.crud.web_asset import (
+        get_screenshot_paths_by_response_hash,
+        iter_web_asset_batches,
+        update_screenshot_paths,
+    )
 
     config = task.config or {}
     batch_size = config.get("batch_size", 100)
+    snapshot_max_age = get_snapshot_max_age(config)
+    store = get_snapshot_store(config) if snapshot_max_age > 0 else None
+    capture_concurrency = max(1, int(config.get("capture_concurrency", 4)))
+    screenshots = ScreenshotStore(
+        SCREENSHOT_DIR, quality=int(config.get("webp_quality", DEFAULT_WEBP_QUALITY))
+    )
 
     os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
-    assets = list_web_assets(db, task.project_id, is_alive=True, limit=batch_size)
+    processed_count = 0
     captured_count = 0
-
-    for asset in assets:
-        if asset.screenshot_path:
-            continue
-
-        screenshot_path = _capture_screenshot(asset.url, str(task.project_id))
-        if screenshot_path:
-            upsert_web_asset(
-                db=db,
-                project_id=task.project_id,
-                url=asset.url,
-                screenshot_path=screenshot_path,
-            )
+    reused_count = 0
+    blank_count = 0
+    # Screenshot path per response hash captured so far in this project.
+    paths_by_hash: Dict[str, str] = {}
+
+    for assets in iter_web_asset_batches(
+        db, task.project_id, is_alive=True, batch_size=batch_size
+    ):
+        processed_count += len(assets)
+        # Assets serving the same page share one capture.
+        groups: Dict[str, List[Any]] = {}
+        for asset in assets:
+            if asset.screenshot_path:
+                continue
+
+            # A fresh probe snapshot with an empty body would render blank.
+            if store is not None:
+                snapshot = store.get(
+                    asset.url,
+                    max_age=snapshot_max_age,
+                    response_hash=getattr(asset, "response_hash", None),
+                )
+                if snapshot is not None and not snapshot.body.strip():
+                    blank_count += 1
+                    continue
+
+            key = getattr(asset, "response_hash", None) or f"url:{asset.url}"
+            groups.setdefault(key, []).append(asset)
+
+        unseen = [key for key in groups if not key.startswith("url:") and key not in paths_by_hash]
+        paths_by_hash.update(get_screenshot_paths_by_response_hash(db, task.project_id, unseen))
+
+        paths: Dict[Any, str] = {}
+        to_capture = []
+        for key, group in groups.items():
+            if key in paths_by_hash:
+                paths.update((asset.id, paths_by_hash[key]) for asset in group)
+                reused_count += len(group)
+            else:
+                to_capture.append(key)
+
+        capture = partial(_capture_group, groups=groups, screenshots=screenshots)
+        for key, screenshot_path in run_concurrently(capture, to_capture, capture_concurrency):
+            if not screenshot_path:
+                continue
+            group = groups[key]
+            paths.update((asset.id, screenshot_path) for asset in group)
             captured_count += 1
+            reused_count += len(group) - 1
+            if not key.startswith("url:"):
+                paths_by_hash[key] = screenshot_path
+
+        update_screenshot_paths(db, paths)
+
+    return {
+        "assets_processed": processed_count,
+        "captured": captured_count,
+        "reused": reused_count,
+        "skipped_blank": blank_count,
+    }
+
 
-    return {"assets_processed": len(assets), "captured": captured_count}
+def _capture_group(key: str, groups: Dict[str, List[Any]], screenshots: ScreenshotStore) -> str:
+    """Capture the first asset of a group of identical pages."""
+    return _capture_screenshot(groups[key][0].url, screenshots)
 
 
-def _capture_screenshot(url: str, project_id: str) -> str:
-    """Capture screenshot using gowitness or fallback."""
-    import hashlib
+def _capture_screenshot(url: str, screenshots: ScreenshotStore) -> str:
+    """Capture a screenshot with gowitness and return its stored public path."""
     import shutil
     import subprocess
+    import tempfile
 
-    url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-    filename = f"{project_id}_{url_hash}.png"
-    filepath = os.path.join(SCREENSHOT_DIR, filename)
+    if not shutil.which("gowitness"):
+        return ""
 
-    if shutil.which("gowitness"):
+    with tempfile.TemporaryDirectory(dir=SCREENSHOT_DIR, prefix=".capture-") as tmp_dir:
+        filepath = os.path.join(tmp_dir, "capture.png")
         try:
             subprocess.run(
                 ["gowitness", "single", url, "-o", filepath, "--timeout", "15"],
@@ -103,8 +173,32 @@ def _capture_screenshot(url: str, project_id: str) -> str:
                 timeout=30,
             )
             if os.path.exists(filepath):
-                return f"/screenshots/{filename}"
+                return screenshots.put_file(filepath)
         except Exception as e:
             logger.warning(f"gowitness failed for {url}: {e}")
 
     return ""
+
+
+def _schedule_screenshot_garbage_collection() -> None:
+    try:
+        collect_screenshot_garbage.delay()
+    except Exception as e:
+        logger.warning(f"Failed to schedule screenshot garbage collection: {e}")
+
+
+@celery_app.task(name="worker.app.tasks.screenshot.collect_screenshot_garbage")
+def collect_screenshot_garbage(min_age: float = DEFAULT_GC_MIN_AGE) -> Dict[str, int]:
+    """Delete stored screenshots that no web asset references any more."""
+    from server.app.crud.web_asset import list_screenshot_paths
+    from server.app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        referenced = list_screenshot_paths(db)
+    finally:
+        db.close()
+
+    removed = ScreenshotStore(SCREENSHOT_DIR).collect_garbage(referenced, min_age=min_age)
+    logger.info(f"Removed {removed} orphaned screenshot files")
+    return {"referenced": len(referenced), "removed": removed}
@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 
 from worker.app.celery_app import celery_app
 from worker.app.tasks.dag_callback import notify_dag_node_completion
+from worker.app.utils.http_client import run_concurrently
 from worker.app.utils.scan_helpers import wait_for_project_rate_limit
 
 logger = logging.getLogger(__name__)
@@ -69,29 +70,51 @@ def run_xray_scan(self, task_id: str):
 
 
 def _run_xray_scan(db: Session, task) -> Dict[str, Any]:
-    """Execute Xray scan on web assets."""
-    from server.app.crud.web_asset import list_web_assets
+    """
+    Execute Xray scan on web assets.
+
+    Up to ``max_concurrency`` xray processes run at once, each writing to
+    its own output file; a target's findings are saved as soon as its
+    process finishes.
+    """
+    from server.app.crud import scan_task as crud_scan_task
+    from server.app.crud.web_asset import iter_web_asset_batches
 
     config = task.config or {}
     batch_size = config.get("batch_size", 50)
     plugins = config.get("plugins", [])
     use_crawler = config.get("use_crawler", False)
+    max_concurrency = max(1, int(config.get("max_concurrency", 4)))
+    xray_timeout = float(config.get("xray_timeout", 300))
 
     # Validate plugins
     plugins = _validate_plugins(plugins)
 
-    assets = list_web_assets(db, task.project_id, is_alive=True, limit=batch_size)
-    urls = [a.url for a in assets]
+    urls = [
+        asset.url
+        for assets in iter_web_asset_batches(
+            db, task.project_id, is_alive=True, batch_size=batch_size
+        )
+        for asset in assets
+    ]
 
     if not urls:
         return {"urls_scanned": 0, "vulnerabilities_found": 0}
 
+    crud_scan_task.update_scan_task_progress(db, task.id, 0, total_targets=len(urls))
+
+    def scan(url: str) -> List[Dict[str, Any]]:
+        return _execute_xray(url, plugins, use_crawler, timeout=xray_timeout)
+
     vuln_count = 0
-    for url in urls:
-        results = _execute_xray(url, plugins, use_crawler)
-        for result in results:
-            _save_vulnerability(db, task.project_id, task.id, result)
-            vuln_count += 1
+    completed = 0
+    # The session is only used here, on the calling thread.
+    for url, results in run_concurrently(scan, urls, max_concurrency):
+        if results:
+            _save_vulnerabilities(db, task.project_id, task.id, results)
+            vuln_count += len(results)
+        completed += 1
+        crud_scan_task.update_scan_task_progress(db, task.id, completed)
 
     return {"urls_scanned": len(urls), "vulnerabilities_found": vuln_count}
 
@@ -107,7 +130,7 @@ def _validate_plugins(plugins: List[str]) -> List[str]:
 
 
 def _execute_xray(
-    url: str, plugins: List[str], use_crawler: bool
+    url: str, plugins: List[str], use_crawler: bool, timeout: float = 300
 ) -> List[Dict[str, Any]]:
     """Execute xray command and parse results."""
     import shutil
@@ -143,7 +166,7 @@ def _execute_xray(
             cmd,
             capture_output=True,
             text=True,
-            timeout=300,
+            timeout=timeout,
         )
 
         if os.path.exists(output_file):
@@ -182,12 +205,19 @@ def _parse_xray_output(content: str) -> List[Dict[str, Any]]:
     return results
 
 
-def _save_vulnerability(
-    db: Session, project_id: UUID, task_id: UUID, result: Dict[str, Any]
+def _save_vulnerabilities(
+    db: Session, project_id: UUID, task_id: UUID, results: List[Dict[str, Any]]
 ) -> None:
-    """Save xray result as vulnerability."""
-    from server.app.crud.vulnerability import upsert_vulnerability
+    """Upsert the xray results of one target in one statement and transaction."""
+    from server.app.crud.vulnerability import bulk_upsert_vulnerabilities
 
+    bulk_upsert_vulnerabilities(
+        db, project_id, [_vulnerability_row(task_id, result) for result in results]
+    )
+
+
+def _vulnerability_row(task_id: UUID, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an xray result to vulnerability columns."""
     # Extract fields from xray output format
     plugin = result.get("plugin", "unknown")
     detail = result.get("detail", {})
@@ -201,22 +231,21 @@ def _save_vulnerability(
         or ""
     )
 
-    upsert_vulnerability(
-        db=db,
-        project_id=project_id,
-        target_url=target_url,
-        template_id=f"xray-{plugin}",
-        template_name=plugin,
-        severity=_map_severity(result.get("severity", "medium")),
-        vuln_type=plugin,
-        title=detail.get("title") or f"Xray: {plugin}",
-        description=detail.get("description"),
-        matched_at=target_url,
-        request=detail.get("request"),
-        response=detail.get("response"),
-        scan_task_id=task_id,
-        raw_output=result,
-    )
+    return {
+        "target_url": target_url,
+        "template_id": f"xray-{plugin}",
+        "template_name": plugin,
+        "severity": _map_severity(result.get("severity", "medium")),
+        "vuln_type": plugin,
+        "title": detail.get("title") or f"Xray: {plugin}",
+        "description": detail.get("description"),
+        "matched_at": target_url,
+        "request": detail.get("request"),
+        "response": detail.get("response"),
+        "scanner": "xray",
+        "scan_task_id": task_id,
+        "raw_output": result,
+    }
 
 
 def _map_severity(severity: str) -> str:
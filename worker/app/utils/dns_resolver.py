@@ -0,0 +1,300 @@
+"""Asyncio stub DNS resolver for high-volume subdomain resolution."""
+
+import asyncio
+import logging
+import random
+import socket
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QTYPE_A = 1
+QTYPE_CNAME = 5
+QTYPE_AAAA = 28
+
+# Header flag set when the answer did not fit in a UDP datagram.
+FLAG_TC = 0x0200
+
+RCODE_NOERROR = 0
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+
+DEFAULT_DNS_CONCURRENCY = 200
+DEFAULT_DNS_TIMEOUT = 2.0
+DEFAULT_DNS_RETRIES = 2
+FALLBACK_NAMESERVERS = ["8.8.8.8", "1.1.1.1"]
+
+_MAX_POINTER_HOPS = 64
+
+
+@dataclass
+class DNSResult:
+    """A/AAAA/CNAME records collected for one hostname."""
+
+    name: str
+    a: List[str] = field(default_factory=list)
+    aaaa: List[str] = field(default_factory=list)
+    cname: Optional[str] = None
+
+    @property
+    def ip_addresses(self) -> List[str]:
+        return self.a + self.aaaa
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.a or self.aaaa)
+
+    @property
+    def has_records(self) -> bool:
+        """True for resolved names and for CNAMEs whose target has no addresses."""
+        return self.resolved or self.cname is not None
+
+
+def get_dns_resolve_config(task_config: Optional[dict]) -> dict:
+    """Read resolver settings from task config with defaults."""
+    config = task_config or {}
+    nameservers = config.get("nameservers") or []
+    if isinstance(nameservers, str):
+        nameservers = [ns.strip() for ns in nameservers.split(",") if ns.strip()]
+    return {
+        "nameservers": list(nameservers) or None,
+        "concurrency": max(1, int(config.get("dns_concurrency", DEFAULT_DNS_CONCURRENCY))),
+        "timeout": max(0.1, float(config.get("dns_timeout", DEFAULT_DNS_TIMEOUT))),
+        "retries": max(0, int(config.get("dns_retries", DEFAULT_DNS_RETRIES))),
+    }
+
+
+def load_system_nameservers(path: str = "/etc/resolv.conf") -> List[str]:
+    """Read nameserver entries from resolv.conf."""
+    nameservers = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    nameservers.append(parts[1])
+    except OSError:
+        pass
+    return nameservers
+
+
+def _parse_nameserver(value: str) -> Tuple[str, int]:
+    """Parse 'host', 'host:port' or '[v6]:port' into an address tuple."""
+    value = value.strip()
+    if value.startswith("["):
+        host, _, port = value[1:].partition("]:")
+        return host.rstrip("]"), int(port or 53)
+    if value.count(":") == 1:
+        host, port = value.split(":")
+        return host, int(port)
+    return value, 53
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = bytearray()
+    for label in name.rstrip(".").split("."):
+        raw = label.encode("ascii")
+        if not raw or len(raw) > 63:
+            raise ValueError(f"Invalid DNS label in {name!r}")
+        encoded.append(len(raw))
+        encoded += raw
+    encoded.append(0)
+    return bytes(encoded)
+
+
+def build_query(query_id: int, name: str, qtype: int) -> bytes:
+    """Build a recursive DNS query packet."""
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    return header + _encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def _read_name(data: bytes, offset: int) -> Tuple[str, int]:
+    """Read a possibly compressed domain name; return it and the next offset."""
+    labels = []
+    end_offset = None
+    hops = 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end_offset is None:
+                end_offset = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            hops += 1
+            if hops > _MAX_POINTER_HOPS:
+                raise ValueError("DNS name compression loop")
+            continue
+        if length == 0:
+            offset += 1
+            break
+        labels.append(data[offset + 1 : offset + 1 + length].decode("ascii", errors="replace"))
+        offset += 1 + length
+    return ".".join(labels).lower(), end_offset if end_offset is not None else offset
+
+
+def is_truncated(data: bytes) -> bool:
+    """True if the response has the TC bit set and must be re-asked over TCP."""
+    return len(data) >= 4 and bool(struct.unpack("!H", data[2:4])[0] & FLAG_TC)
+
+
+def parse_response(data: bytes) -> Tuple[int, int, List[Tuple[str, int, str]]]:
+    """Parse a DNS response into (query_id, rcode, [(owner, rtype, value)])."""
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+
+    answers = []
+    for _ in range(ancount):
+        owner, offset = _read_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack("!HHIH", data[offset : offset + 10])
+        offset += 10
+        rdata = data[offset : offset + rdlength]
+        if rtype == QTYPE_A and rdlength == 4:
+            answers.append((owner, rtype, socket.inet_ntop(socket.AF_INET, rdata)))
+        elif rtype == QTYPE_AAAA and rdlength == 16:
+            answers.append((owner, rtype, socket.inet_ntop(socket.AF_INET6, rdata)))
+        elif rtype == QTYPE_CNAME:
+            answers.append((owner, rtype, _read_name(data, offset)[0]))
+        offset += rdlength
+    return query_id, flags & 0x000F, answers
+
+
+class _DNSQueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, future: asyncio.Future, query_id: int):
+        self.future = future
+        self.query_id = query_id
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        if self.future.done() or len(data) < 12:
+            return
+        if struct.unpack("!H", data[:2])[0] == self.query_id:
+            self.future.set_result(data)
+
+    def error_received(self, exc: Exception) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+class AsyncDNSResolver:
+    """Concurrent UDP resolver with nameserver rotation, retries and timeouts."""
+
+    def __init__(
+        self,
+        nameservers: Optional[List[str]] = None,
+        concurrency: int = DEFAULT_DNS_CONCURRENCY,
+        timeout: float = DEFAULT_DNS_TIMEOUT,
+        retries: int = DEFAULT_DNS_RETRIES,
+    ):
+        servers = nameservers or load_system_nameservers() or FALLBACK_NAMESERVERS
+        self.nameservers = [_parse_nameserver(ns) for ns in servers]
+        self.timeout = timeout
+        self.retries = retries
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _exchange(self, nameserver: Tuple[str, int], query_id: int, payload: bytes) -> bytes:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DNSQueryProtocol(future, query_id),
+            remote_addr=nameserver,
+        )
+        try:
+            transport.sendto(payload)
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            transport.close()
+
+    async def _exchange_tcp(self, nameserver: Tuple[str, int], payload: bytes) -> bytes:
+        async def _ask() -> bytes:
+            reader, writer = await asyncio.open_connection(*nameserver)
+            try:
+                writer.write(struct.pack("!H", len(payload)) + payload)
+                await writer.drain()
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+                return await reader.readexactly(length)
+            finally:
+                writer.close()
+
+        return await asyncio.wait_for(_ask(), timeout=self.timeout)
+
+    async def query(
+        self, name: str, qtype: int
+    ) -> Optional[Tuple[int, List[Tuple[str, int, str]]]]:
+        """Query one record type, retrying across nameservers on failure."""
+        try:
+            query_id = random.randint(0, 0xFFFF)
+            payload = build_query(query_id, name, qtype)
+        except (ValueError, UnicodeError):
+            return None
+
+        start = random.randrange(len(self.nameservers))
+        for attempt in range(self.retries + 1):
+            nameserver = self.nameservers[(start + attempt) % len(self.nameservers)]
+            async with self._semaphore:
+                try:
+                    data = await self._exchange(nameserver, query_id, payload)
+                    if is_truncated(data):
+                        # A truncated UDP answer is incomplete; ask again over TCP.
+                        data = await self._exchange_tcp(nameserver, payload)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    continue
+            if is_truncated(data):
+                continue
+            try:
+                response_id, rcode, answers = parse_response(data)
+            except (ValueError, IndexError, struct.error):
+                continue
+            if response_id != query_id:
+                continue
+            if rcode == RCODE_SERVFAIL:
+                continue
+            return rcode, answers
+        return None
+
+    async def resolve(self, name: str) -> DNSResult:
+        """Resolve A and AAAA records (following the CNAME chain in answers)."""
+        result = DNSResult(name=name)
+        responses = await asyncio.gather(self.query(name, QTYPE_A), self.query(name, QTYPE_AAAA))
+        owner = name.rstrip(".").lower()
+
+        for response in responses:
+            if not response:
+                continue
+            _, answers = response
+            for record_owner, rtype, value in answers:
+                if rtype == QTYPE_CNAME and record_owner == owner and result.cname is None:
+                    result.cname = value
+                elif rtype == QTYPE_A and value not in result.a:
+                    result.a.append(value)
+                elif rtype == QTYPE_AAAA and value not in result.aaaa:
+                    result.aaaa.append(value)
+        return result
+
+    async def resolve_many(self, names: Iterable[str]) -> List[DNSResult]:
+        return list(await asyncio.gather(*(self.resolve(name) for name in names)))
+
+
+def resolve_hostnames(
+    names: List[str],
+    nameservers: Optional[List[str]] = None,
+    concurrency: int = DEFAULT_DNS_CONCURRENCY,
+    timeout: float = DEFAULT_DNS_TIMEOUT,
+    retries: int = DEFAULT_DNS_RETRIES,
+) -> Dict[str, DNSResult]:
+    """Resolve a chunk of hostnames concurrently, keyed by input name."""
+    if not names:
+        return {}
+
+    async def _run() -> List[DNSResult]:
+        resolver = AsyncDNSResolver(
+            nameservers=nameservers,
+            concurrency=concurrency,
+            timeout=timeout,
+            retries=retries,
+        )
+        return await resolver.resolve_many(names)
+
+    return {result.name: result for result in asyncio.run(_run())}
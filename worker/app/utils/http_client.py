@@ -0,0 +1,303 @@
+"""Pooled keep-alive HTTP client shared by scanner tasks."""
+
+import http.client
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+from urllib.parse import urljoin, urlsplit
+
+from worker.app.utils.tls import create_ssl_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "EASM-Scanner/1.0"
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Response headers that identify a representation for conditional requests.
+VALIDATOR_HEADERS = {"etag": "ETag", "last-modified": "Last-Modified"}
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_PoolKey = Tuple[str, str, int]
+
+
+@dataclass
+class HTTPResponse:
+    """Response captured by HTTPClientPool."""
+
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    truncated: bool = False
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+
+class HTTPClientPool:
+    """
+    Thread-safe HTTP/1.1 client with per-host keep-alive connection pools.
+
+    A single SSL context is shared by every HTTPS connection, and at most
+    ``max_per_host`` requests run against one (scheme, host, port) at once.
+    """
+
+    def __init__(
+        self,
+        verify_tls: bool = True,
+        timeout: float = 10.0,
+        max_per_host: int = 4,
+        max_redirects: int = 5,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        self.timeout = timeout
+        self.max_per_host = max(1, max_per_host)
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.ssl_context = create_ssl_context(verify_tls=verify_tls)
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._host_limits: Dict[_PoolKey, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "HTTPClientPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def request(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Optional[Dict[str, str]] = None,
+        max_body: int = 65536,
+        follow_redirects: bool = True,
+    ) -> HTTPResponse:
+        """Send a request, following redirects, and read up to ``max_body`` bytes."""
+        response = self._request_once(url, method, headers, max_body)
+        redirects = 0
+        while (
+            follow_redirects
+            and response.status in REDIRECT_STATUSES
+            and "location" in {k.lower() for k in response.headers}
+            and redirects < self.max_redirects
+        ):
+            location = next(v for k, v in response.headers.items() if k.lower() == "location")
+            url = urljoin(response.url, location)
+            if response.status == 303:
+                method = "GET"
+            response = self._request_once(url, method, headers, max_body)
+            redirects += 1
+        return response
+
+    @staticmethod
+    def _pool_key(url: str) -> Tuple[_PoolKey, str]:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return (scheme, parts.hostname or "", port), path
+
+    @contextmanager
+    def _host_slot(self, key: _PoolKey):
+        with self._lock:
+            limit = self._host_limits.get(key)
+            if limit is None:
+                limit = self._host_limits[key] = threading.BoundedSemaphore(self.max_per_host)
+        with limit:
+            yield
+
+    def _new_connection(self, key: _PoolKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key: _PoolKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop(), True
+        return self._new_connection(key), False
+
+    def _checkin(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_per_host:
+                connections.append(conn)
+                return
+        conn.close()
+
+    def _send(
+        self,
+        key: _PoolKey,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a request on a pooled connection and return it with the response."""
+        conn, reused = self._checkout(key)
+        try:
+            conn.request(method, path, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+        # The server dropped an idle keep-alive connection; retry fresh.
+        conn = self._new_connection(key)
+        try:
+            conn.request(method, path, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+
+    @contextmanager
+    def stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        chunk_size: int = 65536,
+        follow_redirects: bool = True,
+    ) -> Iterator[Tuple[HTTPResponse, Iterator[bytes]]]:
+        """
+        Send a GET request and yield (response, body chunks) for incremental reads.
+
+        ``response.body`` is left empty. The connection returns to the pool
+        only if the caller reads the body to the end.
+        """
+        request_headers = {"User-Agent": self.user_agent, **(headers or {})}
+        redirects = 0
+        while True:
+            key, path = self._pool_key(url)
+            with self._host_slot(key):
+                conn, resp = self._send(key, "GET", path, request_headers)
+                location = resp.getheader("Location")
+                if (
+                    follow_redirects
+                    and resp.status in REDIRECT_STATUSES
+                    and location
+                    and redirects < self.max_redirects
+                ):
+                    # Drain a short redirect body so the connection can be reused.
+                    resp.read(chunk_size)
+                    if resp.isclosed() and not resp.will_close:
+                        self._checkin(key, conn)
+                    else:
+                        conn.close()
+                    url = urljoin(url, location)
+                    redirects += 1
+                    continue
+
+                finished = False
+
+                def chunks() -> Iterator[bytes]:
+                    nonlocal finished
+                    while True:
+                        data = resp.read(chunk_size)
+                        if not data:
+                            finished = True
+                            return
+                        yield data
+
+                response = HTTPResponse(url=url, status=resp.status, headers=dict(resp.headers))
+                try:
+                    yield response, chunks()
+                finally:
+                    if finished and not resp.will_close:
+                        self._checkin(key, conn)
+                    else:
+                        conn.close()
+                return
+
+    def _request_once(
+        self,
+        url: str,
+        method: str,
+        headers: Optional[Dict[str, str]],
+        max_body: int,
+    ) -> HTTPResponse:
+        key, path = self._pool_key(url)
+        request_headers = {"User-Agent": self.user_agent, **(headers or {})}
+
+        with self._host_slot(key):
+            conn, resp = self._send(key, method, path, request_headers)
+            try:
+                body = resp.read(max_body) if method != "HEAD" else b""
+                truncated = bool(body) and len(body) >= max_body and bool(resp.read(1))
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                raise
+
+            if truncated or resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+
+        return HTTPResponse(
+            url=url,
+            status=resp.status,
+            headers=dict(resp.headers),
+            body=body,
+            truncated=truncated,
+        )
+
+
+def response_validators(headers: Optional[Mapping[str, str]]) -> Dict[str, str]:
+    """Pick the ETag and Last-Modified headers out of a response header mapping."""
+    validators: Dict[str, str] = {}
+    for key, value in (headers or {}).items():
+        name = VALIDATOR_HEADERS.get(key.lower())
+        if name and value:
+            validators[name] = value
+    return validators
+
+
+def conditional_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, str]:
+    """Build If-None-Match/If-Modified-Since request headers from stored validators."""
+    validators = response_validators(headers)
+    request_headers: Dict[str, str] = {}
+    if "ETag" in validators:
+        request_headers["If-None-Match"] = validators["ETag"]
+    if "Last-Modified" in validators:
+        request_headers["If-Modified-Since"] = validators["Last-Modified"]
+    return request_headers
+
+
+def run_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+) -> Iterator[Tuple[T, R]]:
+    """
+    Apply ``func`` to items on a thread pool, yielding (item, result) as each finishes.
+
+    Exceptions raised by ``func`` propagate to the caller.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    items = list(items)
+    if not items:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {executor.submit(func, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,85 @@
+"""Cache of JavaScript endpoint extraction results keyed by content hash."""
+
+import json
+import logging
+import zlib
+from typing import Dict, List, Optional
+
+import redis
+
+from shared.config import settings
+from worker.app.utils.js_api_parser import JS_PARSER_VERSION, extract_endpoints_from_js
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JS_CACHE_TTL = 7 * 24 * 3600
+
+
+class JSAnalysisCache:
+    """
+    Two-level cache of ``extract_endpoints_from_js`` output.
+
+    Results are memoized per instance (one discovery run) and stored in
+    Redis across runs under the script's sha256 and the parser version, so
+    a shared vendor bundle is parsed once no matter how many pages load it.
+    Redis errors are logged and treated as cache misses.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        ttl: int = DEFAULT_JS_CACHE_TTL,
+        key_prefix: str = "jsendpoints",
+    ):
+        self.redis = redis_client
+        self.ttl = max(1, int(ttl))
+        self.key_prefix = key_prefix
+        self._memo: Dict[str, List[dict]] = {}
+
+    def _key(self, content_hash: str) -> str:
+        return f"{self.key_prefix}:v{JS_PARSER_VERSION}:{content_hash}"
+
+    def get(self, content_hash: str) -> Optional[List[dict]]:
+        """Return cached endpoints for a script hash, or None on a miss."""
+        if content_hash in self._memo:
+            return self._memo[content_hash]
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._key(content_hash))
+            if raw is None:
+                return None
+            endpoints = json.loads(zlib.decompress(raw))
+        except (redis.RedisError, ValueError, zlib.error) as e:
+            logger.debug(f"JS analysis cache lookup failed for {content_hash}: {e}")
+            return None
+        self._memo[content_hash] = endpoints
+        return endpoints
+
+    def set(self, content_hash: str, endpoints: List[dict]) -> None:
+        self._memo[content_hash] = endpoints
+        if self.redis is None:
+            return
+        try:
+            payload = zlib.compress(json.dumps(endpoints).encode("utf-8"))
+            self.redis.set(self._key(content_hash), payload, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.debug(f"Failed to cache JS analysis for {content_hash}: {e}")
+
+    def extract_endpoints(self, content_hash: str, content: str) -> List[dict]:
+        """Return endpoints of a script, parsing it only on a cache miss."""
+        endpoints = self.get(content_hash)
+        if endpoints is None:
+            endpoints = extract_endpoints_from_js(content)
+            self.set(content_hash, endpoints)
+        return endpoints
+
+
+def get_js_analysis_cache(task_config: Optional[dict]) -> JSAnalysisCache:
+    """Build the analysis cache for a run; js_cache=false keeps it in-memory only."""
+    config = task_config or {}
+    client = redis.from_url(settings.redis_url) if config.get("js_cache", True) else None
+    return JSAnalysisCache(
+        redis_client=client,
+        ttl=int(config.get("js_cache_ttl", DEFAULT_JS_CACHE_TTL)),
+    )
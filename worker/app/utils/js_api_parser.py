@@ -3,17 +3,18 @@
 import re
 from urllib.parse import urljoin
 
+# Bump when extraction output changes so cached analysis results are ignored.
+JS_PARSER_VERSION = 3
+
 # Extract <script src="..."> references.
 SCRIPT_SRC_PATTERN = re.compile(
     r"<script[^>]*\bsrc=['\"]([^'\"]+)['\"][^>]*>\s*</script>",
     re.IGNORECASE,
 )
 
-# Extract inline <script>...</script> blocks (without src attribute).
-INLINE_SCRIPT_PATTERN = re.compile(
-    r"<script(?![^>]*\bsrc=)[^>]*>(.*?)</script>",
-    re.IGNORECASE | re.DOTALL,
-)
+# Opening <script ...> tags; inline bodies are located with str.find.
+SCRIPT_TAG_PATTERN = re.compile(r"<script([^>]*)>", re.IGNORECASE)
+SCRIPT_SRC_ATTR_PATTERN = re.compile(r"\bsrc=")
 
 AXIOS_CALL_PATTERN = re.compile(
     r"axios\.(get|post|put|patch|delete)\(\s*['\"`]([^'\"`]+)['\"`]",
@@ -49,8 +50,8 @@ def extract_scripts_from_html(html: str, page_url: str) -> list[dict]:
             }
         )
 
-    for idx, match in enumerate(INLINE_SCRIPT_PATTERN.finditer(html)):
-        content = match.group(1).strip()
+    for idx, content in enumerate(_iter_inline_scripts(html)):
+        content = content.strip()
         if not content:
             continue
         scripts.append(
@@ -64,6 +65,24 @@ def extract_scripts_from_html(html: str, page_url: str) -> list[dict]:
     return scripts
 
 
+def _iter_inline_scripts(html: str):
+    """Yield bodies of <script> blocks without a src attribute, in order."""
+    html_lower = html.lower()
+    pos = 0
+    while True:
+        tag = SCRIPT_TAG_PATTERN.search(html, pos)
+        if not tag:
+            return
+        if SCRIPT_SRC_ATTR_PATTERN.search(tag.group(1)):
+            pos = tag.end()
+            continue
+        close = html_lower.find("</script>", tag.end())
+        if close < 0:
+            return
+        yield html[tag.end() : close]
+        pos = close + len("</script>")
+
+
 def normalize_endpoint(raw_endpoint: str) -> str | None:
     """Normalize endpoint string and discard dynamic/invalid items."""
     endpoint = raw_endpoint.strip()
@@ -86,51 +105,126 @@ def _build_evidence(content: str, start: int, end: int, radius: int = 50) -> str
     return content[left:right].replace("\n", " ").strip()
 
 
-def extract_endpoints_from_js(content: str) -> list[dict]:
-    """Extract potential API endpoints from JavaScript code."""
-    findings: dict[tuple[str, str], dict] = {}
+class ChunkedEndpointScanner:
+    """
+    Chunked multi-pattern endpoint scan over JavaScript fed in chunks.
 
-    for match in AXIOS_CALL_PATTERN.finditer(content):
-        method = match.group(1).upper()
+    This is not a single-pass tokenizer: each chunk window is searched
+    once per pattern. The axios, fetch and generic endpoint patterns run
+    independently, so a quote the patterns misread (in a regex literal or
+    comment, say) cannot hide endpoints after it. Chunks are scanned as
+    they arrive and only the last ``LOOKAHEAD`` characters are carried
+    over, so bundles of any size use constant memory; a match longer than
+    ``LOOKAHEAD`` that straddles a chunk boundary may be missed.
+    """
+
+    # Keep matches starting this close to the chunk end unscanned until more input arrives.
+    LOOKAHEAD = 16384
+    EVIDENCE_RADIUS = 50
+
+    def __init__(self):
+        self._axios: dict[tuple[str, str], dict] = {}
+        self._fetch: dict[tuple[str, str], dict] = {}
+        self._generic: dict[tuple[str, str], dict] = {}
+        self._buffer = ""
+        self._offset = 0  # absolute position of _buffer[0]
+        self._history = ""  # text just before _buffer, for evidence
+        # Absolute end of the last match per pattern; matches never overlap.
+        self._resume = {"axios": 0, "fetch": 0, "generic": 0}
+
+    def feed(self, chunk: str) -> None:
+        """Scan the next piece of script source."""
+        self._buffer += chunk
+        self._scan(final=False)
+
+    def finish(self) -> list[dict]:
+        """Scan remaining input and return findings sorted by endpoint."""
+        self._scan(final=True)
+        # Same precedence as separate whole-script passes: fetch over axios,
+        # and a generic literal never replaces a call site.
+        findings = {**self._axios, **self._fetch}
+        for key, finding in self._generic.items():
+            findings.setdefault(key, finding)
+        return sorted(findings.values(), key=lambda x: (x["endpoint"], x["method"]))
+
+    def _scan(self, final: bool) -> None:
+        buf = self._buffer
+        limit = len(buf) if final else len(buf) - self.LOOKAHEAD
+        if limit <= 0:
+            return
+
+        text = self._history + buf
+        base = len(self._history)
+        for name, pattern, handle in (
+            ("axios", AXIOS_CALL_PATTERN, self._add_axios),
+            ("fetch", FETCH_CALL_PATTERN, self._add_fetch),
+            ("generic", GENERIC_ENDPOINT_PATTERN, self._add_generic),
+        ):
+            pos = max(0, self._resume[name] - self._offset)
+            last = None
+            for match in pattern.finditer(buf, pos):
+                if match.start() >= limit:
+                    break
+                handle(match, text, base)
+                last = match
+            if last is not None:
+                self._resume[name] = self._offset + last.end()
+
+        self._history = text[: base + limit][-self.EVIDENCE_RADIUS :]
+        self._buffer = buf[limit:]
+        self._offset += limit
+
+    def _evidence(self, match: re.Match, text: str, base: int) -> str:
+        start, end = match.span()
+        radius = self.EVIDENCE_RADIUS
+        return text[max(0, base + start - radius) : base + end + radius].replace(
+            "\n", " "
+        ).strip()
+
+    def _add_axios(self, match: re.Match, text: str, base: int) -> None:
         endpoint = normalize_endpoint(match.group(2))
         if not endpoint:
-            continue
-        key = (method, endpoint)
-        findings[key] = {
+            return
+        method = match.group(1).upper()
+        self._axios[(method, endpoint)] = {
             "method": method,
             "endpoint": endpoint,
-            "evidence": _build_evidence(content, match.start(), match.end()),
+            "evidence": self._evidence(match, text, base),
         }
 
-    for match in FETCH_CALL_PATTERN.finditer(content):
+    def _add_fetch(self, match: re.Match, text: str, base: int) -> None:
         endpoint = normalize_endpoint(match.group(1))
         if not endpoint:
-            continue
-        options = match.group("options") or ""
-        method_match = METHOD_PATTERN.search(options)
+            return
+        method_match = METHOD_PATTERN.search(match.group("options") or "")
         method = method_match.group(1).upper() if method_match else "GET"
-        key = (method, endpoint)
-        findings[key] = {
+        self._fetch[(method, endpoint)] = {
             "method": method,
             "endpoint": endpoint,
-            "evidence": _build_evidence(content, match.start(), match.end()),
+            "evidence": self._evidence(match, text, base),
         }
 
-    for match in GENERIC_ENDPOINT_PATTERN.finditer(content):
-        endpoint = normalize_endpoint(match.group(1))
-        if not endpoint:
-            continue
-        key = ("GET", endpoint)
-        findings.setdefault(
-            key,
-            {
-                "method": "GET",
-                "endpoint": endpoint,
-                "evidence": _build_evidence(content, match.start(), match.end()),
-            },
-        )
+    def _add_generic(self, match: re.Match, text: str, base: int) -> None:
+        raw = match.group(1)
+        # Accepted generic literals normalize to themselves, so a repeated
+        # literal is skipped before normalizing it again.
+        if ("GET", raw) in self._generic:
+            return
+        endpoint = normalize_endpoint(raw)
+        if not endpoint or ("GET", endpoint) in self._generic:
+            return
+        self._generic[("GET", endpoint)] = {
+            "method": "GET",
+            "endpoint": endpoint,
+            "evidence": self._evidence(match, text, base),
+        }
 
-    return sorted(findings.values(), key=lambda x: (x["endpoint"], x["method"]))
+
+def extract_endpoints_from_js(content: str) -> list[dict]:
+    """Extract potential API endpoints from JavaScript code."""
+    scanner = ChunkedEndpointScanner()
+    scanner.feed(content)
+    return scanner.finish()
 
 
 def classify_endpoint_risks(endpoint: str, method: str) -> list[dict]:
@@ -0,0 +1,112 @@
+"""Asyncio TCP connect scanner used when nmap is unavailable."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_CONCURRENCY = 500
+DEFAULT_CONNECT_PER_HOST = 32
+DEFAULT_CONNECT_TIMEOUT = 2.0
+
+# File descriptors kept free for the worker itself (DB, broker, logging).
+_RESERVED_FDS = 64
+
+
+def get_connect_scan_config(task_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Read connect scanner limits from task config with defaults."""
+    config = task_config or {}
+    return {
+        "concurrency": max(1, int(config.get("connect_concurrency", DEFAULT_CONNECT_CONCURRENCY))),
+        "per_host": max(1, int(config.get("connect_per_host", DEFAULT_CONNECT_PER_HOST))),
+        "timeout": max(0.1, float(config.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT))),
+    }
+
+
+def _clamp_to_fd_limit(concurrency: int) -> int:
+    """Keep concurrent sockets below the process open-file limit."""
+    try:
+        import resource
+
+        soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ImportError, ValueError, OSError):
+        return concurrency
+    if soft_limit == resource.RLIM_INFINITY:
+        return concurrency
+    return max(1, min(concurrency, soft_limit - _RESERVED_FDS))
+
+
+def _iter_targets(ips: List[str], ports: List[int]) -> Iterator[Tuple[str, int]]:
+    # Port-major order spreads consecutive connects across hosts so the
+    # per-host cap rarely stalls a worker coroutine.
+    for port in ports:
+        for ip in ips:
+            yield ip, port
+
+
+async def _is_port_open(ip: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def _scan(
+    ips: List[str],
+    ports: List[int],
+    concurrency: int,
+    per_host: int,
+    timeout: float,
+) -> Dict[str, List[int]]:
+    results: Dict[str, List[int]] = {ip: [] for ip in ips}
+    host_limits = {ip: asyncio.Semaphore(per_host) for ip in ips}
+    targets = _iter_targets(ips, ports)
+
+    async def worker() -> None:
+        for ip, port in targets:
+            async with host_limits[ip]:
+                if await _is_port_open(ip, port, timeout):
+                    results[ip].append(port)
+
+    workers = min(concurrency, len(ips) * len(ports))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+    for open_ports in results.values():
+        open_ports.sort()
+    return results
+
+
+def scan_tcp_ports(
+    ips: List[str],
+    ports: List[int],
+    concurrency: int = DEFAULT_CONNECT_CONCURRENCY,
+    per_host: int = DEFAULT_CONNECT_PER_HOST,
+    timeout: float = DEFAULT_CONNECT_TIMEOUT,
+) -> Dict[str, List[int]]:
+    """
+    Run TCP connect scans for every (ip, port) pair in parallel.
+
+    Concurrency is bounded globally and per host. Returns open ports per IP.
+    """
+    ips = list(dict.fromkeys(ips))
+    ports = list(dict.fromkeys(int(p) for p in ports))
+    if not ips or not ports:
+        return {ip: [] for ip in ips}
+
+    concurrency = _clamp_to_fd_limit(concurrency)
+    logger.info(
+        "Connect scan: %d hosts x %d ports (concurrency=%d, per_host=%d, timeout=%.1fs)",
+        len(ips),
+        len(ports),
+        concurrency,
+        per_host,
+        timeout,
+    )
+    return asyncio.run(_scan(ips, ports, concurrency, per_host, timeout))
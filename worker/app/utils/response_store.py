@@ -0,0 +1,177 @@
+"""Compressed HTTP response snapshots shared between scan stages."""
+
+import hashlib
+import json
+import logging
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import redis
+
+from shared.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_TTL = 3600
+DEFAULT_SNAPSHOT_MAX_BODY = 512000
+
+
+@dataclass
+class ResponseSnapshot:
+    """Response captured by http_probe for reuse by later stages."""
+
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    truncated: bool = False
+    favicon: Optional[bytes] = None
+    favicon_fetched: bool = False
+    fetched_at: float = 0.0
+
+    @property
+    def response_hash(self) -> str:
+        return hashlib.sha256(self.body).hexdigest()
+
+    def text(self, max_size: Optional[int] = None) -> str:
+        body = self.body if max_size is None else self.body[:max_size]
+        return body.decode("utf-8", errors="ignore")
+
+
+class ResponseSnapshotStore:
+    """
+    Redis store of zlib-compressed response snapshots.
+
+    Bodies and favicons are stored once per sha256 (the value written to
+    ``WebAsset.response_hash``); a per-URL record points at them and holds
+    the status, headers and fetch time. All entries expire after ``ttl``.
+    Redis errors and corrupt entries are logged and treated as cache misses.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        ttl: int = DEFAULT_SNAPSHOT_TTL,
+        max_body: int = DEFAULT_SNAPSHOT_MAX_BODY,
+        key_prefix: str = "snapshot",
+    ):
+        self.redis = redis_client or redis.from_url(settings.redis_url)
+        self.ttl = max(1, int(ttl))
+        self.max_body = max(1, int(max_body))
+        self.key_prefix = key_prefix
+
+    def _url_key(self, url: str) -> str:
+        return f"{self.key_prefix}:url:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+    def _blob_key(self, digest: str) -> str:
+        return f"{self.key_prefix}:blob:{digest}"
+
+    def save(
+        self,
+        url: str,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        truncated: bool = False,
+        favicon: Optional[bytes] = None,
+        favicon_fetched: bool = False,
+    ) -> str:
+        """Store a response snapshot and return its response hash."""
+        if len(body) > self.max_body:
+            body, truncated = body[: self.max_body], True
+        response_hash = hashlib.sha256(body).hexdigest()
+        favicon_hash = hashlib.sha256(favicon).hexdigest() if favicon else None
+        meta = {
+            "status": status,
+            "headers": headers,
+            "truncated": truncated,
+            "response_hash": response_hash,
+            "favicon_hash": favicon_hash,
+            "favicon_fetched": favicon_fetched,
+            "fetched_at": time.time(),
+        }
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(self._blob_key(response_hash), zlib.compress(body), ex=self.ttl)
+            if favicon_hash:
+                pipe.set(self._blob_key(favicon_hash), zlib.compress(favicon), ex=self.ttl)
+            pipe.set(
+                self._url_key(url),
+                zlib.compress(json.dumps(meta).encode("utf-8")),
+                ex=self.ttl,
+            )
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to store response snapshot for {url}: {e}")
+        return response_hash
+
+    def get(
+        self,
+        url: str,
+        max_age: Optional[float] = None,
+        response_hash: Optional[str] = None,
+    ) -> Optional[ResponseSnapshot]:
+        """
+        Return the snapshot of ``url`` if it is younger than ``max_age``.
+
+        When ``response_hash`` is given, a snapshot of different content is
+        treated as stale.
+        """
+        url_key = self._url_key(url)
+        try:
+            raw_meta = self.redis.get(url_key)
+            if raw_meta is None:
+                return None
+            meta = json.loads(zlib.decompress(raw_meta))
+            if response_hash and meta["response_hash"] != response_hash:
+                return None
+            if max_age is not None and time.time() - meta["fetched_at"] > max_age:
+                return None
+
+            keys = [self._blob_key(meta["response_hash"])]
+            if meta.get("favicon_hash"):
+                keys.append(self._blob_key(meta["favicon_hash"]))
+            blobs = self.redis.mget(keys)
+            if blobs[0] is None or (len(blobs) > 1 and blobs[1] is None):
+                return None
+            return ResponseSnapshot(
+                url=url,
+                status=meta["status"],
+                headers=meta.get("headers") or {},
+                body=zlib.decompress(blobs[0]),
+                truncated=bool(meta.get("truncated")),
+                favicon=zlib.decompress(blobs[1]) if len(blobs) > 1 else None,
+                favicon_fetched=bool(meta.get("favicon_fetched")),
+                fetched_at=meta["fetched_at"],
+            )
+        except redis.RedisError as e:
+            logger.debug(f"Response snapshot lookup failed for {url}: {e}")
+            return None
+        except (ValueError, KeyError, zlib.error) as e:
+            # A corrupt entry is a miss; drop it so the next save replaces it.
+            logger.debug(f"Discarding corrupt response snapshot for {url}: {e}")
+            try:
+                self.redis.delete(url_key)
+            except redis.RedisError:
+                pass
+            return None
+
+
+def get_snapshot_store(task_config: Optional[dict]) -> Optional[ResponseSnapshotStore]:
+    """Return a snapshot store for a task, or None if snapshots are disabled."""
+    config = task_config or {}
+    if not config.get("response_snapshots", True):
+        return None
+    return ResponseSnapshotStore(
+        ttl=int(config.get("snapshot_ttl", DEFAULT_SNAPSHOT_TTL)),
+        max_body=int(config.get("snapshot_max_body", DEFAULT_SNAPSHOT_MAX_BODY)),
+    )
+
+
+def get_snapshot_max_age(task_config: Optional[dict]) -> float:
+    """Maximum snapshot age a reading stage accepts; 0 disables reuse."""
+    config = task_config or {}
+    return float(config.get("snapshot_max_age", DEFAULT_SNAPSHOT_TTL))
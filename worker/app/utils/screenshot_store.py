@@ -0,0 +1,175 @@
+"""Content-addressed screenshot storage with WebP recompression and thumbnails."""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_URL_PREFIX = "/screenshots"
+DEFAULT_WEBP_QUALITY = 80
+DEFAULT_THUMBNAIL_SIZE = (320, 200)
+THUMBNAIL_SUFFIX = ".thumb"
+# Unreferenced objects younger than this are kept: a capture is stored
+# before the web asset that points at it is written.
+DEFAULT_GC_MIN_AGE = 3600
+
+
+def thumbnail_path(screenshot_path: Optional[str]) -> Optional[str]:
+    """Public thumbnail path of a stored screenshot, or None for legacy paths."""
+    if not screenshot_path or not screenshot_path.endswith(".webp"):
+        return None
+    if screenshot_path.endswith(f"{THUMBNAIL_SUFFIX}.webp"):
+        return screenshot_path
+    return f"{screenshot_path[: -len('.webp')]}{THUMBNAIL_SUFFIX}.webp"
+
+
+class ScreenshotStore:
+    """
+    Screenshots stored once per sha256 of the captured image.
+
+    Captures are recompressed to WebP with a small thumbnail next to them,
+    under ``<root>/<sha[:2]>/<sha>.webp`` and ``<sha>.thumb.webp``; the
+    returned public path is the same layout under ``/screenshots``. Without
+    Pillow the original PNG is stored as ``<sha>.png`` and no thumbnail is
+    made.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        quality: int = DEFAULT_WEBP_QUALITY,
+        thumbnail_size: Tuple[int, int] = DEFAULT_THUMBNAIL_SIZE,
+        url_prefix: str = SCREENSHOT_URL_PREFIX,
+    ):
+        self.root = root
+        self.quality = quality
+        self.thumbnail_size = thumbnail_size
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def _object_dir(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2])
+
+    def _public_path(self, digest: str, ext: str) -> str:
+        return f"{self.url_prefix}/{digest[:2]}/{digest}{ext}"
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        """
+        Refresh the mtime of a stored file; return False if it does not exist.
+
+        A deduplicated capture reuses an object that may be an old orphan, and
+        garbage collection spares files younger than ``min_age`` until the new
+        reference is written.
+        """
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, data: bytes) -> str:
+        """Store a captured image and return its public path."""
+        digest = hashlib.sha256(data).hexdigest()
+        object_dir = self._object_dir(digest)
+        for ext in (".webp", ".png"):
+            if self._touch(os.path.join(object_dir, f"{digest}{ext}")):
+                if ext == ".webp":
+                    self._touch(os.path.join(object_dir, f"{digest}{THUMBNAIL_SUFFIX}.webp"))
+                return self._public_path(digest, ext)
+
+        encoded = _encode_webp(data, self.quality, self.thumbnail_size)
+        os.makedirs(object_dir, exist_ok=True)
+        if encoded is None:
+            _write_atomic(os.path.join(object_dir, f"{digest}.png"), data)
+            return self._public_path(digest, ".png")
+
+        image, thumbnail = encoded
+        # The thumbnail goes first so a stored image always has one.
+        _write_atomic(os.path.join(object_dir, f"{digest}{THUMBNAIL_SUFFIX}.webp"), thumbnail)
+        _write_atomic(os.path.join(object_dir, f"{digest}.webp"), image)
+        return self._public_path(digest, ".webp")
+
+    def put_file(self, path: str) -> str:
+        """Store an image file, remove it, and return its public path."""
+        with open(path, "rb") as f:
+            data = f.read()
+        public_path = self.put(data)
+        os.remove(path)
+        return public_path
+
+    def iter_objects(self) -> Iterator[Tuple[str, str]]:
+        """Yield (public path, file path) of every stored file, thumbnails included."""
+        if not os.path.isdir(self.root):
+            return
+        for shard in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            for name in sorted(os.listdir(shard_dir)):
+                if name.startswith("."):
+                    continue
+                yield f"{self.url_prefix}/{shard}/{name}", os.path.join(shard_dir, name)
+
+    def collect_garbage(
+        self, referenced: Iterable[str], min_age: float = DEFAULT_GC_MIN_AGE
+    ) -> int:
+        """Delete stored files not referenced by any screenshot path; return the count."""
+        keep = set()
+        for path in referenced:
+            keep.add(path)
+            thumb = thumbnail_path(path)
+            if thumb:
+                keep.add(thumb)
+
+        cutoff = time.time() - min_age
+        removed = 0
+        for public_path, file_path in self.iter_objects():
+            if public_path in keep:
+                continue
+            try:
+                if os.path.getmtime(file_path) > cutoff:
+                    continue
+                os.remove(file_path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+def _encode_webp(
+    data: bytes, quality: int, thumbnail_size: Tuple[int, int]
+) -> Optional[Tuple[bytes, bytes]]:
+    """Return (image, thumbnail) as WebP, or None if Pillow cannot encode it."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = img.convert("RGB")
+            image = io.BytesIO()
+            img.save(image, format="WEBP", quality=quality, method=4)
+            img.thumbnail(thumbnail_size)
+            thumbnail = io.BytesIO()
+            img.save(thumbnail, format="WEBP", quality=quality, method=4)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to recompress screenshot: {e}")
+        return None
+    return image.getvalue(), thumbnail.getvalue()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise